@@ -0,0 +1,262 @@
+# admission.py
+import logging
+import threading
+import time
+import uuid
+import fitz  # PyMuPDF
+import redis
+from PIL import Image
+from django.conf import settings
+from .progress import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Page size assumed when the document isn't at hand (US Letter, in points)
+DEFAULT_PAGE_SIZE = (612, 792)
+
+# Conversions rendering whole pages, at the DPI the views and jobs render at
+RASTER_DPI = {'pdf2jpg': 96, 'pdf2png': 96, 'pdf2webp': 96}
+
+# Conversions decoding whole input images
+IMAGE_INPUT_TYPES = ('jpg2pdf', 'png2pdf')
+
+# A rendered page is alive as the pixmap, the PIL image and the encoder's
+# buffer at once; three bytes per RGB pixel each
+RASTER_COPIES = 3
+
+
+class AdmissionRejected(Exception):
+    """The memory budget stayed full for the whole wait"""
+
+    def __init__(self, nbytes, retry_after):
+        super().__init__(f'No memory budget free for a {nbytes // (1024 * 1024)} MB conversion')
+        self.nbytes = nbytes
+        self.retry_after = retry_after
+
+
+def estimate_memory(conversion_type, page_count, input_size, page_size=DEFAULT_PAGE_SIZE, pixels=None):
+    """
+    Estimated peak memory of one conversion, in bytes.
+
+    A fixed base, the input held twice (read and parsed), a per-page cost
+    for the conversion type from ADMISSION_PAGE_BYTES and, for conversions
+    rendering pages, the largest page (``page_size`` in points) at its DPI.
+    Image to PDF conversions add their decoded input ``pixels``, taken as
+    three per input byte when unknown (JPEG and PNG compress about 10:1).
+    """
+    estimate = settings.ADMISSION_BASE_BYTES + 2 * input_size
+    estimate += page_count * settings.ADMISSION_PAGE_BYTES.get(
+        conversion_type, settings.ADMISSION_DEFAULT_PAGE_BYTES
+    )
+
+    dpi = RASTER_DPI.get(conversion_type)
+    if dpi:
+        width, height = page_size
+        estimate += RASTER_COPIES * 3 * int(width * dpi / 72) * int(height * dpi / 72)
+
+    if conversion_type in IMAGE_INPUT_TYPES:
+        if pixels is None:
+            pixels = 3 * input_size
+        estimate += RASTER_COPIES * 3 * pixels
+
+    return estimate
+
+
+def estimate_pdf_upload(file_obj, conversion_type):
+    """Estimate for converting an uploaded PDF, leaving the file positioned at the start"""
+    if hasattr(file_obj, 'temporary_file_path'):
+        doc = fitz.open(file_obj.temporary_file_path())
+    else:
+        file_obj.seek(0)
+        doc = fitz.open(stream=file_obj.read(), filetype='pdf')
+        file_obj.seek(0)
+    with doc:
+        # Page boxes are read without loading the pages themselves
+        boxes = [doc.page_cropbox(number) for number in range(len(doc))]
+    page_size = max(((box.width, box.height) for box in boxes), key=lambda size: size[0] * size[1],
+                    default=DEFAULT_PAGE_SIZE)
+    return estimate_memory(conversion_type, len(boxes), file_obj.size, page_size)
+
+
+def estimate_image_upload(file_objs, conversion_type):
+    """Estimate for combining uploaded images into a PDF, from their headers"""
+    pixels = 0
+    for file_obj in file_objs:
+        file_obj.seek(0)
+        with Image.open(file_obj) as img:
+            pixels += img.width * img.height
+        file_obj.seek(0)
+    return estimate_memory(
+        conversion_type, len(file_objs), sum(f.size for f in file_objs), pixels=pixels
+    )
+
+
+class Reservation:
+    """Memory held against the budgets until released or its ``with`` block ends"""
+
+    def __init__(self, controller, nbytes, lease_id):
+        self.controller = controller
+        self.nbytes = nbytes
+        self.lease_id = lease_id
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class AdmissionController:
+    """
+    Admits conversions while their estimated memory fits both the budget
+    of this process (ADMISSION_PROCESS_BUDGET) and the budget shared by
+    every web and worker process through Redis (ADMISSION_CLUSTER_BUDGET).
+
+    Cluster reservations are leases that lapse after ADMISSION_LEASE_SECONDS,
+    so a killed process can't hold memory forever. While a process holds
+    leases a background thread renews them every third of that, so long
+    conversions keep theirs. A conversion larger than a whole budget is
+    admitted only once nothing else holds that budget. If Redis is
+    unreachable only the process budget applies.
+    """
+
+    LEASES_KEY = 'admission:leases'
+    SIZES_KEY = 'admission:sizes'
+    POLL_SECONDS = 0.25
+
+    # Drop lapsed leases, then add this one if it fits; returns 1 if admitted
+    ADMIT_SCRIPT = """
+    local lapsed = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    for _, lease in ipairs(lapsed) do
+        redis.call('HDEL', KEYS[2], lease)
+    end
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    local used = 0
+    for _, size in ipairs(redis.call('HVALS', KEYS[2])) do
+        used = used + tonumber(size)
+    end
+    if used > 0 and used + tonumber(ARGV[3]) > tonumber(ARGV[4]) then
+        return 0
+    end
+    redis.call('ZADD', KEYS[1], ARGV[5], ARGV[2])
+    redis.call('HSET', KEYS[2], ARGV[2], ARGV[3])
+    return 1
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._in_use = 0
+        self._admit_script = None
+        self._leases = set()
+        self._renewer = None
+
+    def admit(self, nbytes, wait=None):
+        """
+        Reserve ``nbytes``, waiting up to ``wait`` seconds (without limit
+        when None) for the budgets to free up.
+
+        Raises:
+            AdmissionRejected: If the budgets are still full after ``wait``
+        """
+        deadline = None if wait is None else time.monotonic() + wait
+        if not self._acquire_local(nbytes, deadline):
+            raise AdmissionRejected(nbytes, settings.ADMISSION_RETRY_AFTER)
+
+        lease_id = str(uuid.uuid4())
+        try:
+            while not self._acquire_cluster(lease_id, nbytes):
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise AdmissionRejected(nbytes, settings.ADMISSION_RETRY_AFTER)
+                time.sleep(self.POLL_SECONDS)
+        except BaseException:
+            self._release_local(nbytes)
+            raise
+        if settings.ADMISSION_CLUSTER_BUDGET:
+            self._hold_lease(lease_id)
+        return Reservation(self, nbytes, lease_id)
+
+    def _acquire_local(self, nbytes, deadline):
+        with self._condition:
+            while self._in_use and self._in_use + nbytes > settings.ADMISSION_PROCESS_BUDGET:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            self._in_use += nbytes
+            return True
+
+    def _release_local(self, nbytes):
+        with self._condition:
+            self._in_use -= nbytes
+            self._condition.notify_all()
+
+    def _acquire_cluster(self, lease_id, nbytes):
+        if not settings.ADMISSION_CLUSTER_BUDGET:
+            return True
+        try:
+            if self._admit_script is None:
+                self._admit_script = redis_client().register_script(self.ADMIT_SCRIPT)
+            now = time.time()
+            return bool(self._admit_script(
+                keys=[self.LEASES_KEY, self.SIZES_KEY],
+                args=[now, lease_id, nbytes, settings.ADMISSION_CLUSTER_BUDGET,
+                      now + settings.ADMISSION_LEASE_SECONDS]
+            ))
+        except redis.RedisError as e:
+            logger.warning(f"Cluster admission unavailable, using the process budget only: {str(e)}")
+            return True
+
+    def _hold_lease(self, lease_id):
+        with self._condition:
+            self._leases.add(lease_id)
+            if self._renewer is None or not self._renewer.is_alive():
+                self._renewer = threading.Thread(
+                    target=self._renew_leases, name='admission-leases', daemon=True
+                )
+                self._renewer.start()
+
+    def _renew_leases(self):
+        while True:
+            time.sleep(settings.ADMISSION_LEASE_SECONDS / 3)
+            self.renew_leases()
+
+    def renew_leases(self):
+        """Push back the expiry of the leases this process holds"""
+        with self._condition:
+            leases = list(self._leases)
+        if not leases:
+            return
+        expiry = time.time() + settings.ADMISSION_LEASE_SECONDS
+        try:
+            # XX: a lease that lapsed meanwhile isn't brought back
+            redis_client().zadd(self.LEASES_KEY, dict.fromkeys(leases, expiry), xx=True)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to renew {len(leases)} admission leases: {str(e)}")
+
+    def _release(self, reservation):
+        self._release_local(reservation.nbytes)
+        if not settings.ADMISSION_CLUSTER_BUDGET:
+            return
+        with self._condition:
+            self._leases.discard(reservation.lease_id)
+        try:
+            pipe = redis_client().pipeline()
+            pipe.zrem(self.LEASES_KEY, reservation.lease_id)
+            pipe.hdel(self.SIZES_KEY, reservation.lease_id)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Failed to release admission lease {reservation.lease_id}: {str(e)}")
+
+
+_controller = AdmissionController()
+
+
+def admit(nbytes, wait=None):
+    """Reserve ``nbytes`` with this process's admission controller (see AdmissionController.admit)"""
+    return _controller.admit(nbytes, wait)
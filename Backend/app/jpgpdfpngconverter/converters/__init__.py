@@ -0,0 +1,38 @@
+"""
+Conversion engines, each loaded on first use.
+
+The PDF to Word and PDF to HTML engines pull in pdf2docx, python-docx,
+pdfminer, pdfplumber and numpy. Importing this package loads none of
+them; ``converters.PdfToHtmlConverter`` imports its submodule the first
+time it is accessed, so web processes only pay for the engines their
+requests actually use. Import the names at the point of use (or access
+them as attributes of the package) to keep it that way.
+"""
+import importlib
+import logging
+
+logging.basicConfig(level=logging.INFO)
+
+# Public name -> submodule defining it
+_ENGINES = {
+    'FileConverter': 'files',
+    'PdfToWordConverter': 'word',
+    'PdfConversionError': 'html',
+    'ContentAddressedImageStore': 'html',
+    'PdfToHtmlConverter': 'html',
+}
+
+__all__ = list(_ENGINES)
+
+
+def __getattr__(name):
+    if name not in _ENGINES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_ENGINES[name]}', __name__), name)
+    # Cache on the package so later lookups skip this hook
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
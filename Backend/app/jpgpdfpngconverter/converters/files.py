@@ -0,0 +1,514 @@
+import os
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from PIL import Image
+import fitz  # PyMuPDF
+from .. import delivery, ingest
+from ..scratch import scratch_dir
+from ..models import FileConversion
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class FileConverter:
+    def __init__(self, file_obj, conversion_type):
+        self.file_obj = file_obj
+        self.conversion_type = conversion_type
+        self.conversion = None
+    
+    def validate_file(self):
+        """Validate file based on conversion type with strict checks"""
+        if self.conversion_type == 'jpg2pdf':
+            if not self.file_obj.name.lower().endswith(('.jpg', '.jpeg')):
+                raise ValidationError('Only JPG files are allowed for JPG to PDF conversion')
+            
+            try:
+                with Image.open(self.file_obj) as img:
+                    img.verify()
+                self.file_obj.seek(0)
+            except Exception:
+                raise ValidationError('Invalid JPG image file')
+                
+        elif self.conversion_type == 'pdf2jpg':
+            if not self.file_obj.name.lower().endswith('.pdf'):
+                raise ValidationError('Only PDF files are allowed for PDF to JPG conversion')
+            
+            pdf_header = self.file_obj.read(4)
+            self.file_obj.seek(0)
+            if pdf_header != b'%PDF':
+                raise ValidationError('Invalid PDF file format')
+        
+        elif self.conversion_type == 'png2pdf':
+            if not self.file_obj.name.lower().endswith('.png'):
+                raise ValidationError('Only PNG files are allowed for PNG to PDF conversion')
+            try:
+                with Image.open(self.file_obj) as img:
+                    if img.format != 'PNG':
+                        raise ValidationError('Invalid PNG file')
+                self.file_obj.seek(0)
+            except Exception:
+                raise ValidationError('Invalid PNG image file')
+                
+        elif self.conversion_type == 'pdf2png':
+            if not self.file_obj.name.lower().endswith('.pdf'):
+                raise ValidationError('Only PDF files are allowed for PDF to PNG conversion')
+            pdf_header = self.file_obj.read(4)
+            self.file_obj.seek(0)
+            if pdf_header != b'%PDF':
+                raise ValidationError('Invalid PDF file format')
+
+    def get_output_filename(self, extension):
+        """Generate output filename preserving the original name but changing extension"""
+        original_name = os.path.splitext(self.file_obj.name)[0]
+        return f"{original_name}.{extension}"
+    
+    def create_conversion_record(self):
+        """
+        Create the conversion's record. With INGEST_SINGLE_WRITE the upload
+        isn't stored here: the view writes it to local scratch once and a
+        worker archives it to the key reserved now (see
+        tasks.archive_original), or it isn't kept at all for types outside
+        INGEST_ARCHIVE_TYPES.
+        """
+        self.validate_file()
+        if not settings.INGEST_SINGLE_WRITE:
+            original_file = self.file_obj
+        elif ingest.archives_original(self.conversion_type):
+            original_file = ingest.archive_name(self.file_obj.name)
+        else:
+            original_file = ''
+        self.conversion = FileConversion.objects.create(
+            original_file=original_file,
+            conversion_type=self.conversion_type
+        )
+        return self.conversion
+    
+    def get_output_path(self, extension, output_dir):
+        """Get absolute filesystem path for output in output_dir, the job's scratch directory"""
+        output_filename = self.get_output_filename(extension)
+        return os.path.join(output_dir, f"{self.conversion.id}_{output_filename}")
+    
+    def save_conversion(self, output_path, file_extension):
+        """Save conversion result to database"""
+        output_filename = self.get_output_filename(file_extension)
+        self.conversion.converted_file.name = f'converted_files/{self.conversion.id}_{output_filename}'
+        self.conversion.save()
+        return self.conversion
+
+    def _publish(self, output_path, file_extension):
+        """Record the conversion's output and upload it from scratch"""
+        conversion = self.save_conversion(output_path, file_extension)
+        delivery.publish_output(output_path, conversion.converted_file.name)
+        return conversion
+
+    def convert_pdf_to_jpg(self, pdf_path, output_path):
+        """Convert PDF to JPG with optimized quality and basic compression
+
+        Args:
+            pdf_path: Path to input PDF file
+            output_path: Path to save output JPG file
+
+        Raises:
+            ValueError: If conversion fails or produces invalid output
+        """
+        try:
+            # Validate input file
+            if not os.path.exists(pdf_path):
+                raise ValueError("PDF file does not exist")
+
+            # Open PDF document
+            doc = fitz.open(pdf_path)
+
+            if not doc.is_pdf:
+                doc.close()
+                raise ValueError("Input file is not a valid PDF")
+
+            if len(doc) == 0:
+                doc.close()
+                raise ValueError("PDF document is empty")
+
+            # Convert first page to image
+            page = doc[0]
+            zoom = 2
+            mat = fitz.Matrix(zoom, zoom)
+            pix = page.get_pixmap(matrix=mat, alpha=False)
+            doc.close()
+
+            # Convert to PIL Image
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+            # Save with optimized JPEG settings
+            img.save(
+                output_path,
+                format='JPEG',
+                quality=90,
+                optimize=True,
+                progressive=False,
+                subsampling=0,
+                dpi=(300, 300)
+            )
+
+            # Validate output
+            if not os.path.exists(output_path):
+                raise ValueError("Output file was not created")
+
+            if os.path.getsize(output_path) == 0:
+                os.remove(output_path)
+                raise ValueError("Conversion produced empty file")
+
+        except Exception as e:
+            # Clean up if anything went wrong
+            if 'doc' in locals() and doc:
+                doc.close()
+            if os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except:
+                    pass
+            raise ValueError(f"PDF to JPG conversion failed: {str(e)}")
+
+    def convert_jpg_to_pdf(self, jpg_paths, output_path, is_multiple=False):
+        """Convert JPGs to PDF with enhanced quality and smart sizing:
+        - Single file: Keep original dimensions with max quality
+        - Multiple files: Standardize to consistent larger dimensions (20% larger than largest image)
+        """
+        try:
+            QUALITY = 70        # Maximum quality
+            MARGIN = 30         # 30pt margin (≈10.5mm)
+            
+            if not is_multiple:
+                with Image.open(jpg_paths) as img:
+                    if img.mode != 'RGB':
+                        img = img.convert('RGB')
+                    img.save(
+                        output_path,
+                        format='PDF',
+                        quality=QUALITY,
+                        optimize=True,
+                        dpi=(300, 300)
+                    )
+            else:
+                pdf_pages = []
+                max_width, max_height = 0, 0
+                
+                with Image.open(jpg_paths[0]) as first_img:
+                    max_width, max_height = first_img.size
+                
+                for jpg_path in jpg_paths[1:]:
+                    with Image.open(jpg_path) as img:
+                        max_width = max(max_width, img.width)
+                        max_height = max(max_height, img.height)
+                
+                # Calculate target dimensions (20% larger than largest image)
+                target_width = min(int(max_width * 1.2), 1200)  # Cap at 1200px
+                target_height = min(int(max_height * 1.2), 1600)  # Cap at 1600px
+                
+                for jpg_path in jpg_paths:
+                    with Image.open(jpg_path) as img:
+                        if img.mode != 'RGB':
+                            img = img.convert('RGB')
+                        
+                        # Create canvas with target dimensions
+                        new_img = Image.new('RGB', (target_width, target_height), (255, 255, 255))
+                        
+                        # Calculate available space with margins
+                        paste_width = target_width - (2 * MARGIN)
+                        paste_height = target_height - (2 * MARGIN)
+                        
+                        # Maintain aspect ratio while fitting within available space
+                        img.thumbnail(
+                            (paste_width, paste_height),
+                            resample=Image.LANCZOS
+                        )
+                        
+                        # Center the image
+                        x = (target_width - img.width) // 2
+                        y = (target_height - img.height) // 2
+                        new_img.paste(img, (x, y))
+                        
+                        pdf_pages.append(new_img)
+                
+                if pdf_pages:
+                    pdf_pages[0].save(
+                        output_path,
+                        format='PDF',
+                        save_all=True,
+                        append_images=pdf_pages[1:],
+                        quality=QUALITY,
+                        optimize=True,
+                        dpi=(300, 300)
+                    )
+            
+            if not os.path.exists(output_path):
+                raise ValueError("Output file was not created")
+            if os.path.getsize(output_path) == 0:
+                raise ValueError("Conversion produced empty PDF file")
+        
+        except Exception as e:
+            if os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except OSError:
+                    pass
+            raise ValueError(f"JPG to PDF conversion failed: {str(e)}")
+
+
+    def convert_png_to_pdf(self, png_paths, output_path, is_multiple=False):
+        """Convert PNG(s) to PDF with professional handling:
+        - Single file: Original dimensions with max quality
+        - Multiple files: Standardized A4 pages with optimally sized images
+        - Handles transparency by converting to white background
+        - Maintains high quality with smart compression
+        - Larger image size with reduced margins
+        """
+        try:
+            # Page settings (A4 dimensions at 300dpi)
+            A4_WIDTH = 2480
+            A4_HEIGHT = 3508
+            QUALITY = 95
+            MIN_FILE_SIZE = 1024  # 1KB minimum
+            
+            if not is_multiple:
+                # Single file conversion - preserve original size
+                with Image.open(png_paths) as img:
+                    # Handle transparency
+                    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+                        background = Image.new('RGB', img.size, (255, 255, 255))
+                        background.paste(img, mask=img.split()[-1])
+                        img = background
+                    elif img.mode != 'RGB':
+                        img = img.convert('RGB')
+                    
+                    img.save(
+                        output_path,
+                        format='PDF',
+                        quality=QUALITY,
+                        optimize=True,
+                        dpi=(300, 300),
+                        save_all=True,
+                        compression='zip'
+                    )
+            else:
+                # Multiple file conversion - standardized pages with larger images
+                pdf_pages = []
+                
+                for png_path in png_paths:
+                    with Image.open(png_path) as img:
+                        # Handle transparency
+                        if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+                            background = Image.new('RGB', img.size, (255, 255, 255))
+                            background.paste(img, mask=img.split()[-1])
+                            img = background
+                        elif img.mode != 'RGB':
+                            img = img.convert('RGB')
+                        
+                        # Create new A4 page with white background
+                        new_page = Image.new('RGB', (A4_WIDTH, A4_HEIGHT), (255, 255, 255))
+                        
+                        # Calculate original aspect ratio
+                        original_ratio = img.width / img.height
+                        page_ratio = A4_WIDTH / A4_HEIGHT
+                        
+                        # Determine optimal scaling based on orientation
+                        if original_ratio > page_ratio:
+                            # Landscape image - scale to full width
+                            scale_factor = (A4_WIDTH * 0.9) / img.width  # 90% of page width
+                        else:
+                            # Portrait image - scale to full height
+                            scale_factor = (A4_HEIGHT * 0.9) / img.height  # 90% of page height
+                        
+                        # Apply scaling
+                        new_width = int(img.width * scale_factor)
+                        new_height = int(img.height * scale_factor)
+                        
+                        # Resize with high-quality interpolation
+                        img = img.resize((new_width, new_height), Image.LANCZOS)
+                        
+                        # Calculate centered position
+                        x_offset = (A4_WIDTH - img.width) // 2
+                        y_offset = (A4_HEIGHT - img.height) // 2
+                        
+                        # Paste image onto page
+                        new_page.paste(img, (x_offset, y_offset))
+                        pdf_pages.append(new_page)
+                
+                # Save all pages to PDF
+                if pdf_pages:
+                    pdf_pages[0].save(
+                        output_path,
+                        format='PDF',
+                        save_all=True,
+                        append_images=pdf_pages[1:],
+                        quality=QUALITY,
+                        optimize=True,
+                        dpi=(300, 300),
+                        compression='zip'
+                    )
+            
+            # Validate output
+            if not os.path.exists(output_path):
+                raise ValueError("Output PDF was not created")
+            if os.path.getsize(output_path) < MIN_FILE_SIZE:
+                raise ValueError("Output PDF appears too small, conversion may have failed")
+        
+        except Exception as e:
+            if os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except OSError as cleanup_error:
+                    raise ValueError(f"Conversion failed and cleanup also failed: {str(cleanup_error)}")
+            raise ValueError(f"PNG to PDF conversion failed: {str(e)}")
+
+    def convert_pdf_to_pngs(self, pdf_path, output_folder):
+        """
+        Convert PDF to multiple PNGs (one per page)
+        Returns list of generated PNG file paths
+        """
+        png_files = []
+        try:
+            doc = fitz.open(pdf_path)
+            if not doc.is_pdf:
+                raise ValueError("Invalid PDF file")
+
+            for page_num in range(len(doc)):
+                page = doc.load_page(page_num)
+                
+                # Calculate DPI based on original PDF dimensions
+                zoom = 96 / 72  # Standard 96 DPI
+                mat = fitz.Matrix(zoom, zoom)
+
+                pix = page.get_pixmap(
+                    matrix=mat,
+                    alpha=False,
+                    colorspace="RGB",
+                    dpi=96
+                )
+
+                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+                
+                # Save each page as PNG
+                png_path = os.path.join(output_folder, f"page_{page_num+1}.png")
+                img.save(png_path, format='PNG', optimize=True, compress_level=6)
+                png_files.append(png_path)
+
+            doc.close()
+            return png_files
+
+        except Exception as e:
+            # Cleanup any partial conversions
+            for f in png_files:
+                if os.path.exists(f):
+                    os.remove(f)
+            raise ValueError(f"PDF conversion failed: {str(e)}")
+    
+    def convert_pdf_to_webp(self, pdf_path, output_path):
+        """Convert PDF to WebP with optimized quality and basic compression
+
+        Args:
+            pdf_path: Path to input PDF file
+            output_path: Path to save output WebP file
+
+        Raises:
+            ValueError: If conversion fails or produces invalid output
+        """
+        try:
+            # Validate input file
+            if not os.path.exists(pdf_path):
+                raise ValueError("PDF file does not exist")
+
+            # Open PDF document
+            doc = fitz.open(pdf_path)
+
+            if not doc.is_pdf:
+                doc.close()
+                raise ValueError("Input file is not a valid PDF")
+
+            if len(doc) == 0:
+                doc.close()
+                raise ValueError("PDF document is empty")
+
+            # Convert first page to image
+            page = doc[0]
+            zoom = 2
+            mat = fitz.Matrix(zoom, zoom)
+            pix = page.get_pixmap(matrix=mat, alpha=False)
+            doc.close()
+
+            # Convert to PIL Image
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+            # Save with optimized WebP settings
+            img.save(
+                output_path,
+                format='WEBP',
+                quality=80,
+                method=6
+            )
+
+            # Validate output
+            if not os.path.exists(output_path):
+                raise ValueError("Output file was not created")
+
+            if os.path.getsize(output_path) == 0:
+                os.remove(output_path)
+                raise ValueError("Conversion produced empty file")
+
+        except Exception as e:
+            # Clean up if anything went wrong
+            if 'doc' in locals() and doc:
+                doc.close()
+            if os.path.exists(output_path):
+                try:
+                    os.remove(output_path)
+                except:
+                    pass
+            raise ValueError(f"PDF to WebP conversion failed: {str(e)}")
+        
+    
+
+    def convert(self):
+        """
+        Main conversion method that routes to specific converters. The
+        output is written to the job's scratch directory and published to
+        object storage under the key save_conversion records.
+        """
+        self.create_conversion_record()
+        
+        # Save the uploaded file temporarily, in this conversion's scratch directory
+        scratch = scratch_dir(f'{self.conversion_type}-{self.conversion.id}')
+        try:
+            input_filename = os.path.join(scratch, f"{self.conversion.id}_{self.file_obj.name}")
+            ingest.write_upload(self.file_obj, input_filename)
+            
+            if self.conversion_type == 'jpg2pdf':
+                output_path = self.get_output_path('pdf', scratch)
+                self.convert_jpg_to_pdf(input_filename, output_path)
+                return self._publish(output_path, 'pdf')
+            
+            elif self.conversion_type == 'pdf2jpg':
+                output_path = self.get_output_path('jpg', scratch)
+                self.convert_pdf_to_jpg(input_filename, output_path)
+                return self._publish(output_path, 'jpg')
+        
+            elif self.conversion_type == 'pdf2webp':
+                output_path = self.get_output_path('webp', scratch)
+                self.convert_pdf_to_jpg(input_filename, output_path)
+                return self._publish(output_path, 'webp')
+            
+            elif self.conversion_type == 'png2pdf':
+                output_path = self.get_output_path('pdf', scratch)
+                self.convert_png_to_pdf(input_filename, output_path)
+                return self._publish(output_path, 'pdf')
+            
+            elif self.conversion_type == 'pdf2png':
+                output_path = self.get_output_path('png', scratch)
+                self.convert_pdf_to_png(input_filename, output_path)
+                return self._publish(output_path, 'png')
+            
+            else:
+                raise ValueError(f"Unsupported conversion type: {self.conversion_type}")
+                
+        finally:
+            # Clean up the temporary file
+            scratch.close()
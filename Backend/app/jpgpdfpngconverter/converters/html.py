@@ -0,0 +1,1058 @@
+import io
+from django.conf import settings
+from PIL import Image
+import fitz  # PyMuPDF
+import logging
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+import shutil
+from pathlib import Path
+import tempfile
+import json
+import hashlib
+import re
+from pdfminer.high_level import extract_pages
+from pdfminer.layout import LAParams
+from pdfminer.converter import HTMLConverter
+from pdfminer.pdfinterp import PDFResourceManager
+import pdfplumber
+import numpy as np
+from django.core.files.storage import default_storage
+from django.core.files.base import ContentFile
+from ..delivery import HTML_IMAGE_PREFIX, part_entry
+from ..storage import put
+from ..scratch import scratch_space
+
+logger = logging.getLogger(__name__)
+
+
+class PdfConversionError(Exception):
+    """Custom exception for PDF conversion failures"""
+    pass
+
+
+class ContentAddressedImageStore:
+    """
+    Stores images extracted for HTML output once, under their content hash.
+    
+    Repeated images (logos, backgrounds) map to the same key, so each one
+    is uploaded once and every page referencing it shares the URL.
+    Safe to call from several threads.
+    
+    URLs are ``base_url`` (PDF_TO_HTML_IMAGE_BASE_URL by default) followed
+    by the image's path under the prefix: a stable address, such as the
+    app's image endpoint, rather than a signed or internal storage URL.
+    """
+
+    def __init__(self, storage, base_url=None, prefix=HTML_IMAGE_PREFIX):
+        self.storage = storage
+        self.base_url = settings.PDF_TO_HTML_IMAGE_BASE_URL if base_url is None else base_url
+        self.prefix = prefix
+        self._urls = {}
+        self._lock = Lock()
+
+    def put(self, data, ext):
+        """Store ``data`` if not already present and return its URL"""
+        digest = hashlib.sha256(data).hexdigest()
+        name = f"{digest[:2]}/{digest}.{ext}"
+        key = f"{self.prefix}/{name}"
+        
+        with self._lock:
+            if key in self._urls:
+                return self._urls[key]
+        
+        if not self.storage.exists(key):
+            # The URL is built from the name, so the key must be kept exactly
+            put(self.storage, ContentFile(data), key)
+        url = f"{self.base_url}{name}"
+        
+        with self._lock:
+            self._urls[key] = url
+        return url
+
+
+class _SpanStyleTable:
+    """Per-document table interning span font styles as shared CSS classes.
+
+    Class names are derived from the style itself, so fragments rendered
+    separately for the same document always agree on them, and their rules
+    can be merged into one stylesheet.
+    """
+
+    RULE_PATTERN = re.compile(r'\.([\w-]+)\{[^}]*\}')
+
+    def __init__(self):
+        self._classes = {}
+        self._rules = {}
+
+    def class_for(self, bold, italic, size):
+        size = round(size, 2)
+        key = (bold, italic, size)
+        name = self._classes.get(key)
+        if name is None:
+            name = 'f{}{}-{}'.format(
+                'b' if bold else '',
+                'i' if italic else '',
+                f'{size:.2f}'.replace('.', '_')
+            )
+            rule = ''
+            if bold:
+                rule += 'font-weight:bold;'
+            if italic:
+                rule += 'font-style:italic;'
+            rule += f'font-size:{size}pt;'
+            self._classes[key] = name
+            self._rules[name] = f'.{name}{{{rule}}}'
+        return name
+
+    def css(self):
+        """Rules for every class interned so far, on one line"""
+        return ''.join(self._rules.values())
+
+    def update(self, css):
+        """Add the rules of another table's css()"""
+        for match in self.RULE_PATTERN.finditer(css):
+            self._rules.setdefault(match.group(1), match.group(0))
+
+
+class _HeadedHTMLConverter(HTMLConverter):
+    """pdfminer HTMLConverter that writes our document head instead of its own"""
+
+    def __init__(self, *args, head_html='', **kwargs):
+        self.head_html = head_html
+        super().__init__(*args, **kwargs)
+
+    def write_header(self):
+        self.write(f'<!DOCTYPE html><html>{self.head_html}<body>\n')
+
+
+class PdfToHtmlConverter:
+    """
+    Professional PDF to HTML converter with multiple conversion strategies.
+    Uses MinIO for temporary file storage in Docker environment.
+    """
+
+    DOCUMENT_TITLE = 'Converted PDF Document'
+
+    CLEAN_HTML_HEAD = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Converted Document</title>
+    <style>
+        :root {
+            font-size: 16px;
+            color: #222;
+        }
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, 
+                         Helvetica, Arial, sans-serif;
+            line-height: 1.6;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 2rem;
+        }
+        h1, h2, h3, h4 {
+            color: #111;
+            line-height: 1.3;
+            margin-top: 1.5em;
+            margin-bottom: 0.5em;
+        }
+        h1 { font-size: 1.8rem; border-bottom: 1px solid #eee; padding-bottom: 0.3em; }
+        h2 { font-size: 1.5rem; }
+        h3 { font-size: 1.3rem; }
+        h4 { font-size: 1.1rem; }
+        p, li {
+            margin: 0 0 1rem 0;
+        }
+        strong, b { font-weight: 600; }
+        em, i { font-style: italic; }
+        .page-break {
+            display: block;
+            height: 0;
+            border-top: 1px dashed #ccc;
+            margin: 2rem 0;
+        }
+        @media print {
+            body { padding: 0; }
+            .page-break { page-break-after: always; }
+        }
+    </style>
+</head>
+<body>
+"""
+
+    CLEAN_HTML_TAIL = """</body>
+</html>"""
+
+    # Paginated output index: sticky part navigation over lazily loaded frames
+    INDEX_CSS = (
+        'nav { position: sticky; top: 0; background: #fff; padding: 10px 20px; border-bottom: 1px solid #eee; }'
+        'nav a { margin-right: 12px; white-space: nowrap; }'
+        'iframe { display: block; width: 100%; height: 100vh; border: 0; }'
+    )
+
+    INDEX_SCRIPT = (
+        "document.querySelectorAll('iframe').forEach(function (frame) {"
+        "frame.addEventListener('load', function () {"
+        "try { frame.style.height = frame.contentDocument.documentElement.scrollHeight + 'px'; }"
+        "catch (e) {}"
+        "});"
+        "});"
+    )
+
+    # Shared by every positioned span in the PyMuPDF layout output
+    SPAN_CSS = '.page > span, .page > img { position: absolute; }'
+
+    # Bytes read from the end of an output when checking it is complete
+    OUTPUT_TAIL_BYTES = 4096
+
+    # Image formats browsers display directly; anything else is re-encoded
+    WEB_IMAGE_FORMATS = ('jpeg', 'jpg', 'png', 'gif', 'webp')
+
+    LAYOUT_STYLESHEET = """
+            body {
+                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, 
+                            Helvetica, Arial, sans-serif;
+                line-height: 1.5;
+                color: #333;
+                max-width: 100%;
+                margin: 0;
+                padding: 20px;
+                background-color: #fff;
+            }
+            .page {
+                position: relative;
+                background: white;
+                margin-bottom: 20px;
+                box-shadow: 0 2px 5px rgba(0,0,0,0.1);
+                overflow: hidden;
+            }
+            .textbox {
+                position: absolute;
+                white-space: pre-wrap;
+            }
+            @media print {
+                body { padding: 0; }
+                .page { 
+                    box-shadow: none;
+                    margin: 0;
+                    page-break-after: always;
+                }
+            }
+            """
+
+    TEXT_STYLESHEET = """
+            body {
+                font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, 
+                            Helvetica, Arial, sans-serif;
+                line-height: 1.6;
+                color: #333;
+                max-width: 800px;
+                margin: 0 auto;
+                padding: 20px;
+                background-color: #fff;
+            }
+            h1, h2, h3, h4 {
+                margin-top: 1.8em;
+                margin-bottom: 0.6em;
+                line-height: 1.3;
+                color: #111;
+            }
+            h1 { 
+                font-size: 2rem;
+                border-bottom: 1px solid #eee;
+                padding-bottom: 0.3em;
+            }
+            p, li {
+                margin: 0 0 1.2em 0;
+            }
+            strong, b { 
+                font-weight: 600;
+                color: #000;
+            }
+            @media (max-width: 768px) {
+                body {
+                    padding: 15px;
+                    font-size: 15px;
+                }
+            }
+            @media print {
+                body { 
+                    padding: 0;
+                    max-width: 100%;
+                    font-size: 12pt;
+                }
+                h1, h2, h3 {
+                    page-break-after: avoid;
+                }
+                p, li {
+                    page-break-inside: avoid;
+                }
+            }
+            """
+    
+    def __init__(self, file_obj, image_store=None, pdf_path=None, work_dir=None, on_page=None):
+        """
+        Args:
+            file_obj: Uploaded file, file-like object or default_storage name
+            image_store: Optional ContentAddressedImageStore for page images
+            pdf_path: Local PDF to read in place instead of copying file_obj
+            work_dir: Directory to create temporary files under, by
+                default a job directory of the scratch space
+            on_page: Optional callable invoked after each page is written
+        """
+        self.file_obj = file_obj
+        self.image_store = image_store
+        self.pdf_path = pdf_path
+        self.work_dir = work_dir
+        self.on_page = on_page
+        self.temp_dir = None
+        self._scratch = None
+        self.conversion_methods = [
+            self._convert_with_pymupdf,
+            self._convert_with_pdfminer_enhanced,
+            self._convert_with_pdfplumber
+        ]
+        
+    def convert_to_formatted_html(self):
+        """
+        Convert PDF to HTML with best-effort layout preservation.
+        
+        Returns:
+            Path: Path to the converted HTML file
+            
+        Raises:
+            PdfConversionError: If conversion fails
+        """
+        try:
+            self.temp_dir = self._make_temp_dir()
+            pdf_path = self._save_uploaded_file()
+            output_path = self._get_output_path('html')
+            
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Try conversion methods in order of quality
+            for method in self.conversion_methods:
+                try:
+                    method(pdf_path, output_path)
+                    if self._validate_output(output_path):
+                        return output_path
+                except Exception as e:
+                    logger.warning(f"Method {method.__name__} failed: {str(e)}")
+                    continue
+            
+            raise PdfConversionError("All conversion methods failed")
+            
+        except Exception as e:
+            self.cleanup()
+            raise PdfConversionError(f"Formatted conversion failed: {str(e)}")
+    
+    def convert_to_clean_text(self, engine=None):
+        """
+        Convert PDF to clean, semantic HTML with minimal styling.
+        
+        Args:
+            engine: 'pdfplumber' or 'pymupdf' (defaults to
+                settings.PDF_TO_HTML_CLEAN_ENGINE)
+        
+        Returns:
+            Path: Path to the converted HTML file
+            
+        Raises:
+            PdfConversionError: If conversion fails
+        """
+        try:
+            self.temp_dir = self._make_temp_dir()
+            pdf_path = self._save_uploaded_file()
+            output_path = self._get_output_path('html')
+            
+            # Write each page as soon as it is extracted
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(self._document_head('clean'))
+                self._write_clean_pages(pdf_path, f, engine=engine)
+                f.write(self._document_tail('clean'))
+            
+            return output_path
+            
+        except Exception as e:
+            self.cleanup()
+            raise PdfConversionError(f"Clean text conversion failed: {str(e)}")
+    
+    def convert_page_range(self, conversion_type, start, end):
+        """
+        Render pages [start, end) as a body-only HTML fragment.
+        
+        Fragments of one document can be rendered independently and joined
+        in page order with stitch_fragments(). Formatted fragments always
+        use the PyMuPDF strategy, and start with a line holding the rules
+        of the span classes they use, for the stitched document's head.
+        
+        Returns:
+            Path: Path to the fragment file
+            
+        Raises:
+            PdfConversionError: If conversion fails
+        """
+        try:
+            self.temp_dir = self._make_temp_dir()
+            pdf_path = self._save_uploaded_file()
+            output_path = self._get_output_path('fragment.html')
+            
+            with open(output_path, 'w', encoding='utf-8') as f:
+                if conversion_type == 'formatted':
+                    with self._spool('w+') as body:
+                        styles = _SpanStyleTable()
+                        self._write_formatted_pages(pdf_path, body, styles, start, end)
+                        f.write(f'{styles.css()}\n')
+                        body.seek(0)
+                        shutil.copyfileobj(body, f)
+                else:
+                    self._write_clean_pages(pdf_path, f, start, end)
+            
+            return output_path
+            
+        except Exception as e:
+            self.cleanup()
+            raise PdfConversionError(f"Page range conversion failed: {str(e)}")
+    
+    def convert_to_paginated_html(self, conversion_type, pages_per_part, part_base_url=''):
+        """
+        Convert PDF to one standalone HTML file per ``pages_per_part`` pages,
+        plus an index document that lazy-loads them (from ``part_base_url``,
+        see write_index) and a JSON manifest.
+        
+        Returns:
+            Path: Directory holding the parts, index.html and manifest.json
+            
+        Raises:
+            PdfConversionError: If conversion fails
+        """
+        try:
+            self.temp_dir = self._make_temp_dir()
+            pdf_path = self._save_uploaded_file()
+            output_dir = self.temp_dir / 'paginated'
+            output_dir.mkdir()
+            
+            with fitz.open(pdf_path) as doc:
+                page_count = len(doc)
+            
+            parts = []
+            for index, start in enumerate(range(0, page_count, pages_per_part)):
+                end = min(start + pages_per_part, page_count)
+                part = part_entry(index, start, end)
+                with open(output_dir / part['file'], 'w', encoding='utf-8') as f:
+                    self._write_document(conversion_type, pdf_path, f, start, end)
+                parts.append(part)
+            
+            self.write_index(conversion_type, page_count, parts, output_dir, part_base_url)
+            return output_dir
+            
+        except Exception as e:
+            self.cleanup()
+            raise PdfConversionError(f"Paginated conversion failed: {str(e)}")
+    
+    def write_index(self, conversion_type, page_count, parts, output_dir, part_base_url=''):
+        """
+        Write index.html and manifest.json for paginated output.
+        
+        The index loads each part from ``part_base_url`` followed by its
+        file name; by default that is relative to the index, for output
+        served as a directory. The manifest lists file names only.
+        
+        Returns:
+            tuple: (index path, manifest path)
+        """
+        output_dir = Path(output_dir)
+        manifest = {
+            'conversion_type': conversion_type,
+            'page_count': page_count,
+            'index': 'index.html',
+            'parts': parts
+        }
+        manifest_path = output_dir / 'manifest.json'
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        
+        nav = []
+        sections = []
+        for number, part in enumerate(parts, start=1):
+            label = f"Pages {part['first_page']}&ndash;{part['last_page']}"
+            nav.append(f'<a href="#part-{number}">{label}</a>')
+            sections.append(
+                f'<section id="part-{number}">'
+                f'<iframe src="{part_base_url}{part["file"]}" loading="lazy" title="{label}"></iframe>'
+                '</section>'
+            )
+        
+        index_path = output_dir / 'index.html'
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.write('<!DOCTYPE html><html>')
+            f.write(self._html_head(extra_css=self.INDEX_CSS))
+            f.write(f'<body><nav>{"".join(nav)}</nav>')
+            f.write('\n'.join(sections))
+            f.write(f'<script>{self.INDEX_SCRIPT}</script></body></html>')
+        
+        return index_path, manifest_path
+    
+    def stitch_fragments(self, conversion_type, fragments, output_path):
+        """
+        Join binary fragment file objects, in page order, into one HTML
+        document. Formatted fragments are spooled to a scratch file while
+        their span class rules are merged into the head's stylesheet.
+        """
+        with open(output_path, 'wb') as out:
+            if conversion_type != 'formatted':
+                out.write(self._document_head(conversion_type).encode('utf-8'))
+                for fragment in fragments:
+                    shutil.copyfileobj(fragment, out)
+            else:
+                styles = _SpanStyleTable()
+                with self._spool('w+b') as body:
+                    for fragment in fragments:
+                        styles.update(fragment.readline().decode('utf-8'))
+                        shutil.copyfileobj(fragment, body)
+                    out.write(self._document_head(conversion_type, styles.css()).encode('utf-8'))
+                    body.seek(0)
+                    shutil.copyfileobj(body, out)
+            out.write(self._document_tail(conversion_type).encode('utf-8'))
+        return output_path
+    
+    def _convert_with_pdfminer_enhanced(self, pdf_path, output_path):
+        """High-quality conversion using PDFMiner with enhanced layout analysis"""
+        laparams = LAParams(
+            line_overlap=0.5,
+            line_margin=0.5,
+            word_margin=0.1,
+            boxes_flow=0.7,
+            detect_vertical=True,
+            all_texts=True,
+            char_margin=2.0
+        )
+        
+        with open(output_path, 'w', encoding='utf-8') as out_f:
+            with open(pdf_path, 'rb') as pdf_f:
+                converter = _HeadedHTMLConverter(
+                    PDFResourceManager(),
+                    out_f,
+                    head_html=self._html_head(preserve_layout=True),
+                    codec=None,
+                    laparams=laparams,
+                    scale=1.0,
+                    layoutmode='exact',
+                    showpageno=False,
+                    pagemargin=0,
+                    imagewriter=None,
+                    debug=False
+                )
+                
+                for page in extract_pages(pdf_f, laparams=laparams):
+                    converter.receive_layout(page)
+                
+                converter.close()
+    
+    def _convert_with_pymupdf(self, pdf_path, output_path):
+        """Conversion using PyMuPDF with precise layout preservation.
+
+        Each page is written out as soon as it is rendered, so only one page
+        of markup is held in memory regardless of document length.
+        """
+        with open(output_path, 'w', encoding='utf-8') as f:
+            self._write_document('formatted', pdf_path, f)
+    
+    def _write_document(self, conversion_type, pdf_path, f, start=0, end=None):
+        """
+        Write pages [start, end) as a standalone document: head, pages, tail.
+        
+        Formatted pages are spooled to a scratch file first, so every span
+        class they use is declared in the head's stylesheet.
+        """
+        if conversion_type != 'formatted':
+            f.write(self._document_head(conversion_type))
+            self._write_clean_pages(pdf_path, f, start, end)
+        else:
+            styles = _SpanStyleTable()
+            with self._spool('w+') as body:
+                self._write_formatted_pages(pdf_path, body, styles, start, end)
+                f.write(self._document_head(conversion_type, styles.css()))
+                body.seek(0)
+                shutil.copyfileobj(body, f)
+        f.write(self._document_tail(conversion_type))
+    
+    def _spool(self, mode):
+        """Anonymous scratch file for markup written ahead of its head"""
+        encoding = None if 'b' in mode else 'utf-8'
+        return tempfile.TemporaryFile(mode, encoding=encoding, dir=self.temp_dir or self.work_dir or scratch_space().root)
+    
+    def _write_formatted_pages(self, pdf_path, f, styles, start=0, end=None):
+        """
+        Write the PyMuPDF layout markup for pages [start, end) to ``f``,
+        interning span styles in ``styles``
+        """
+        image_urls = {}
+        
+        with fitz.open(pdf_path) as doc, ThreadPoolExecutor(
+            max_workers=getattr(settings, 'PDF_TO_HTML_IMAGE_WORKERS', 4)
+        ) as executor:
+            for page in doc.pages(start, end):
+                if self.image_store:
+                    self._submit_page_images(doc, page, executor, image_urls)
+                f.write(self._render_pymupdf_page(page, styles, image_urls))
+                f.write('\n')
+                if self.on_page:
+                    self.on_page()
+    
+    def _submit_page_images(self, doc, page, executor, image_urls):
+        """
+        Queue storage of the page's images not seen earlier in the document.
+        
+        Image data is read from the document on this thread (MuPDF objects
+        are not thread-safe); re-encoding, hashing and upload run on the
+        executor. ``image_urls`` maps xref to a future for the stored URL.
+        """
+        for image in page.get_images(full=True):
+            xref, smask = image[0], image[1]
+            if xref in image_urls:
+                continue
+            try:
+                encode = self._read_image(doc, xref, smask)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable image xref {xref}: {str(e)}")
+                image_urls[xref] = None
+                continue
+            image_urls[xref] = executor.submit(
+                lambda encode=encode: self.image_store.put(*encode())
+            )
+    
+    def _read_image(self, doc, xref, smask):
+        """
+        Read an image out of the document, returning a callable that yields
+        its (bytes, extension) in a browser-compatible format.
+        """
+        info = doc.extract_image(xref)
+        if info and not smask and info['ext'] in self.WEB_IMAGE_FORMATS:
+            data, ext = info['image'], info['ext']
+            return lambda: (data, ext)
+        
+        pix = fitz.Pixmap(doc, xref)
+        if smask:
+            pix = fitz.Pixmap(pix, fitz.Pixmap(doc, smask))
+        if pix.n - pix.alpha != 3:
+            pix = fitz.Pixmap(fitz.csRGB, pix)
+        mode = 'RGBA' if pix.alpha else 'RGB'
+        size = (pix.width, pix.height)
+        samples = pix.samples
+        
+        def encode():
+            buffer = io.BytesIO()
+            Image.frombytes(mode, size, samples).save(buffer, format='PNG', optimize=True)
+            return buffer.getvalue(), 'png'
+        
+        return encode
+    
+    def _render_page_images(self, page, image_urls):
+        """Absolutely positioned <img> tags for every placement of the page's images"""
+        rect = page.rect
+        html = []
+        for image in page.get_images(full=True):
+            future = image_urls.get(image[0])
+            if future is None:
+                continue
+            try:
+                url = future.result()
+            except Exception as e:
+                logger.warning(f"Failed to store image xref {image[0]}: {str(e)}")
+                image_urls[image[0]] = None
+                continue
+            for bbox in page.get_image_rects(image[0]):
+                html.append(
+                    f'<img src="{self._escape_html(url)}" alt="" style="'
+                    f'left:{(bbox.x0 - rect.x0) / rect.width * 100:.2f}%;'
+                    f'top:{(bbox.y0 - rect.y0) / rect.height * 100:.2f}%;'
+                    f'width:{bbox.width / rect.width * 100:.2f}%;'
+                    f'height:{bbox.height / rect.height * 100:.2f}%">'
+                )
+        return html
+    
+    def _render_pymupdf_page(self, page, styles, image_urls=None):
+        """Render one PyMuPDF page as an absolutely positioned <div class="page">.
+
+        Font weight, style and size come from classes interned in ``styles``;
+        only the coordinates are written on each span. Images stored for the
+        page in ``image_urls`` are placed underneath the text.
+        """
+        rect = page.rect
+        width = rect.width
+        height = rect.height
+        
+        # Images are placed by xref, so don't have MuPDF decode image blocks
+        blocks = page.get_text(
+            "dict", flags=fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+        )["blocks"]
+        
+        page_html = self._render_page_images(page, image_urls) if image_urls else []
+        for b in blocks:
+            if "lines" in b:
+                for line in b["lines"]:
+                    for span in line["spans"]:
+                        font = span["font"].lower()
+                        css_class = styles.class_for(
+                            "bold" in font, "italic" in font, span["size"]
+                        )
+                        
+                        left_pct = (span["origin"][0] / width) * 100
+                        top_pct = (span["origin"][1] / height) * 100
+                        
+                        page_html.append(
+                            f'<span class="{css_class}" '
+                            f'style="left:{left_pct:.2f}%;top:{top_pct:.2f}%">'
+                            f'{self._escape_html(span["text"])}</span>'
+                        )
+        
+        return (
+            f'<div class="page" style="position:relative;width:100%;height:{height}px;">'
+            f'{"".join(page_html)}</div>'
+        )
+    
+    def _convert_with_pdfplumber(self, pdf_path, output_path):
+        """Conversion using pdfplumber for advanced table and text extraction"""
+        with pdfplumber.open(pdf_path) as pdf, open(output_path, 'w', encoding='utf-8') as f:
+            f.write('<!DOCTYPE html><html>')
+            f.write(self._html_head(
+                preserve_layout=False,
+                extra_css=(
+                    'body { font-family: Arial, sans-serif; line-height: 1.6; }'
+                    '.page { margin-bottom: 30px; border-bottom: 1px solid #eee; padding-bottom: 20px; }'
+                    'table { border-collapse: collapse; width: 100%; margin: 10px 0; }'
+                    'td, th { border: 1px solid #ddd; padding: 8px; }'
+                    'pre { white-space: pre-wrap; font-family: inherit; }'
+                )
+            ))
+            f.write('<body>')
+            
+            for page_num, page in enumerate(pdf.pages, start=1):
+                tables = page.extract_tables({
+                    "vertical_strategy": "text", 
+                    "horizontal_strategy": "text"
+                })
+                
+                text = page.extract_text(
+                    x_tolerance=3,
+                    y_tolerance=3,
+                    layout=False
+                )
+                
+                table_html = "".join(self._table_to_html(table) for table in tables)
+                
+                page_content = f"<div class='page'><h2>Page {page_num}</h2>"
+                if table_html:
+                    page_content += f"<div class='tables'>{table_html}</div>"
+                if text:
+                    page_content += f"<div class='text'><pre>{self._escape_html(text)}</pre></div>"
+                page_content += "</div>"
+                
+                if page_num > 1:
+                    f.write('\n')
+                f.write(page_content)
+                
+                # pdfplumber caches parsed objects per page; drop them once written
+                page.flush_cache()
+            
+            f.write('</body></html>')
+    
+    def _table_to_html(self, table):
+        """Serialize a pdfplumber table (list of rows of cell strings) as HTML"""
+        rows = []
+        for row in table:
+            cells = "".join(
+                f"<td>{self._escape_html(str(cell)) if cell is not None else ''}</td>"
+                for cell in row
+            )
+            rows.append(f"<tr>{cells}</tr>")
+        return f"<table><tbody>{''.join(rows)}</tbody></table>"
+    
+    def _write_clean_pages(self, pdf_path, f, start=0, end=None, engine=None):
+        """Write the clean-text markup for pages [start, end) to ``f``"""
+        if engine is None:
+            engine = getattr(settings, 'PDF_TO_HTML_CLEAN_ENGINE', 'pdfplumber')
+        if engine == 'pymupdf':
+            pages = self._iter_clean_pages_pymupdf(pdf_path, start, end)
+        elif engine == 'pdfplumber':
+            pages = self._iter_clean_pages_pdfplumber(pdf_path, start, end)
+        else:
+            raise ValueError(f"Unsupported clean text engine: {engine}")
+        
+        for page_num, text_blocks in pages:
+            page_html = self._render_clean_page(page_num, text_blocks)
+            if page_html:
+                f.write(page_html)
+                f.write('\n')
+            if self.on_page:
+                self.on_page()
+    
+    def _iter_clean_pages_pdfplumber(self, pdf_path, start=0, end=None):
+        """Yield (page number, text blocks in reading order) using pdfplumber words"""
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num, page in enumerate(pdf.pages[start:end], start=start + 1):
+                words = page.extract_words(
+                    x_tolerance=2,
+                    y_tolerance=2,
+                    keep_blank_chars=False,
+                    use_text_flow=True,
+                    extra_attrs=["fontname", "size"]
+                )
+                
+                text_blocks = [{
+                    'text': word['text'],
+                    'x0': word['x0'],
+                    'x1': word['x1'],
+                    'y0': word['top'],
+                    'y1': word['bottom'],
+                    'page': page_num,
+                    'font_size': word['size'],
+                    'bold': 'bold' in word['fontname'].lower() if word['fontname'] else False,
+                    'italic': 'italic' in word['fontname'].lower() if word['fontname'] else False
+                } for word in words]
+                text_blocks.sort(key=lambda x: (x['y0'], x['x0']))
+                
+                yield page_num, text_blocks
+    
+    def _iter_clean_pages_pymupdf(self, pdf_path, start=0, end=None):
+        """Yield (page number, text blocks in reading order) using PyMuPDF words"""
+        with fitz.open(pdf_path) as doc:
+            for page in doc.pages(start, end):
+                yield page.number + 1, self._pymupdf_clean_blocks(page)
+    
+    def _pymupdf_clean_blocks(self, page, line_tolerance=2.0):
+        """Extract a page's words with font info, grouped into lines.
+        
+        Words come from get_text("words") and fonts from get_text("dict") on
+        the same text page, so a word's (block, line) numbers index straight
+        into the dict output. Span lookup and line grouping are done with
+        NumPy array operations. Paragraphs follow the same rules as the
+        pdfplumber engine's: they break at headings and page ends only.
+        """
+        textpage = page.get_textpage(flags=fitz.TEXTFLAGS_WORDS)
+        words = page.get_text("words", textpage=textpage)
+        if not words:
+            return []
+        
+        # Flatten spans, keyed by their line so words can be matched to them
+        span_line, span_x0, span_size, span_bold, span_italic = [], [], [], [], []
+        line_index = {}
+        for block_no, block in enumerate(page.get_text("dict", textpage=textpage)["blocks"]):
+            for line_no, line in enumerate(block.get("lines", ())):
+                line_id = line_index.setdefault((block_no, line_no), len(line_index))
+                for span in line["spans"]:
+                    font = span["font"].lower()
+                    span_line.append(line_id)
+                    span_x0.append(span["bbox"][0])
+                    span_size.append(span["size"])
+                    span_bold.append("bold" in font)
+                    span_italic.append("italic" in font)
+        
+        boxes = np.array([w[:4] for w in words], dtype=float)
+        x0, y0, x1, y1 = boxes.T
+        word_line = np.array(
+            [line_index.get((w[5], w[6]), -1) for w in words], dtype=float
+        )
+        
+        # Find each word's span: the last span of its line starting left of
+        # the word's centre, via one searchsorted over (line, x0) keys
+        stride = page.rect.width + 1e4
+        span_key = np.array(span_line, dtype=float) * stride + np.array(span_x0)
+        order = np.argsort(span_key, kind='stable')
+        span_key = span_key[order]
+        word_key = word_line * stride + (x0 + x1) / 2
+        idx = np.searchsorted(span_key, word_key, side='right') - 1
+        idx = np.clip(idx, 0, len(span_key) - 1)
+        # Words left of their line's first span belong to that span
+        wrong_line = np.floor(span_key[idx] / stride) != word_line
+        idx = np.where(wrong_line, np.clip(idx + 1, 0, len(span_key) - 1), idx)
+        span = order[idx]
+        sizes = np.array(span_size)[span]
+        bold = np.array(span_bold)[span]
+        italic = np.array(span_italic)[span]
+        
+        # Group words into lines by top coordinate, then read left to right
+        by_top = np.argsort(y0, kind='stable')
+        new_line = np.diff(y0[by_top], prepend=y0[by_top][0]) > line_tolerance
+        line_no = np.empty(len(words), dtype=int)
+        line_no[by_top] = np.cumsum(new_line)
+        reading = np.lexsort((x0, line_no))
+        
+        page_num = page.number + 1
+        return [{
+            'text': words[i][4],
+            'x0': x0[i],
+            'x1': x1[i],
+            'y0': y0[i],
+            'y1': y1[i],
+            'page': page_num,
+            'font_size': float(sizes[i]),
+            'bold': bool(bold[i]),
+            'italic': bool(italic[i])
+        } for i in reading]
+    
+    def _render_clean_page(self, page_num, text_blocks):
+        """Render one page of ordered text blocks as clean semantic HTML"""
+        html_content = []
+        current_paragraph = []
+        
+        if text_blocks and page_num > 1:
+            html_content.append('<hr class="page-break">')
+        
+        for block in text_blocks:
+            text = self._escape_html(block['text'])
+            
+            if block['font_size'] and block['font_size'] > 14:
+                if current_paragraph:
+                    html_content.append(f"<p>{' '.join(current_paragraph)}</p>")
+                    current_paragraph = []
+                html_content.append(f'<h2>{text}</h2>')
+            elif block['font_size'] and block['font_size'] > 12:
+                if current_paragraph:
+                    html_content.append(f"<p>{' '.join(current_paragraph)}</p>")
+                    current_paragraph = []
+                html_content.append(f'<h3>{text}</h3>')
+            else:
+                if block['bold'] and block['italic']:
+                    text = f'<strong><em>{text}</em></strong>'
+                elif block['bold']:
+                    text = f'<strong>{text}</strong>'
+                elif block['italic']:
+                    text = f'<em>{text}</em>'
+                
+                current_paragraph.append(text)
+        
+        if current_paragraph:
+            html_content.append(f"<p>{' '.join(current_paragraph)}</p>")
+        
+        return '\n'.join(html_content)
+    
+    def _document_head(self, conversion_type, span_css=''):
+        """
+        Markup preceding the pages for 'formatted' or 'clean' output;
+        ``span_css`` holds the span class rules of formatted pages
+        """
+        if conversion_type == 'formatted':
+            return (
+                '<!DOCTYPE html><html>'
+                + self._html_head(preserve_layout=True, extra_css=self.SPAN_CSS + span_css)
+                + '<body>'
+            )
+        return self.CLEAN_HTML_HEAD
+    
+    def _document_tail(self, conversion_type):
+        """Markup following the pages for 'formatted' or 'clean' output"""
+        if conversion_type == 'formatted':
+            return '</body></html>'
+        return self.CLEAN_HTML_TAIL
+    
+    def _html_head(self, preserve_layout=False, extra_css=''):
+        """Build the <head> element each strategy writes ahead of its body.
+
+        The head is emitted up front by the writers themselves, so finishing
+        a document never requires re-reading or re-parsing the output file.
+        """
+        stylesheet = self.LAYOUT_STYLESHEET if preserve_layout else self.TEXT_STYLESHEET
+        if extra_css:
+            stylesheet = extra_css + stylesheet
+        return (
+            '<head><meta charset="UTF-8">'
+            '<meta name="viewport" content="width=device-width, initial-scale=1.0">'
+            f'<title>{self.DOCUMENT_TITLE}</title>'
+            f'<style>{stylesheet}</style>'
+            '</head>'
+        )
+
+    def _save_uploaded_file(self):
+        """Save uploaded file to temporary location with validation"""
+        if self.pdf_path:
+            # Already on local disk, read it where it is
+            pdf_path = Path(self.pdf_path)
+        elif hasattr(self.file_obj, 'read'):
+            # File-like object
+            pdf_path = self.temp_dir / "input.pdf"
+            with open(pdf_path, 'wb+') as f:
+                if hasattr(self.file_obj, 'chunks'):
+                    for chunk in self.file_obj.chunks():
+                        f.write(chunk)
+                else:
+                    shutil.copyfileobj(self.file_obj, f)
+        else:
+            # Path or string
+            pdf_path = self.temp_dir / "input.pdf"
+            with open(pdf_path, 'wb+') as f:
+                with default_storage.open(self.file_obj, 'rb') as source_file:
+                    shutil.copyfileobj(source_file, f)
+        
+        # Verify PDF
+        try:
+            with fitz.open(pdf_path) as doc:
+                if not doc.is_pdf:
+                    raise PdfConversionError("Invalid PDF file")
+        except Exception as e:
+            raise PdfConversionError(f"PDF validation failed: {str(e)}")
+        
+        return pdf_path
+    
+    def _get_output_path(self, ext):
+        """Generate output path in temp directory"""
+        return self.temp_dir / f"output.{ext}"
+    
+    def _validate_output(self, output_path):
+        """
+        Validate the conversion output meets quality standards, reading no
+        more than its last OUTPUT_TAIL_BYTES whatever the document's length
+        """
+        if not output_path.exists():
+            return False
+
+        size = output_path.stat().st_size
+        if size == 0:
+            return False
+
+        # Only outputs this short are read whole: an empty body at most
+        if size < 100:
+            with open(output_path, 'rb') as f:
+                if b'<body' in f.read():
+                    return False
+
+        # Writers end with the closing tags, so only the tail is checked
+        with open(output_path, 'rb') as f:
+            f.seek(max(size - self.OUTPUT_TAIL_BYTES, 0))
+            if b'</body>' not in f.read():
+                return False
+        
+        return True
+    
+    def _escape_html(self, text):
+        """Escape HTML special characters"""
+        return (text.replace('&', '&amp;')
+                   .replace('<', '&lt;')
+                   .replace('>', '&gt;')
+                   .replace('"', '&quot;')
+                   .replace("'", '&#39;'))
+    
+    def _make_temp_dir(self):
+        """
+        Directory for one conversion's files: a new one under work_dir, or
+        without one a job directory of the scratch space, held until cleanup()
+        """
+        if self.work_dir is not None:
+            return Path(tempfile.mkdtemp(dir=self.work_dir))
+        self._scratch = scratch_space().job('pdf2html')
+        return self._scratch.path
+
+    def cleanup(self):
+        """Clean up temporary files"""
+        if self.temp_dir and self.temp_dir.exists():
+            try:
+                shutil.rmtree(self.temp_dir)
+            except Exception as e:
+                logger.error(f"Failed to clean up temp directory {self.temp_dir}: {str(e)}")
+        if self._scratch is not None:
+            self._scratch.close()
+            self._scratch = None
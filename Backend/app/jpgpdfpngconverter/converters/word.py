@@ -0,0 +1,161 @@
+import os
+import fitz  # PyMuPDF
+from docx import Document
+from docx.shared import Pt, RGBColor
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from pdf2docx import Converter
+import logging
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class PdfToWordConverter:
+    """Production-grade PDF to Word conversion service"""
+    
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.lock = Lock()
+    
+    def _validate_pdf(self, pdf_path):
+        """Validate PDF file integrity"""
+        try:
+            with fitz.open(pdf_path) as doc:
+                if not doc.is_pdf:
+                    raise ValueError("Invalid PDF file")
+                if doc.needs_pass:
+                    raise ValueError("Password-protected PDFs are not supported")
+                return len(doc)
+        except Exception as e:
+            raise ValueError(f"PDF validation failed: {str(e)}")
+    
+    def _preserve_layout_conversion(self, pdf_path, output_path):
+        """High-fidelity conversion preserving layout and graphics"""
+        try:
+            with self.lock:  # pdf2docx isn't fully thread-safe
+                cv = Converter(pdf_path)
+                cv.convert(output_path, start=0, end=None)
+                cv.close()
+            
+            # Post-process to clean up common artifacts
+            doc = Document(output_path)
+            
+            # Remove empty paragraphs
+            for paragraph in list(doc.paragraphs):
+                if not paragraph.text.strip():
+                    p = paragraph._element
+                    p.getparent().remove(p)
+            
+            # Ensure proper page breaks
+            for i, section in enumerate(doc.sections):
+                if i > 0:  # Skip first section
+                    section.start_type
+                    
+            doc.save(output_path)
+            return True
+        except Exception as e:
+            logger.error(f"Layout preservation failed: {str(e)}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+    
+    def _text_extraction_conversion(self, pdf_path, output_path):
+        """Clean text extraction with basic formatting"""
+        try:
+            doc = Document()
+            style = doc.styles['Normal']
+            font = style.font
+            font.name = 'Calibri'
+            font.size = Pt(11)
+            
+            with fitz.open(pdf_path) as pdf_doc:
+                for page in pdf_doc:
+                    blocks = page.get_text("dict")["blocks"]
+                    
+                    # Add page break (except for first page)
+                    if page.number > 0:
+                        doc.add_page_break()
+                    
+                    for b in blocks:
+                        if b["type"] == 0:  # Text block
+                            paragraph = doc.add_paragraph()
+                            
+                            for l in b["lines"]:
+                                for s in l["spans"]:
+                                    run = paragraph.add_run(s["text"])
+                                    
+                                    # Preserve formatting
+                                    if "bold" in s["font"].lower():
+                                        run.bold = True
+                                    if "italic" in s["font"].lower():
+                                        run.italic = True
+                                    
+                                    # Preserve color if not black
+                                    if s["color"] != 0:
+                                        rgb = (
+                                            s["color"] >> 16 & 0xff,
+                                            s["color"] >> 8 & 0xff,
+                                            s["color"] & 0xff
+                                        )
+                                        if rgb != (0, 0, 0):
+                                            run.font.color.rgb = RGBColor(*rgb)
+                                    
+                                    # Preserve font size (clamped)
+                                    run.font.size = Pt(max(8, min(36, s["size"] * 0.7)))
+                            
+                            # Preserve alignment
+                            if "align" in b:
+                                align_map = {
+                                    0: WD_PARAGRAPH_ALIGNMENT.LEFT,
+                                    1: WD_PARAGRAPH_ALIGNMENT.CENTER,
+                                    2: WD_PARAGRAPH_ALIGNMENT.RIGHT,
+                                    3: WD_PARAGRAPH_ALIGNMENT.JUSTIFY
+                                }
+                                paragraph.alignment = align_map.get(b["align"], WD_PARAGRAPH_ALIGNMENT.LEFT)
+            
+            doc.save(output_path)
+            return True
+        except Exception as e:
+            logger.error(f"Text extraction failed: {str(e)}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+    
+    def convert_pdf_to_word(self, pdf_path, output_path, preserve_graphics=True):
+        """Convert PDF to Word with production-grade quality
+        
+        Args:
+            pdf_path: Path to input PDF
+            output_path: Output DOCX path
+            preserve_graphics: Whether to preserve layout (True) or extract text (False)
+            
+        Returns:
+            dict: Conversion metadata including page count and file size
+        """
+        try:
+            # Validate input
+            page_count = self._validate_pdf(pdf_path)
+            
+            # Perform conversion
+            if preserve_graphics:
+                self._preserve_layout_conversion(pdf_path, output_path)
+            else:
+                self._text_extraction_conversion(pdf_path, output_path)
+            
+            # Validate output
+            if not os.path.exists(output_path):
+                raise ValueError("Conversion failed - no output file created")
+            if os.path.getsize(output_path) == 0:
+                os.remove(output_path)
+                raise ValueError("Conversion produced empty file")
+            
+            return {
+                "page_count": page_count,
+                "file_size": os.path.getsize(output_path),
+                "preserved_layout": preserve_graphics
+            }
+            
+        except Exception as e:
+            logger.error(f"PDF to Word conversion failed: {str(e)}")
+            raise
@@ -0,0 +1,80 @@
+# delivery.py
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from . import status_cache
+from .storage import presign_get, transfer_storage, upload
+
+# Images extracted into HTML output, stored once under their content hash
+HTML_IMAGE_PREFIX = 'html-images'
+HTML_IMAGE_NAME = re.compile(r'[0-9a-f]{2}/[0-9a-f]{64}\.(?:jpeg|jpg|png|gif|webp)')
+# Parts of paginated HTML output, stored under converted/<task_id>/
+HTML_PART_NAME = re.compile(r'part-\d{4}\.html')
+
+
+def part_filename(index):
+    """File name of the ``index``-th (0-based) part of paginated output"""
+    return f"part-{index + 1:04d}.html"
+
+
+def part_entry(index, start, end):
+    """Manifest entry for the part covering pages [start, end)"""
+    return {
+        'file': part_filename(index),
+        'first_page': start + 1,
+        'last_page': end
+    }
+
+
+def part_base_url(task_id):
+    """
+    Prefix of the part URLs in a job's paginated index: the app's part
+    endpoint by default (see PDF_TO_HTML_PART_BASE_URL), as the bucket
+    only serves presigned requests.
+    """
+    return f'{settings.PDF_TO_HTML_PART_BASE_URL}{task_id}/'
+
+
+def publish_output(local_path, key):
+    """
+    Upload a finished output to object storage under ``key`` and drop the
+    local copy, so it can be downloaded whichever node converted it.
+    """
+    upload(transfer_storage(), local_path, key)
+    os.remove(local_path)
+    return key
+
+
+def _presign(key, expiry_seconds):
+    filename = os.path.basename(key)
+    return presign_get(
+        key, expiry_seconds,
+        ResponseContentDisposition=f"attachment; filename*=UTF-8''{quote(filename)}"
+    )
+
+
+def download_url(key):
+    """
+    Presigned URL downloading an output straight from storage, which
+    serves range requests so interrupted downloads can resume.
+    """
+    return status_cache.presigned_url(key, _presign)
+
+
+def html_image_url(name):
+    """
+    Presigned URL of an extracted image, ``name`` being its path under
+    HTML_IMAGE_PREFIX. HTML output refers to images through
+    PDF_TO_HTML_IMAGE_BASE_URL instead, so the documents outlive any
+    signature and never contain internal storage addresses.
+    """
+    return status_cache.presigned_url(f'{HTML_IMAGE_PREFIX}/{name}', presign_get)
+
+
+def html_part_url(task_id, name):
+    """
+    Presigned URL of a part of a job's paginated output, served inline so
+    the index can frame it.
+    """
+    return status_cache.presigned_url(f'converted/{task_id}/{name}', presign_get)
@@ -0,0 +1,98 @@
+# ingest.py
+import logging
+import os
+import shutil
+import uuid
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from .storage import transfer_storage, upload
+
+logger = logging.getLogger(__name__)
+
+# Archive states of an original, kept in the record's metadata['original']
+ARCHIVING, ARCHIVED, FAILED = 'archiving', 'archived', 'failed'
+
+
+def archives_original(conversion_type):
+    """Whether originals of this conversion type are kept in object storage"""
+    return conversion_type in settings.INGEST_ARCHIVE_TYPES
+
+
+def archive_name(file_name):
+    """Storage key an original will be archived under, known before it is"""
+    return f'pdf_uploads/{uuid.uuid4().hex}/{os.path.basename(file_name)}'
+
+
+def write_upload(file_obj, path):
+    """
+    Put an upload at ``path`` as its only local copy. Uploads Django has
+    already spooled to disk are moved there instead of being copied again.
+    """
+    if hasattr(file_obj, 'temporary_file_path'):
+        file_move_safe(file_obj.temporary_file_path(), path, allow_overwrite=True)
+    else:
+        with open(path, 'wb+') as f:
+            for chunk in file_obj.chunks():
+                f.write(chunk)
+    return path
+
+
+def stage_original(conversion, local_path):
+    """
+    Move a conversion's original from scratch to the ingest outbox under
+    MEDIA_ROOT, which the workers share, and mark it 'archiving'. Returns
+    the staged path for archive_original_task to upload, or None when the
+    original isn't archived or couldn't be staged (it is then dropped).
+    """
+    if not settings.INGEST_SINGLE_WRITE or not conversion.original_file:
+        return None
+    staged_path = os.path.join(
+        settings.MEDIA_ROOT, settings.INGEST_OUTBOX_DIR, str(conversion.id), os.path.basename(local_path)
+    )
+    try:
+        os.makedirs(os.path.dirname(staged_path), exist_ok=True)
+        file_move_safe(local_path, staged_path, allow_overwrite=True)
+        conversion.metadata['original'] = ARCHIVING
+        conversion.save(update_fields=['metadata'])
+    except Exception as e:
+        logger.error(f"Failed to stage original of conversion {conversion.id}: {str(e)}", exc_info=True)
+        drop_original(conversion, staged_path)
+        return None
+    return staged_path
+
+
+def store_original(conversion, staged_path):
+    """Upload a staged original to the key reserved in ``conversion.original_file``"""
+    upload(transfer_storage(), staged_path, conversion.original_file.name)
+    conversion.metadata['original'] = ARCHIVED
+    conversion.save(update_fields=['metadata'])
+    discard_staged(staged_path)
+
+
+def drop_original(conversion, staged_path):
+    """
+    Give up on archiving an original: the record no longer points at its
+    reserved key, reports it as failed, and the staged copy is removed.
+    The conversion itself is unaffected.
+    """
+    conversion.original_file = ''
+    conversion.metadata['original'] = FAILED
+    conversion.save(update_fields=['original_file', 'metadata'])
+    discard_staged(staged_path)
+
+
+def discard_staged(staged_path):
+    """Remove a staged original along with its directory in the outbox"""
+    shutil.rmtree(os.path.dirname(staged_path), ignore_errors=True)
+
+
+def original_status(conversion):
+    """'archiving', 'archived' or 'failed' for archived originals, else None"""
+    return conversion.metadata.get('original')
+
+
+def original_url(conversion):
+    """URL of a conversion's original, once it exists in storage"""
+    if not conversion.original_file or original_status(conversion) == ARCHIVING:
+        return None
+    return conversion.original_file.url
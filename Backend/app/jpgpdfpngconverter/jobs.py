@@ -0,0 +1,266 @@
+# jobs.py
+import os
+import zipfile
+from collections import namedtuple
+import fitz  # PyMuPDF
+from PIL import Image
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from . import converters, uploads
+from .models import FileConversion
+from .admission import estimate_memory
+from .routing import choose_queue
+from .storage import read_head, transfer_storage
+
+PDF_TO_HTML = 'pdf2html'
+
+# Render settings for per-page image output, matching the synchronous views
+PAGE_IMAGE_FORMATS = {
+    'jpg': ('JPEG', {'quality': 85, 'optimize': True}),
+    'png': ('PNG', {'optimize': True, 'compress_level': 6}),
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+}
+
+# Bytes of a direct upload read back to check its file type
+UPLOAD_HEAD_BYTES = 64 * 1024
+
+# What the jobs API accepts for a job type: input file extensions, whether
+# several inputs are allowed, and parse_params(data) checking its parameters
+JobSpec = namedtuple('JobSpec', ['name', 'extensions', 'multiple', 'parse_params'])
+
+# Every job type the jobs API accepts
+JOB_TYPES = {}
+
+# run() of each job type run_conversion_job runs; PDF to HTML jobs have
+# their own (shardable) task instead
+JOB_HANDLERS = {}
+
+
+def job_type(name, extensions, multiple=False, parse_params=None):
+    """Register a job type accepted by the jobs API"""
+    JOB_TYPES[name] = JobSpec(name, extensions, multiple, parse_params or (lambda data: {}))
+    return JOB_TYPES[name]
+
+
+def job_handler(name, extensions, multiple=False, parse_params=None):
+    """
+    Register a job type along with ``run(input_paths, output_dir, stem,
+    params)`` running it. That returns ``(output_path, result)`` where
+    ``result`` is a JSON-serializable dict stored on the job.
+    """
+    def register(run):
+        job_type(name, extensions, multiple, parse_params)
+        JOB_HANDLERS[name] = run
+        return run
+    return register
+
+
+def get_job_spec(name):
+    try:
+        return JOB_TYPES[name]
+    except KeyError:
+        raise ValidationError(f'Unsupported conversion type: {name}')
+
+
+def get_handler(name):
+    """run() of a job type run by run_conversion_job"""
+    return JOB_HANDLERS[name]
+
+
+def _check_extension(spec, name):
+    if not name.lower().endswith(spec.extensions):
+        raise ValidationError(
+            f"Only {', '.join(spec.extensions)} files are allowed for {spec.name}"
+        )
+
+
+def validate_upload(spec, file_obj):
+    """Check an uploaded input against the job type's accepted types and size"""
+    _check_extension(spec, file_obj.name)
+    if file_obj.size > 20 * 1024 * 1024:
+        raise ValidationError(f'File {file_obj.name} exceeds 20MB size limit')
+    converters.FileConverter(file_obj, spec.name).validate_file()
+
+
+def complete_uploads(spec, entries):
+    """
+    Assemble direct uploads (``key``, ``upload_id`` and ``parts`` each, see
+    uploads.complete_upload) and check them as uploaded inputs are checked,
+    reading back the head of each to verify its file type. Only an upload
+    started through DirectUploadView and not yet completed can be given,
+    so callers can't submit other objects in storage. An upload failing
+    the checks is deleted.
+
+    Returns a list of the job input and size of each upload.
+    """
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValidationError('uploads must list the key, upload_id and parts of each upload')
+        _check_extension(spec, str(entry.get('key', '')))
+
+    storage = transfer_storage()
+    completed = []
+    for entry in entries:
+        key = entry['key']
+        size = uploads.complete_upload(key, entry.get('upload_id', ''), entry.get('parts'))
+        name = os.path.basename(key)
+        head = read_head(storage, key, UPLOAD_HEAD_BYTES)
+        try:
+            if '.pdf' in spec.extensions and not head.startswith(b'%PDF'):
+                raise ValidationError(f'Invalid PDF file: {name}')
+            converters.FileConverter(ContentFile(head, name=name), spec.name).validate_file()
+        except ValidationError:
+            storage.delete(key)
+            raise
+        completed.append(({'key': key, 'name': name}, size))
+    return completed
+
+
+def build_job(task_id, spec, params, inputs, size, page_count, parent=None):
+    """
+    Unsaved FileConversion for a job over ``inputs`` (dicts with the
+    storage ``key`` and original ``name`` of each input file), routed to
+    a queue by its size and page count. A ``page_count`` of 0 means the
+    pages are counted by the worker, which re-routes the job if needed.
+    
+    PDF to HTML keeps its HTML mode in conversion_type and its output
+    options at the top of metadata, as PdfToHtmlView does. The estimated
+    memory of the job, held against the admission budgets while it runs,
+    goes in metadata['memory_estimate'].
+    """
+    params = dict(params)
+    metadata = {'job_type': spec.name, 'page_count': page_count, 'inputs': inputs}
+    if spec.name == PDF_TO_HTML:
+        conversion_type = params.pop('mode')
+        metadata.update(params)
+    else:
+        conversion_type = spec.name
+        metadata['params'] = params
+    metadata['memory_estimate'] = estimate_memory(conversion_type, page_count, size)
+    
+    return FileConversion(
+        task_id=task_id,
+        original_file=inputs[0]['key'],
+        conversion_type=conversion_type,
+        status='PENDING',
+        metadata=metadata,
+        queue=choose_queue(size, page_count, conversion_type),
+        parent=parent
+    )
+
+
+def _render_pages(pdf_path, output_dir, extension):
+    """Render every page at 96 DPI, one image file per page"""
+    image_format, save_options = PAGE_IMAGE_FORMATS[extension]
+    paths = []
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            pix = page.get_pixmap(matrix=fitz.Matrix(96 / 72, 96 / 72), alpha=False)
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            path = os.path.join(output_dir, f"page_{page.number + 1}.{extension}")
+            img.save(path, format=image_format, **save_options)
+            paths.append(path)
+    return paths
+
+
+def _zip(paths, zip_path):
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for path in paths:
+            zipf.write(path, os.path.basename(path))
+    return zip_path
+
+
+def _pdf_to_images(input_paths, output_dir, stem, extension, single_page):
+    """
+    Single-page PDFs produce one image via ``single_page`` when given;
+    otherwise every page is rendered and the images are zipped.
+    """
+    pdf_path = input_paths[0]
+    with fitz.open(pdf_path) as doc:
+        page_count = len(doc)
+
+    if single_page and page_count == 1:
+        output_path = os.path.join(output_dir, f'{stem}.{extension}')
+        single_page(pdf_path, output_path)
+        return output_path, {'page_count': 1}
+
+    pages_dir = os.path.join(output_dir, 'pages')
+    os.makedirs(pages_dir)
+    paths = _render_pages(pdf_path, pages_dir, extension)
+    if not paths:
+        raise RuntimeError(f"No {extension.upper()} files were created")
+    return _zip(paths, os.path.join(output_dir, f'{stem}.zip')), {'page_count': page_count}
+
+
+@job_handler('pdf2jpg', ('.pdf',))
+def pdf_to_jpg(input_paths, output_dir, stem, params):
+    converter = converters.FileConverter(None, 'pdf2jpg')
+    return _pdf_to_images(input_paths, output_dir, stem, 'jpg', converter.convert_pdf_to_jpg)
+
+
+@job_handler('pdf2png', ('.pdf',))
+def pdf_to_png(input_paths, output_dir, stem, params):
+    return _pdf_to_images(input_paths, output_dir, stem, 'png', None)
+
+
+@job_handler('pdf2webp', ('.pdf',))
+def pdf_to_webp(input_paths, output_dir, stem, params):
+    converter = converters.FileConverter(None, 'pdf2webp')
+    return _pdf_to_images(input_paths, output_dir, stem, 'webp', converter.convert_pdf_to_webp)
+
+
+@job_handler('jpg2pdf', ('.jpg', '.jpeg'), multiple=True)
+def jpg_to_pdf(input_paths, output_dir, stem, params):
+    output_path = os.path.join(output_dir, f'{stem}.pdf')
+    converter = converters.FileConverter(None, 'jpg2pdf')
+    if len(input_paths) == 1:
+        converter.convert_jpg_to_pdf(input_paths[0], output_path)
+    else:
+        converter.convert_jpg_to_pdf(input_paths, output_path, is_multiple=True)
+    return output_path, {'page_count': len(input_paths)}
+
+
+@job_handler('png2pdf', ('.png',), multiple=True)
+def png_to_pdf(input_paths, output_dir, stem, params):
+    output_path = os.path.join(output_dir, f'{stem}.pdf')
+    converters.FileConverter(None, 'png2pdf').convert_png_to_pdf(input_paths, output_path, is_multiple=True)
+    return output_path, {'page_count': len(input_paths)}
+
+
+def _pdf_to_word_params(data):
+    return {'preserve_graphics': str(data.get('preserve_graphics', 'true')).lower() == 'true'}
+
+
+@job_handler('pdf2word', ('.pdf',), parse_params=_pdf_to_word_params)
+def pdf_to_word(input_paths, output_dir, stem, params):
+    output_path = os.path.join(output_dir, f'{stem}.docx')
+    result = converters.PdfToWordConverter().convert_pdf_to_word(
+        input_paths[0], output_path, preserve_graphics=params['preserve_graphics']
+    )
+    return output_path, result
+
+
+def _pdf_to_html_params(data):
+    mode = data.get('mode', 'formatted')
+    if mode not in ['formatted', 'clean']:
+        raise ValidationError('Invalid conversion mode')
+
+    output_mode = data.get('output_mode', 'single')
+    if output_mode not in ['single', 'paginated']:
+        raise ValidationError('Invalid output mode')
+
+    params = {'mode': mode, 'output_mode': output_mode}
+    if output_mode == 'paginated':
+        try:
+            pages_per_part = int(data.get('pages_per_part', settings.PDF_TO_HTML_PAGES_PER_PART))
+        except (TypeError, ValueError):
+            raise ValidationError('pages_per_part must be an integer')
+        if not 1 <= pages_per_part <= 500:
+            raise ValidationError('pages_per_part must be between 1 and 500')
+        params['pages_per_part'] = pages_per_part
+    return params
+
+
+# Run by convert_pdf_to_html_task, with conversion_type holding the HTML mode
+job_type(PDF_TO_HTML, ('.pdf',), parse_params=_pdf_to_html_params)
@@ -0,0 +1,149 @@
+import gzip
+import re
+import statistics
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from app.jpgpdfpngconverter.converters import PdfToHtmlConverter
+
+# Span class rules in the head of formatted output, and the spans using them
+CLASS_RULE = re.compile(r'\.(f[\w-]+)\{([^}]*)\}')
+CLASS_SPAN = re.compile(r'<span class="(f[\w-]+)" style="')
+
+# Records when the document has been laid out after loading, relative to
+# the start of navigation
+RENDER_TIMER_SCRIPT = (
+    "addEventListener('load', function () {"
+    "document.body.getBoundingClientRect();"
+    "window.__renderedAt = performance.now();"
+    "});"
+)
+
+
+def inline_styles(html):
+    """
+    Formatted output as written before span styles were interned: each
+    span's font rule inline with its coordinates and no class table
+    """
+    head, body = html.split('</head>', 1)
+    rules = dict(CLASS_RULE.findall(head))
+    body = CLASS_SPAN.sub(
+        lambda match: f'<span style="position:absolute;{rules[match.group(1)]}', body
+    )
+    return CLASS_RULE.sub('', head) + '</head>' + body
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures PDF to HTML conversion time, output size and, with --render, '
+        'browser render time over a directory of PDFs. Formatted output is '
+        'compared against the same output with inline span styles.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', help='Directory containing the benchmark PDFs')
+        parser.add_argument(
+            '--mode',
+            choices=['formatted', 'clean'],
+            default='formatted',
+            help='Conversion mode to benchmark'
+        )
+        parser.add_argument(
+            '--render',
+            action='store_true',
+            help='Also time loading and laying out each output in headless Chromium (needs Playwright)'
+        )
+        parser.add_argument(
+            '--render-runs',
+            type=int,
+            default=3,
+            help='Loads per output when rendering; the median is reported'
+        )
+
+    def handle(self, *args, **options):
+        corpus = Path(options['corpus'])
+        if not corpus.is_dir():
+            raise CommandError(f"Corpus directory not found: {corpus}")
+
+        pdf_paths = sorted(corpus.glob('*.pdf'))
+        if not pdf_paths:
+            raise CommandError(f"No PDF files found in {corpus}")
+
+        compare = options['mode'] == 'formatted'
+        variants = ['inline', 'classes'] if compare else [options['mode']]
+        totals = {variant: {'bytes': 0, 'gzip_bytes': 0, 'render_ms': 0.0} for variant in variants}
+        total_seconds = 0.0
+
+        browser = self._start_browser() if options['render'] else None
+        try:
+            for pdf_path in pdf_paths:
+                converter = PdfToHtmlConverter(open(pdf_path, 'rb'))
+                try:
+                    started = time.perf_counter()
+                    if options['mode'] == 'formatted':
+                        output_path = converter.convert_to_formatted_html()
+                    else:
+                        output_path = converter.convert_to_clean_text()
+                    elapsed = time.perf_counter() - started
+
+                    outputs = {variants[-1]: output_path}
+                    if compare:
+                        inline_path = output_path.with_name('inline.html')
+                        inline_path.write_text(
+                            inline_styles(output_path.read_text(encoding='utf-8')), encoding='utf-8'
+                        )
+                        outputs['inline'] = inline_path
+
+                    results = []
+                    for variant in variants:
+                        measured = self._measure(outputs[variant], browser, options['render_runs'])
+                        for key, value in measured.items():
+                            totals[variant][key] += value
+                        results.append(self._describe(variant, measured, browser))
+                finally:
+                    converter.file_obj.close()
+                    converter.cleanup()
+
+                total_seconds += elapsed
+                self.stdout.write(f"{pdf_path.name}: {elapsed:.3f}s, {'; '.join(results)}")
+        finally:
+            if browser:
+                browser.close()
+                self._playwright.stop()
+
+        summary = '; '.join(self._describe(variant, totals[variant], browser) for variant in variants)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(pdf_paths)} documents: {total_seconds:.3f}s, {summary}"
+        ))
+
+    def _start_browser(self):
+        try:
+            from playwright.sync_api import sync_playwright
+        except ImportError:
+            raise CommandError(
+                '--render needs Playwright: pip install playwright && playwright install chromium'
+            )
+        self._playwright = sync_playwright().start()
+        return self._playwright.chromium.launch()
+
+    def _measure(self, output_path, browser, runs):
+        data = output_path.read_bytes()
+        measured = {'bytes': len(data), 'gzip_bytes': len(gzip.compress(data)), 'render_ms': 0.0}
+        if browser:
+            timings = []
+            for _ in range(runs):
+                page = browser.new_page()
+                try:
+                    page.add_init_script(RENDER_TIMER_SCRIPT)
+                    page.goto(output_path.as_uri(), wait_until='load')
+                    timings.append(page.evaluate('window.__renderedAt'))
+                finally:
+                    page.close()
+            measured['render_ms'] = statistics.median(timings)
+        return measured
+
+    def _describe(self, variant, measured, browser):
+        text = f"{variant} {measured['bytes']} bytes ({measured['gzip_bytes']} gzipped)"
+        if browser:
+            text += f", rendered in {measured['render_ms']:.0f}ms"
+        return text
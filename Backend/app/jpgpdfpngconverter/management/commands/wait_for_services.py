@@ -1,10 +1,9 @@
 import time
 import redis
-import boto3
 import os
 from botocore.exceptions import ClientError
-from botocore.config import Config
 from django.core.management.base import BaseCommand, CommandError
+from app.jpgpdfpngconverter.storage import ensure_bucket
 
 class Command(BaseCommand):
     help = 'Waits for Redis and MinIO to be ready'
@@ -30,26 +29,12 @@ class Command(BaseCommand):
                 self.stdout.write(f"Redis not ready, retrying... ({i+1}/5) Error: {str(e)}")
                 time.sleep(2)
 
-        # MinIO check using boto3
+        # MinIO check through the storage gateway, which also creates the bucket
         minio_ready = False
-        minio_endpoint = os.getenv('MINIO_ENDPOINT', 'http://minio:9000')
-        minio_access_key = os.getenv('MINIO_ACCESS_KEY', 'minioadmin')
-        minio_secret_key = os.getenv('MINIO_SECRET_KEY', 'minioadmin')
-        minio_region = os.getenv('MINIO_REGION', 'us-east-1')
 
         for i in range(5):
             try:
-                s3 = boto3.client(
-                    's3',
-                    aws_access_key_id=minio_access_key,
-                    aws_secret_access_key=minio_secret_key,
-                    endpoint_url=minio_endpoint,
-                    region_name=minio_region,
-                    config=Config(s3={'addressing_style': 'path'})
-                )
-                
-                # Simple operation to verify connection
-                s3.list_buckets()
+                ensure_bucket()
                 minio_ready = True
                 break
             except ClientError as e:
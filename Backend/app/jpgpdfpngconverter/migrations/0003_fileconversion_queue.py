@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jpgpdfpngconverter', '0002_fileconversion_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileconversion',
+            name='queue',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+    ]
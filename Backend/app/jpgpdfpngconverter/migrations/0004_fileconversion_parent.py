@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-19 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jpgpdfpngconverter', '0003_fileconversion_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fileconversion',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='jpgpdfpngconverter.fileconversion'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-19 14:00
+
+import app.jpgpdfpngconverter.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jpgpdfpngconverter', '0004_fileconversion_parent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fileconversion',
+            name='converted_file',
+            field=models.FileField(blank=True, null=True, storage=app.jpgpdfpngconverter.storage.transfer_storage, upload_to='html_outputs/'),
+        ),
+        migrations.AlterField(
+            model_name='fileconversion',
+            name='original_file',
+            field=models.FileField(storage=app.jpgpdfpngconverter.storage.transfer_storage, upload_to='pdf_uploads/'),
+        ),
+    ]
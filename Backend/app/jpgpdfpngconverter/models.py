@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from django.core.files.storage import default_storage
+from .storage import presign_get, transfer_storage
 
 class FileConversion(models.Model):
     STATUS_CHOICES = [
@@ -11,23 +11,28 @@ class FileConversion(models.Model):
     ]
     
     task_id = models.CharField(max_length=255, unique=True)
-    original_file = models.FileField(upload_to='pdf_uploads/')
-    converted_file = models.FileField(upload_to='html_outputs/', null=True, blank=True)
+    original_file = models.FileField(upload_to='pdf_uploads/', storage=transfer_storage)
+    converted_file = models.FileField(
+        upload_to='html_outputs/', storage=transfer_storage, null=True, blank=True
+    )
     conversion_type = models.CharField(max_length=20)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     error_message = models.TextField(null=True, blank=True)
+    metadata = models.JSONField(default=dict, blank=True)
+    queue = models.CharField(max_length=20, blank=True, default='')
+    # Set on the jobs of a batch; the parent row tracks the batch as a whole
+    parent = models.ForeignKey(
+        'self', null=True, blank=True, related_name='children', on_delete=models.CASCADE
+    )
     
     def get_download_url(self):
         """Generate a signed download URL for the converted file"""
         if not self.converted_file:
             return None
         
-        storage = default_storage(settings.DEFAULT_FILE_STORAGE)()
-        if hasattr(storage, 'url'):
-            return storage.url(self.converted_file.name)
-        return None
+        return presign_get(self.converted_file.name, settings.PRESIGNED_URL_EXPIRY)
     
     def __str__(self):
         return f"{self.task_id} - {self.status}"
\ No newline at end of file
@@ -0,0 +1,170 @@
+# offload.py
+import asyncio
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+from .scratch import scratch_dir
+
+
+class OffloadRejected(Exception):
+    """Every worker of the executor is busy and its queue is full"""
+
+    def __init__(self, stats, retry_after):
+        super().__init__(
+            f"Conversion executor is full ({stats['running']} running, {stats['queued']} queued)"
+        )
+        self.stats = stats
+        self.retry_after = retry_after
+
+
+class ConversionExecutor:
+    """
+    Bounded pool of worker processes running the blocking part of async
+    views (parsing the received upload, converting, storing) off the event
+    loop. Processes rather than threads, as PyMuPDF isn't thread-safe.
+    Calls and results are pickled, so ``fn`` must be a module-level
+    function; the workers are started on first use.
+
+    At most ``workers`` calls run at once and ``queue_size`` more wait for
+    a worker; calls beyond that are rejected at once rather than queued
+    without bound.
+    """
+
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @contextmanager
+    def reserve(self):
+        """
+        Hold a place in the executor, e.g. while a call's input is prepared
+        and for the call itself (see call()).
+
+        Raises:
+            OffloadRejected: If the queue is full
+        """
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                raise OffloadRejected(self._stats(), settings.ASYNC_CONVERSION_RETRY_AFTER)
+            self._pending += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def call(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on a worker, within a place held by reserve()"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=django.setup
+                )
+            pool = self._pool
+        try:
+            return await asyncio.wrap_future(pool.submit(fn, *args, **kwargs))
+        except BrokenProcessPool:
+            # A worker died (OOM, crash); the next call starts a new pool
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` on a worker and return its result.
+
+        Raises:
+            OffloadRejected: If the queue is full
+        """
+        with self.reserve():
+            return await self.call(fn, *args, **kwargs)
+
+    def shutdown(self):
+        """Stop the worker processes; a later call starts new ones"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def stats(self):
+        """Workers busy, calls waiting for one, and the limits of both"""
+        with self._lock:
+            return self._stats()
+
+    def _stats(self):
+        running = min(self._pending, self.workers)
+        return {
+            'workers': self.workers,
+            'running': running,
+            'queued': self._pending - running,
+            'queue_size': self.queue_size,
+        }
+
+
+def _stage_body(request, path):
+    with open(path, 'wb') as f:
+        shutil.copyfileobj(request, f)
+
+
+def call_view(view_path, environ, body_path, args, kwargs):
+    """
+    Run the view class at ``view_path`` in a worker process, on a request
+    rebuilt from ``environ`` and the body staged at ``body_path``. Returns
+    the rendered response's status, headers and content.
+    """
+    try:
+        with open(body_path, 'rb') as body:
+            request = WSGIRequest({**environ, 'wsgi.input': body})
+            response = import_string(view_path).as_view()(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response.status_code, list(response.items()), response.content
+    finally:
+        # Outside the request cycle, nothing else closes them
+        connections.close_all()
+
+
+async def run_view(view_class, request, *args, **kwargs):
+    """
+    Respond to ``request`` with the synchronous ``view_class`` run on a
+    worker process of the executor. The received body is copied to scratch
+    for the worker to read, and the response rebuilt from what it returns.
+
+    Raises:
+        OffloadRejected: If the executor's queue is full
+    """
+    environ = {name: value for name, value in request.META.items() if isinstance(value, str)}
+    environ['wsgi.url_scheme'] = request.scheme
+    loop = asyncio.get_running_loop()
+    with executor.reserve():
+        # Off the loop, as starting a job may sweep the scratch root
+        scratch = await loop.run_in_executor(None, scratch_dir, 'offload')
+        with scratch:
+            body_path = os.path.join(scratch, 'body')
+            await loop.run_in_executor(None, _stage_body, request, body_path)
+            status, headers, content = await executor.call(
+                call_view, f'{view_class.__module__}.{view_class.__qualname__}', environ, body_path, args, kwargs
+            )
+    response = HttpResponse(content, status=status)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+executor = ConversionExecutor(settings.ASYNC_CONVERSION_WORKERS, settings.ASYNC_CONVERSION_QUEUE)
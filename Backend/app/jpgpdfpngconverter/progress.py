@@ -0,0 +1,80 @@
+# progress.py
+import json
+import logging
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED')
+
+_client = None
+
+
+def redis_client():
+    """Process-wide client for the progress and status Redis"""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(
+            settings.PROGRESS_REDIS_URL, socket_connect_timeout=2, socket_timeout=5
+        )
+    return _client
+
+
+def channel(task_id):
+    """Pub/sub channel carrying a job's progress events"""
+    return f'conversion-progress:{task_id}'
+
+
+def last_event_key(task_id):
+    """Key holding a job's most recent event, for clients that connect late"""
+    return f'conversion-progress:{task_id}:last'
+
+
+def _pages_key(task_id):
+    return f'conversion-progress:{task_id}:pages'
+
+
+def publish(task_id, **event):
+    """
+    Publish a progress event for a job. Progress is best effort: a Redis
+    failure is logged and never fails the conversion.
+    """
+    message = json.dumps(dict(event, task_id=task_id))
+    try:
+        pipe = redis_client().pipeline()
+        pipe.set(last_event_key(task_id), message, ex=settings.PROGRESS_EVENT_TTL)
+        pipe.publish(channel(task_id), message)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Failed to publish progress for task {task_id}: {str(e)}")
+
+
+def page_counter(task_id, page_count):
+    """
+    Callback publishing "page n of page_count" as each page is converted,
+    or as a resumed shard skips pages already done. The count lives in
+    Redis so the shards of one job add up.
+    """
+    key = _pages_key(task_id)
+
+    def advance(pages=1):
+        try:
+            pipe = redis_client().pipeline()
+            pipe.incrby(key, pages)
+            pipe.expire(key, settings.PROGRESS_EVENT_TTL)
+            done = pipe.execute()[0]
+        except redis.RedisError as e:
+            logger.warning(f"Failed to count progress for task {task_id}: {str(e)}")
+            return
+        publish(task_id, status='PROCESSING', stage='converting', page=done, pages=page_count)
+
+    return advance
+
+
+def reset_pages(task_id):
+    """Clear a job's page count before (re)starting its conversion"""
+    try:
+        redis_client().delete(_pages_key(task_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to reset progress for task {task_id}: {str(e)}")
@@ -0,0 +1,89 @@
+# retention.py
+import logging
+import os
+import shutil
+import time
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _usage(entry):
+    """Bytes held by a directory entry and when anything in it last changed"""
+    stat = entry.stat(follow_symlinks=False)
+    if not entry.is_dir(follow_symlinks=False):
+        return stat.st_size, stat.st_mtime
+    size, last_used = 0, stat.st_mtime
+    for dirpath, dirnames, filenames in os.walk(entry.path):
+        for name in filenames:
+            try:
+                file_stat = os.lstat(os.path.join(dirpath, name))
+            except FileNotFoundError:
+                continue
+            size += file_stat.st_size
+            last_used = max(last_used, file_stat.st_mtime)
+    return size, last_used
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def sweep(root, ttl, quota, min_age=0, now=None, in_use=None):
+    """
+    Enforce retention on the entries directly inside ``root`` (one per job):
+    remove those unused for ``ttl`` seconds, then the least recently used
+    until the rest fit in ``quota`` bytes. Entries changed within
+    ``min_age`` seconds are kept regardless, as a request may be using them,
+    and so are those ``in_use(path)`` reports, though they count towards
+    the quota. Returns the number of entries removed and the bytes freed.
+    """
+    if not os.path.isdir(root):
+        return 0, 0
+    now = time.time() if now is None else now
+
+    entries = []
+    with os.scandir(root) as it:
+        for entry in it:
+            try:
+                size, last_used = _usage(entry)
+            except FileNotFoundError:
+                continue
+            entries.append((last_used, size, entry.path))
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    removed = freed = 0
+    for last_used, size, path in entries:
+        age = now - last_used
+        if age < min_age:
+            # Sorted oldest first, so everything after this is newer still
+            break
+        if age < ttl and total <= quota:
+            break
+        if in_use is not None and in_use(path):
+            continue
+        _remove(path)
+        total -= size
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+def sweep_media():
+    """Sweep each directory of RETENTION_DIRECTORIES under MEDIA_ROOT"""
+    results = {}
+    for name, (ttl, quota) in settings.RETENTION_DIRECTORIES.items():
+        removed, freed = sweep(
+            os.path.join(settings.MEDIA_ROOT, name), ttl, quota, settings.RETENTION_MIN_AGE
+        )
+        if removed:
+            logger.info(f"Swept {name}: removed {removed} entries, {freed // (1024 * 1024)} MB")
+        results[name] = removed
+    return results
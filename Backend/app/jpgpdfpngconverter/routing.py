@@ -0,0 +1,37 @@
+# routing.py
+import fitz  # PyMuPDF
+from django.conf import settings
+
+SMALL_QUEUE = 'small'
+LARGE_QUEUE = 'large'
+HEAVY_QUEUE = 'heavy'
+
+
+def count_pages(file_obj):
+    """Page count of an uploaded PDF, leaving the file positioned at the start"""
+    if hasattr(file_obj, 'temporary_file_path'):
+        with fitz.open(file_obj.temporary_file_path()) as doc:
+            return len(doc)
+    file_obj.seek(0)
+    try:
+        with fitz.open(stream=file_obj.read(), filetype='pdf') as doc:
+            return len(doc)
+    finally:
+        file_obj.seek(0)
+
+
+def choose_queue(size, page_count, conversion_type):
+    """
+    Pick the Celery queue for a conversion from its cost signals.
+
+    Pages are weighted by CONVERSION_PAGE_WEIGHTS for the conversion type,
+    so a formatted conversion reaches the larger queues sooner than a clean
+    text one of the same length.
+    """
+    weighted_pages = page_count * settings.CONVERSION_PAGE_WEIGHTS.get(conversion_type, 1)
+
+    if weighted_pages > settings.CONVERSION_HEAVY_PAGES or size > settings.CONVERSION_HEAVY_BYTES:
+        return HEAVY_QUEUE
+    if weighted_pages > settings.CONVERSION_LARGE_PAGES or size > settings.CONVERSION_LARGE_BYTES:
+        return LARGE_QUEUE
+    return SMALL_QUEUE
@@ -0,0 +1,199 @@
+# scratch.py
+import fcntl
+import functools
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from django.conf import settings
+from . import retention
+
+logger = logging.getLogger(__name__)
+
+# Held locked by the process using a job directory for as long as it does;
+# the lock goes with the process, so one nobody holds marks an orphan
+LOCK_NAME = '.owner.lock'
+
+
+class ScratchQuotaExceeded(Exception):
+    """A job wrote more to its scratch directory than its quota allows"""
+
+    def __init__(self, path, used, quota):
+        super().__init__(
+            f'Scratch space of {os.path.basename(path)} exceeds its '
+            f'{quota // (1024 * 1024)} MB quota ({used // (1024 * 1024)} MB used)'
+        )
+        self.used = used
+        self.quota = quota
+
+
+class JobScratch(os.PathLike):
+    """
+    One job's private scratch directory. Usable wherever a path is
+    (``scratch / 'input.pdf'``, ``os.fspath(scratch)``), removed when its
+    ``with`` block ends. Locked meanwhile, so sweep_orphans() leaves it be.
+    """
+
+    def __init__(self, path, quota):
+        self.path = Path(path)
+        self.quota = quota
+        self._lock = os.open(self.path / LOCK_NAME, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._lock, fcntl.LOCK_EX)
+
+    def __fspath__(self):
+        return str(self.path)
+
+    def __str__(self):
+        return str(self.path)
+
+    def __truediv__(self, name):
+        return self.path / name
+
+    def usage(self):
+        """Bytes currently held in the directory"""
+        used = 0
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            for name in filenames:
+                try:
+                    used += os.lstat(os.path.join(dirpath, name)).st_size
+                except FileNotFoundError:
+                    continue
+        return used
+
+    def check(self, incoming=0):
+        """
+        Raise ScratchQuotaExceeded if the directory, plus ``incoming`` bytes
+        about to be written, is over quota. Called between a job's stages.
+        """
+        used = self.usage()
+        if used + incoming > self.quota:
+            raise ScratchQuotaExceeded(self.path, used + incoming, self.quota)
+        return used
+
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        if self._lock is not None:
+            os.close(self._lock)
+            self._lock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ScratchSpace:
+    """
+    Scratch space under one root, meant for fast local storage (a tmpfs or
+    NVMe mount) rather than the shared media volume. Each job gets its own
+    directory with a byte quota. With a ``sweep_interval``, the root is
+    swept (see sweep()) at most that often, as jobs are started.
+    """
+
+    def __init__(self, root, job_quota, ttl=None, quota=None, min_age=0, sweep_interval=None):
+        self.root = Path(root)
+        self.job_quota = job_quota
+        self.ttl = ttl
+        self.quota = quota
+        self.min_age = min_age
+        self.sweep_interval = sweep_interval
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._next_sweep = time.monotonic() + (sweep_interval or 0)
+
+    def job(self, job_id, quota=None):
+        """New scratch directory for ``job_id``, unique even for repeated ids"""
+        if self.sweep_interval is not None and time.monotonic() >= self._next_sweep:
+            self.sweep()
+        path = tempfile.mkdtemp(prefix=f'{job_id}-', dir=self.root)
+        return JobScratch(path, quota or self.job_quota)
+
+    def sweep(self, now=None):
+        """
+        Enforce the root's TTL and quota (see retention.sweep) on everything
+        no running job holds: directories of jobs whose process exited, and
+        strays. Returns the number of entries removed and the bytes freed.
+        """
+        self._next_sweep = time.monotonic() + (self.sweep_interval or 0)
+        removed, freed = retention.sweep(
+            self.root, self.ttl, self.quota, self.min_age, now, in_use=_held
+        )
+        if removed:
+            logger.info(f"Swept {self.root}: removed {removed} entries, {freed // (1024 * 1024)} MB")
+        return removed, freed
+
+
+def _held(path):
+    """Whether a running process holds the lock of the job directory at ``path``"""
+    try:
+        lock = os.open(os.path.join(path, LOCK_NAME), os.O_RDWR)
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(lock)
+    return False
+
+
+def _orphaned(path, min_age, now):
+    """Whether no running process owns the entry of the scratch root at ``path``"""
+    if _held(path):
+        return False
+    if os.path.lexists(os.path.join(path, LOCK_NAME)):
+        return True
+    # A directory not locked yet, or anything but a job directory
+    try:
+        return now - os.lstat(path).st_mtime >= min_age
+    except FileNotFoundError:
+        return False
+
+
+def sweep_orphans(root, min_age, now=None):
+    """
+    Remove what exited processes left under ``root``: job directories whose
+    lock no process holds, and any other entry unchanged for ``min_age``
+    seconds. Directories of running jobs are kept however old or large.
+    Returns the number of entries removed.
+    """
+    now = time.time() if now is None else now
+    removed = 0
+    with os.scandir(root) as it:
+        for entry in it:
+            if not _orphaned(entry.path, min_age, now):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    continue
+            removed += 1
+    return removed
+
+
+@functools.lru_cache(maxsize=None)
+def scratch_space():
+    """The process's scratch space, under SCRATCH_ROOT"""
+    space = ScratchSpace(
+        settings.SCRATCH_ROOT, settings.SCRATCH_JOB_QUOTA_BYTES,
+        ttl=settings.SCRATCH_TTL, quota=settings.SCRATCH_QUOTA_BYTES,
+        min_age=settings.RETENTION_MIN_AGE, sweep_interval=settings.SCRATCH_SWEEP_INTERVAL
+    )
+    # SCRATCH_ROOT is local to the node, out of reach of the beat sweep, so
+    # each process clears what exited processes left there when it starts,
+    # then keeps sweeping it as it starts jobs
+    removed = sweep_orphans(space.root, settings.RETENTION_MIN_AGE)
+    if removed:
+        logger.info(f"Swept {removed} orphaned scratch directories from {space.root}")
+    return space
+
+
+def scratch_dir(job_id, quota=None):
+    """Scratch directory of one job in the process's scratch space (a context manager)"""
+    return scratch_space().job(job_id, quota)
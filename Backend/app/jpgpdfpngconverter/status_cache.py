@@ -0,0 +1,184 @@
+# status_cache.py
+import json
+import logging
+import redis
+from django.conf import settings
+from rest_framework.fields import DateTimeField
+from .progress import publish, redis_client
+
+logger = logging.getLogger(__name__)
+
+# Metadata the status endpoint reports; the rest (inputs, params) stays in the database
+SNAPSHOT_METADATA = ('job_type', 'output_mode', 'part_count', 'result', 'batch', 'jobs')
+
+BATCH_STATUSES = ('PENDING', 'PROCESSING', 'COMPLETED', 'FAILED')
+
+
+def status_key(task_id):
+    """Hash holding the status snapshot of a job"""
+    return f'conversion-status:{task_id}'
+
+
+def batch_key(task_id):
+    """Hash holding the status of each job of a batch, by task id"""
+    return f'conversion-batch:{task_id}'
+
+
+def _url_key(object_name):
+    return f'conversion-url:{object_name}'
+
+
+def snapshot(task):
+    """The fields of a job the status endpoint needs, as plain strings"""
+    timestamps = DateTimeField()
+    return {
+        'task_id': task.task_id,
+        'status': task.status,
+        'conversion_type': task.conversion_type,
+        'created_at': timestamps.to_representation(task.created_at),
+        'updated_at': timestamps.to_representation(task.updated_at),
+        'error_message': task.error_message or '',
+        'converted_file': task.converted_file.name or '',
+        'metadata': json.dumps({
+            name: task.metadata[name] for name in SNAPSHOT_METADATA if name in task.metadata
+        }),
+    }
+
+
+def write_status(task):
+    """
+    Store a job's status snapshot and return it. The status of a job in a
+    batch is also stored in its batch's hash, which the batch's progress
+    is counted from.
+    """
+    data = snapshot(task)
+    try:
+        pipe = redis_client().pipeline()
+        pipe.hset(status_key(task.task_id), mapping=data)
+        pipe.expire(status_key(task.task_id), settings.STATUS_CACHE_TTL)
+        batch_id = task.metadata.get('batch_id')
+        if batch_id:
+            pipe.hset(batch_key(batch_id), task.task_id, task.status)
+            pipe.expire(batch_key(batch_id), settings.STATUS_CACHE_TTL)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Failed to cache status for task {task.task_id}: {str(e)}")
+    return data
+
+
+def fill_status(task):
+    """
+    Cache the snapshot of a job just read from the database, unless one is
+    cached already, and return the cached snapshot. A worker may write a
+    newer status between the read and the fill: fields are only set where
+    missing, in one transaction, so its snapshot is the one kept.
+    """
+    data = snapshot(task)
+    key = status_key(task.task_id)
+    try:
+        pipe = redis_client().pipeline()
+        for name, value in data.items():
+            pipe.hsetnx(key, name, value)
+        pipe.expire(key, settings.STATUS_CACHE_TTL)
+        pipe.hgetall(key)
+        cached = pipe.execute()[-1]
+    except redis.RedisError as e:
+        logger.warning(f"Failed to cache status for task {task.task_id}: {str(e)}")
+        return data
+    return {name.decode(): value.decode() for name, value in cached.items()} or data
+
+
+def record_status(task, stage=None, **event):
+    """
+    Save a job, refresh its cached status and publish the change, with an
+    optional stage and details for progress subscribers.
+    """
+    task.save()
+    write_status(task)
+    if stage:
+        event['stage'] = stage
+    publish(task.task_id, status=task.status, **event)
+
+
+def read_status(task_id):
+    """A job's cached status snapshot, or None if it is not cached"""
+    try:
+        data = redis_client().hgetall(status_key(task_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to read cached status for task {task_id}: {str(e)}")
+        return None
+    if not data:
+        return None
+    return {key.decode(): value.decode() for key, value in data.items()}
+
+
+def seed_batch(task_id, statuses):
+    """
+    Store the status of each job of a batch (``{task_id: status}``) that
+    isn't stored yet, leaving newer statuses written by workers in place.
+    """
+    try:
+        pipe = redis_client().pipeline()
+        for child_id, child_status in statuses.items():
+            pipe.hsetnx(batch_key(task_id), child_id, child_status)
+        pipe.expire(batch_key(task_id), settings.STATUS_CACHE_TTL)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Failed to cache job statuses of batch {task_id}: {str(e)}")
+
+
+def read_batch(task_id):
+    """
+    Stored statuses of a batch's jobs by task id, or None if they can't be
+    read. Jobs whose status has expired are missing.
+    """
+    try:
+        data = redis_client().hgetall(batch_key(task_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to read cached job statuses of batch {task_id}: {str(e)}")
+        return None
+    return {key.decode(): value.decode() for key, value in data.items()}
+
+
+def count_statuses(statuses):
+    """Job counts of a batch by status, plus the total, from ``{task_id: status}``"""
+    counts = {'total': len(statuses)}
+    for name in BATCH_STATUSES:
+        counts[name.lower()] = 0
+    for child_status in statuses.values():
+        counts[child_status.lower()] += 1
+    return counts
+
+
+def invalidate_status(task_id):
+    """
+    Drop a job's snapshot (and a batch's job statuses) after a change made
+    without the model instance
+    """
+    try:
+        redis_client().delete(status_key(task_id), batch_key(task_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to invalidate status for task {task_id}: {str(e)}")
+
+
+def presigned_url(object_name, presign):
+    """
+    URL for ``object_name`` from ``presign(object_name, expiry_seconds)``,
+    reused until PRESIGNED_URL_REFRESH_MARGIN seconds before it expires.
+    """
+    try:
+        url = redis_client().get(_url_key(object_name))
+        if url:
+            return url.decode()
+    except redis.RedisError as e:
+        logger.warning(f"Failed to read cached URL for {object_name}: {str(e)}")
+
+    url = presign(object_name, settings.PRESIGNED_URL_EXPIRY)
+    try:
+        redis_client().set(
+            _url_key(object_name), url,
+            ex=settings.PRESIGNED_URL_EXPIRY - settings.PRESIGNED_URL_REFRESH_MARGIN
+        )
+    except redis.RedisError as e:
+        logger.warning(f"Failed to cache URL for {object_name}: {str(e)}")
+    return url
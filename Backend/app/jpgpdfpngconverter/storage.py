@@ -0,0 +1,146 @@
+# storage.py
+# Object storage gateway: views, tasks and models get their storage, client
+# and presigned URLs here, so a process reuses the same pooled connections
+import functools
+import mimetypes
+import shutil
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.client import Config
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from storages.backends.s3boto3 import S3Boto3Storage
+
+
+def client_config():
+    """
+    Connection settings for storage clients: a connection pool large enough
+    for concurrent multipart transfers, timeouts, and retries with
+    exponential backoff on throttling and connection errors.
+    """
+    return Config(
+        signature_version=settings.AWS_S3_SIGNATURE_VERSION,
+        max_pool_connections=settings.STORAGE_MAX_POOL_CONNECTIONS,
+        connect_timeout=settings.STORAGE_CONNECT_TIMEOUT,
+        read_timeout=settings.STORAGE_READ_TIMEOUT,
+        retries={'mode': 'standard', 'total_max_attempts': settings.STORAGE_MAX_ATTEMPTS}
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def transfer_storage():
+    """
+    The process's object storage. Each thread opens its connection once and
+    keeps it for every later request. Transfers above
+    STORAGE_MULTIPART_THRESHOLD are split into parts sent concurrently.
+    """
+    return S3Boto3Storage(
+        client_config=client_config(),
+        transfer_config=TransferConfig(
+            multipart_threshold=settings.STORAGE_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.STORAGE_MULTIPART_CHUNK_SIZE,
+            max_concurrency=settings.STORAGE_TRANSFER_CONCURRENCY,
+            io_chunksize=settings.STORAGE_TRANSFER_CHUNK_SIZE
+        )
+    )
+
+
+def client():
+    """Low-level S3 client of the process's storage"""
+    return transfer_storage().connection.meta.client
+
+
+_bucket_ready = False
+
+
+def ensure_bucket():
+    """
+    Create the bucket if it doesn't exist yet. Checked once per process;
+    a failed check (storage still starting up) is tried again next call.
+    """
+    global _bucket_ready
+    if _bucket_ready:
+        return
+    bucket = transfer_storage().bucket_name
+    try:
+        client().head_bucket(Bucket=bucket)
+    except ClientError as e:
+        if e.response['ResponseMetadata']['HTTPStatusCode'] != 404:
+            raise
+        client().create_bucket(Bucket=bucket)
+    _bucket_ready = True
+
+
+@functools.lru_cache(maxsize=None)
+def signing_client(endpoint_url):
+    """
+    Client used only to presign URLs for ``endpoint_url``, the endpoint
+    clients reach storage on (which differs from the internal one under
+    Docker). Signing happens locally, so this client never connects anywhere.
+    """
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint_url,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        region_name=settings.AWS_S3_REGION_NAME,
+        config=Config(signature_version='s3v4')
+    )
+
+
+def download(storage, key, local_path):
+    """Stream an object to a local file without holding it in memory"""
+    with storage.open(key, 'rb') as remote_file, open(local_path, 'wb') as local_file:
+        if hasattr(remote_file, 'obj'):
+            # S3File would otherwise spool its own full copy before reading
+            remote_file.obj.download_fileobj(local_file, Config=storage.transfer_config)
+        else:
+            shutil.copyfileobj(remote_file, local_file, settings.STORAGE_TRANSFER_CHUNK_SIZE)
+    return local_path
+
+
+def read_head(storage, key, nbytes):
+    """First ``nbytes`` of an object, without fetching the rest"""
+    if hasattr(storage, 'bucket'):
+        response = storage.bucket.Object(key).get(Range=f'bytes=0-{nbytes - 1}')
+        return response['Body'].read()
+    with storage.open(key, 'rb') as f:
+        return f.read(nbytes)
+
+
+def put(storage, file_obj, key):
+    """
+    Store an open file under an exact key of the bucket, replacing any
+    earlier copy. Anything but object storage is a configuration error:
+    a local disk is not shared with the other nodes that read the key.
+    """
+    if not hasattr(storage, 'bucket'):
+        raise ImproperlyConfigured(
+            f'{type(storage).__name__} is not object storage; cannot store {key}'
+        )
+    # Straight to the key: no existence checks and no renamed copy
+    content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+    storage.bucket.Object(key).upload_fileobj(
+        file_obj, ExtraArgs={'ContentType': content_type}, Config=storage.transfer_config
+    )
+    return key
+
+
+def upload(storage, local_path, key):
+    """Upload a local file under an exact key, replacing any earlier copy"""
+    with open(local_path, 'rb') as f:
+        return put(storage, f, key)
+
+
+def presign_get(key, expiry_seconds, **params):
+    """
+    Presigned GET URL for ``key``, signed for DELIVERY_ENDPOINT_URL.
+    ``params`` are extra get_object parameters such as
+    ResponseContentDisposition.
+    """
+    return signing_client(settings.DELIVERY_ENDPOINT_URL).generate_presigned_url(
+        'get_object',
+        Params={'Bucket': settings.AWS_STORAGE_BUCKET_NAME, 'Key': key, **params},
+        ExpiresIn=expiry_seconds
+    )
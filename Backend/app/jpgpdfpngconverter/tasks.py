@@ -1,62 +1,704 @@
 # tasks.py
 import os
-from celery import shared_task
+import json
+import shutil
+import zipfile
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+import fitz  # PyMuPDF
+from botocore.exceptions import BotoCoreError, ClientError
+from celery import chord, group, shared_task
+from celery.signals import worker_process_init
 from django.conf import settings
+from django.db import OperationalError
+from django.db.models import Count, Q
+from django.utils import timezone
 from .models import FileConversion
-from .converters import PdfToHtmlConverter
-from storages.backends.s3boto3 import S3Boto3Storage
+from .delivery import part_base_url, part_entry
+from . import admission, converters, ingest, retention
+from .jobs import PDF_TO_HTML, get_handler
+from .routing import choose_queue
+from .scratch import scratch_dir
+from .storage import download, transfer_storage, upload
+from .progress import TERMINAL_STATUSES, page_counter, publish, reset_pages
+from .status_cache import record_status, write_status
+from . import warmup
 import logging
 
 logger = logging.getLogger(__name__)
 
-@shared_task(bind=True)
+worker_process_init.connect(warmup.warm_up_worker_process)
+
+# Failures worth another attempt: storage, network and database hiccups.
+# Anything else (a corrupt PDF, say) fails the same way every time.
+TRANSIENT_ERRORS = (BotoCoreError, ClientError, ConnectionError, TimeoutError, OperationalError)
+
+
+def _shard_key(task_id, index):
+    """Object storage key for one page shard's HTML fragment"""
+    return f'converted/{task_id}/shards/{index:05d}.html'
+
+
+def _open_shards(storage, shard_keys):
+    """Open shard fragments one at a time, in order, closing each after use"""
+    for shard_key in shard_keys:
+        with storage.open(shard_key, 'rb') as fragment:
+            yield fragment
+
+
+def _image_store(storage):
+    """Shared store for images extracted into formatted HTML, if enabled"""
+    if settings.PDF_TO_HTML_EXTRACT_IMAGES:
+        return converters.ContentAddressedImageStore(storage)
+    return None
+
+
+def _mark_failed(task_id, error):
+    FileConversion.objects.filter(task_id=task_id).update(
+        status='FAILED',
+        error_message=str(error)
+    )
+    # Re-read rather than saved, so other fields written meanwhile are kept
+    task = FileConversion.objects.filter(task_id=task_id).first()
+    if task:
+        write_status(task)
+    publish(task_id, status='FAILED', error=str(error))
+
+
+def _fail(task, error):
+    task.status = 'FAILED'
+    task.error_message = str(error)
+    record_status(task, error=str(error))
+
+
+def _retry_delay(attempt):
+    """Seconds before retrying after the given attempt, doubling each time"""
+    return settings.CONVERSION_RETRY_BACKOFF * 2 ** (attempt - 1)
+
+
+def _begin_attempt(task):
+    """
+    Claim a job for this task and count a new attempt at it. Only a PENDING
+    job can be claimed, by a conditional update, so when its message is
+    delivered twice only one delivery runs it; the reaper puts jobs whose
+    worker died back to PENDING. Celery retries and reaper requeues count,
+    so a document that keeps killing its worker fails after
+    CONVERSION_MAX_ATTEMPTS instead of being requeued forever. Running a
+    job already fanned out as shards again only reissues them, which
+    isn't counted.
+    Returns False if the job wasn't claimed, or was failed for having used
+    up its attempts.
+    """
+    claimed = FileConversion.objects.filter(pk=task.pk, status='PENDING').update(
+        status='PROCESSING', updated_at=timezone.now()
+    )
+    if not claimed:
+        logger.info(f"Task {task.task_id} is already {task.status}, not running it again")
+        return False
+    task.refresh_from_db()
+
+    attempts = task.metadata.get('attempts', 0)
+    if not task.metadata.get('shards'):
+        attempts += 1
+    if attempts > settings.CONVERSION_MAX_ATTEMPTS:
+        _fail(task, f'Conversion abandoned after {attempts - 1} attempts')
+        return False
+    task.metadata['attempts'] = attempts
+    record_status(task, stage='downloading', attempt=attempts)
+    return True
+
+
+def _retry_or_fail(celery_task, task, error):
+    """Retry a job after a transient error while attempts remain, else fail it"""
+    attempts = task.metadata.get('attempts', 1)
+    if isinstance(error, TRANSIENT_ERRORS) and attempts < settings.CONVERSION_MAX_ATTEMPTS:
+        logger.warning(f"Retrying task {task.task_id} after attempt {attempts}: {str(error)}")
+        # Queued again, for the retry to claim
+        task.status = 'PENDING'
+        record_status(task, stage='retrying', attempt=attempts)
+        raise celery_task.retry(exc=error, countdown=_retry_delay(attempts))
+    _fail(task, error)
+
+
+@contextmanager
+def _admitted(celery_task, task_id, pages=None):
+    """
+    Hold a job's estimated memory against the admission budgets while a
+    task works on it, or the share for ``pages`` of its pages when the task
+    converts a shard.
+
+    Workers wait up to ADMISSION_WORKER_WAIT_SECONDS to be admitted, well
+    within the broker's visibility timeout, since the unacknowledged
+    message would otherwise be delivered to a second worker. If the budgets
+    are still full the task is retried later, which doesn't count as an
+    attempt at the job.
+
+    Yields the ExitStack holding the reservation, for _settle_page_count to
+    add to.
+    """
+    metadata = FileConversion.objects.filter(task_id=task_id).values_list('metadata', flat=True).first() or {}
+    estimate = metadata.get('memory_estimate', 0)
+    if pages and metadata.get('page_count'):
+        estimate = estimate * pages // metadata['page_count']
+    try:
+        reservation = admission.admit(estimate, wait=settings.ADMISSION_WORKER_WAIT_SECONDS)
+    except admission.AdmissionRejected as e:
+        logger.info(f"Task {task_id} not admitted yet, retrying in {e.retry_after}s: {str(e)}")
+        raise celery_task.retry(countdown=e.retry_after)
+    with ExitStack() as held:
+        held.enter_context(reservation)
+        yield held
+
+
+def _settle_page_count(task, page_count, size, held):
+    """
+    Jobs on direct uploads are queued before their pages are counted, with
+    an estimate and queue from their size alone (page_count 0). Once the
+    worker has the input, record its ``page_count`` and re-estimate the
+    job: the extra memory is added to the reservation in ``held``, or the
+    job goes back to the broker if it belongs on another queue or the
+    extra memory isn't free. Returns False if the job was sent back.
+    """
+    if task.metadata.get('page_count'):
+        return True
+
+    estimate = admission.estimate_memory(task.conversion_type, page_count, size)
+    extra = estimate - task.metadata.get('memory_estimate', 0)
+    task.metadata['page_count'] = page_count
+    task.metadata['memory_estimate'] = estimate
+    queue = choose_queue(size, page_count, task.conversion_type)
+
+    countdown = 0
+    if queue == task.queue and extra > 0:
+        try:
+            held.enter_context(admission.admit(extra, wait=settings.ADMISSION_WORKER_WAIT_SECONDS))
+        except admission.AdmissionRejected as e:
+            countdown = e.retry_after
+    if queue == task.queue and not countdown:
+        task.save()
+        return True
+
+    logger.info(f"Task {task.task_id}: {page_count} pages, requeueing on {queue} in {countdown}s")
+    task.queue = queue
+    task.status = 'PENDING'
+    # Counting pages wasn't an attempt at converting
+    task.metadata['attempts'] -= 1
+    record_status(task, stage='requeued', queue=queue)
+    job_signature(task).apply_async(countdown=countdown)
+    return False
+
+
+def _touch(task_id):
+    """Heartbeat of a job: record progress so the reaper does not take it for abandoned"""
+    FileConversion.objects.filter(task_id=task_id).update(updated_at=timezone.now())
+
+
+@shared_task(bind=True, max_retries=None)
 def convert_pdf_to_html_task(self, task_id):
     """
-    Celery task to convert PDF to HTML using MinIO for storage
+    Celery task to convert PDF to HTML using MinIO for storage.
+
+    Documents longer than PDF_TO_HTML_SHARD_PAGES are split into page
+    shards converted in parallel by convert_pdf_to_html_shard_task and
+    joined by stitch_pdf_to_html_task.
+
+    Safe to run again for the same job: finished shards are kept in object
+    storage as checkpoints, so a retried or requeued job only converts the
+    pages that were not done yet.
     """
+    with _admitted(self, task_id) as held, scratch_dir(task_id) as work_dir:
+        return _convert_pdf_to_html(self, task_id, work_dir, held)
+
+
+def _convert_pdf_to_html(celery_task, task_id, work_dir, held):
     try:
-        storage = S3Boto3Storage()
+        storage = transfer_storage()
         task = FileConversion.objects.get(task_id=task_id)
-        task.status = 'PROCESSING'
-        task.save()
+        if task.status in TERMINAL_STATUSES:
+            # Redelivered after it had already finished
+            return task.status == 'COMPLETED'
+        if not _begin_attempt(task):
+            return False
         
-        # Download the file from MinIO to local temp
-        original_path = task.original_file.name
-        local_input_path = f'/tmp/{os.path.basename(original_path)}'
+        # Stream the file from MinIO into this task's scratch directory
+        local_input_path = download(storage, task.original_file.name, work_dir / 'input.pdf')
+        work_dir.check()
         
-        with storage.open(original_path, 'rb') as remote_file:
-            with open(local_input_path, 'wb') as local_file:
-                local_file.write(remote_file.read())
+        with fitz.open(local_input_path) as doc:
+            page_count = len(doc)
+        if not _settle_page_count(task, page_count, os.path.getsize(local_input_path), held):
+            return True
+        
+        reset_pages(task_id)
+        publish(task_id, status='PROCESSING', stage='converting', page=0, pages=page_count)
+        
+        paginated = task.metadata.get('output_mode') == 'paginated'
+        pages_per_part = task.metadata.get('pages_per_part', settings.PDF_TO_HTML_PAGES_PER_PART)
+        
+        shard_pages = settings.PDF_TO_HTML_SHARD_PAGES
+        if page_count > shard_pages:
+            # Paginated output is sharded along its part boundaries
+            if paginated:
+                shard_pages = pages_per_part
+            # Shards stay on the job's queue so they can't crowd out small jobs
+            queue = task.queue or None
+            shards = [
+                convert_pdf_to_html_shard_task.s(
+                    task_id, index, start, min(start + shard_pages, page_count)
+                ).set(queue=queue)
+                for index, start in enumerate(range(0, page_count, shard_pages))
+            ]
+            logger.info(f"Task {task_id}: fanning out {page_count} pages as {len(shards)} shards")
+            task.metadata['shards'] = len(shards)
+            record_status(task, stage='sharded')
+            chord(shards)(stitch_pdf_to_html_task.s(task_id).set(queue=queue))
+            return True
         
         # Process conversion
-        converter = PdfToHtmlConverter(open(local_input_path, 'rb'))
+        converter = converters.PdfToHtmlConverter(
+            None, image_store=_image_store(storage), pdf_path=local_input_path, work_dir=work_dir,
+            on_page=page_counter(task_id, page_count)
+        )
+        
+        if paginated:
+            output_dir = converter.convert_to_paginated_html(
+                task.conversion_type, pages_per_part, part_base_url(task_id)
+            )
+            work_dir.check()
+            
+            publish(task_id, status='PROCESSING', stage='uploading')
+            # Upload parts individually, then the index and manifest
+            for path in sorted(output_dir.iterdir()):
+                upload(storage, path, f'converted/{task_id}/{path.name}')
+            
+            with open(output_dir / 'manifest.json', encoding='utf-8') as f:
+                task.metadata['part_count'] = len(json.load(f)['parts'])
+            task.converted_file.name = f'converted/{task_id}/manifest.json'
+            task.status = 'COMPLETED'
+            record_status(task)
+            
+            return True
         
         if task.conversion_type == 'formatted':
             output_path = converter.convert_to_formatted_html()
         else:
             output_path = converter.convert_to_clean_text()
+        work_dir.check()
         
         # Upload result back to MinIO
+        publish(task_id, status='PROCESSING', stage='uploading')
         output_filename = f'converted/{task_id}/{os.path.basename(output_path)}'
         
-        with open(output_path, 'rb') as f:
-            storage.save(output_filename, f)
+        upload(storage, output_path, output_filename)
         
         # Update task with result
         task.converted_file.name = output_filename
         task.status = 'COMPLETED'
-        task.save()
-        
-        # Cleanup local files
-        converter.cleanup()
-        os.unlink(local_input_path)
+        record_status(task)
         
         return True
     
     except Exception as e:
         logger.error(f"PDF conversion failed for task {task_id}: {str(e)}", exc_info=True)
         if 'task' in locals():
-            task.status = 'FAILED'
-            task.error_message = str(e)
-            task.save()
-        return False
\ No newline at end of file
+            _retry_or_fail(celery_task, task, e)
+        return False
+
+
+@shared_task(bind=True, max_retries=None)
+def convert_pdf_to_html_shard_task(self, task_id, index, start, end):
+    """
+    Convert pages [start, end) of a document to an HTML fragment stored in
+    object storage. Returns the fragment's storage key and page span.
+
+    For paginated output the fragment is wrapped into a standalone part
+    document stored next to the final index instead.
+
+    A shard whose output is already stored is a checkpoint from an earlier
+    run and is not converted again.
+    """
+    with _admitted(self, task_id, pages=end - start), scratch_dir(f'{task_id}-{index}') as work_dir:
+        return _convert_pdf_to_html_shard(self, task_id, index, start, end, work_dir)
+
+
+def _convert_pdf_to_html_shard(celery_task, task_id, index, start, end, work_dir):
+    try:
+        storage = transfer_storage()
+        task = FileConversion.objects.get(task_id=task_id)
+        paginated = task.metadata.get('output_mode') == 'paginated'
+        on_page = page_counter(task_id, task.metadata.get('page_count'))
+
+        if paginated:
+            # Each shard is one standalone part of the paginated output
+            part = part_entry(index, start, end)
+            shard_key = f"converted/{task_id}/{part['file']}"
+        else:
+            shard_key = _shard_key(task_id, index)
+        result = {'key': shard_key, 'first_page': start + 1, 'last_page': end}
+
+        if task.status in TERMINAL_STATUSES:
+            # Left over from a run that has already finished or failed
+            return result
+        if storage.exists(shard_key):
+            logger.info(f"Task {task_id}: shard {index} already converted, skipping")
+            on_page(end - start)
+            return result
+        _touch(task_id)
+
+        local_input_path = download(storage, task.original_file.name, work_dir / 'input.pdf')
+        work_dir.check()
+
+        converter = converters.PdfToHtmlConverter(
+            None, image_store=_image_store(storage), pdf_path=local_input_path, work_dir=work_dir,
+            on_page=on_page
+        )
+        fragment_path = converter.convert_page_range(task.conversion_type, start, end)
+        work_dir.check()
+
+        if paginated:
+            part_path = work_dir / part['file']
+            with open(fragment_path, 'rb') as fragment:
+                converter.stitch_fragments(task.conversion_type, [fragment], part_path)
+            upload(storage, part_path, shard_key)
+        else:
+            upload(storage, fragment_path, shard_key)
+
+        _touch(task_id)
+        return result
+
+    except Exception as e:
+        logger.error(f"Shard {index} (pages {start}-{end}) failed for task {task_id}: {str(e)}", exc_info=True)
+        attempt = celery_task.request.retries + 1
+        if isinstance(e, TRANSIENT_ERRORS) and attempt < settings.CONVERSION_MAX_ATTEMPTS:
+            raise celery_task.retry(exc=e, countdown=_retry_delay(attempt))
+        _mark_failed(task_id, e)
+        raise
+
+
+@shared_task(bind=True, max_retries=None)
+def stitch_pdf_to_html_task(self, shards, task_id):
+    """
+    Join the HTML fragments produced by the shard tasks, in page order,
+    into the final document and mark the conversion complete. For
+    paginated output the shards are already parts, so only the index and
+    manifest are written.
+    """
+    with scratch_dir(task_id) as work_dir:
+        return _stitch_pdf_to_html(self, shards, task_id, work_dir)
+
+
+def _stitch_pdf_to_html(celery_task, shards, task_id, work_dir):
+    converter = converters.PdfToHtmlConverter(None, work_dir=work_dir)
+    try:
+        storage = transfer_storage()
+        task = FileConversion.objects.get(task_id=task_id)
+        if task.status in TERMINAL_STATUSES:
+            # The shards of a finished job are gone; nothing left to do
+            return task.status == 'COMPLETED'
+        publish(task_id, status='PROCESSING', stage='stitching')
+
+        if task.metadata.get('output_mode') == 'paginated':
+            parts = [
+                {
+                    'file': os.path.basename(shard['key']),
+                    'first_page': shard['first_page'],
+                    'last_page': shard['last_page']
+                }
+                for shard in shards
+            ]
+            index_path, manifest_path = converter.write_index(
+                task.conversion_type, shards[-1]['last_page'], parts, work_dir, part_base_url(task_id)
+            )
+            upload(storage, index_path, f'converted/{task_id}/index.html')
+            upload(storage, manifest_path, f'converted/{task_id}/manifest.json')
+
+            task.metadata['part_count'] = len(parts)
+            task.converted_file.name = f'converted/{task_id}/manifest.json'
+            task.status = 'COMPLETED'
+            record_status(task)
+            return True
+
+        shard_keys = [shard['key'] for shard in shards]
+        output_path = work_dir / 'output.html'
+        converter.stitch_fragments(
+            task.conversion_type,
+            _open_shards(storage, shard_keys),
+            output_path
+        )
+
+        output_filename = f'converted/{task_id}/output.html'
+        upload(storage, output_path, output_filename)
+
+        task.converted_file.name = output_filename
+        task.status = 'COMPLETED'
+        record_status(task)
+
+        for shard_key in shard_keys:
+            storage.delete(shard_key)
+
+        return True
+
+    except Exception as e:
+        logger.error(f"Stitching shards failed for task {task_id}: {str(e)}", exc_info=True)
+        if 'task' in locals():
+            _retry_or_fail(celery_task, task, e)
+        return False
+
+
+def job_signature(task):
+    """Celery signature running a submitted job on its routed queue"""
+    # Jobs submitted through PdfToHtmlView carry no job_type
+    if task.metadata.get('job_type', PDF_TO_HTML) == PDF_TO_HTML:
+        job_task = convert_pdf_to_html_task
+    else:
+        job_task = run_conversion_job
+    return job_task.si(task.task_id).set(queue=task.queue or None)
+
+
+def enqueue_job(task):
+    """Start the Celery task for a submitted job"""
+    job_signature(task).apply_async()
+
+
+def enqueue_batch(parent, children):
+    """
+    Run a batch's jobs as one group, followed by finish_batch_task to
+    settle the parent's status and build the optional archive.
+    """
+    chord(group(job_signature(child) for child in children))(
+        finish_batch_task.si(parent.task_id)
+    )
+
+
+@shared_task(bind=True, max_retries=None)
+def run_conversion_job(self, task_id):
+    """
+    Run a job submitted through the jobs API with its registered handler
+    (see jobs.py), storing the output under converted/<task_id>/.
+    """
+    with _admitted(self, task_id) as held, scratch_dir(task_id) as work_dir:
+        return _run_conversion_job(self, task_id, work_dir, held)
+
+
+def _run_conversion_job(celery_task, task_id, work_dir, held):
+    try:
+        storage = transfer_storage()
+        task = FileConversion.objects.get(task_id=task_id)
+        if task.status in TERMINAL_STATUSES:
+            return task.status == 'COMPLETED'
+        if not _begin_attempt(task):
+            return False
+
+        run = get_handler(task.metadata['job_type'])
+
+        input_dir = work_dir / 'input'
+        output_dir = work_dir / 'output'
+        input_dir.mkdir()
+        output_dir.mkdir()
+
+        input_paths = [
+            str(download(storage, entry['key'], input_dir / f"{index:03d}_{entry['name']}"))
+            for index, entry in enumerate(task.metadata['inputs'])
+        ]
+        stem = os.path.splitext(task.metadata['inputs'][0]['name'])[0]
+        work_dir.check()
+
+        if not task.metadata.get('page_count'):
+            with fitz.open(input_paths[0]) as doc:
+                page_count = len(doc)
+            size = sum(os.path.getsize(path) for path in input_paths)
+            if not _settle_page_count(task, page_count, size, held):
+                return True
+
+        publish(task_id, status='PROCESSING', stage='converting')
+        output_path, result = run(
+            input_paths, str(output_dir), stem, task.metadata.get('params', {})
+        )
+        work_dir.check()
+
+        publish(task_id, status='PROCESSING', stage='uploading')
+        output_filename = f'converted/{task_id}/{os.path.basename(output_path)}'
+        upload(storage, output_path, output_filename)
+
+        task.converted_file.name = output_filename
+        task.metadata['result'] = result
+        task.status = 'COMPLETED'
+        record_status(task)
+
+        return True
+
+    except Exception as e:
+        logger.error(f"Conversion job {task_id} failed: {str(e)}", exc_info=True)
+        if 'task' in locals():
+            _retry_or_fail(celery_task, task, e)
+        return False
+
+
+@shared_task(bind=True, max_retries=None)
+def finish_batch_task(self, task_id):
+    """
+    Mark a batch complete once all its jobs have finished, zipping their
+    outputs into converted/<task_id>/batch.zip when an archive was asked for.
+    The batch fails only if every job in it failed.
+    """
+    parent = FileConversion.objects.get(task_id=task_id)
+    counts = batch_progress(parent)
+
+    # Sharded PDF to HTML jobs are still running after their first task returns
+    if counts['pending'] or counts['processing']:
+        publish(task_id, status='PROCESSING', progress=counts)
+        raise self.retry(countdown=settings.BATCH_POLL_SECONDS)
+
+    with scratch_dir(task_id) as work_dir:
+        try:
+            if parent.metadata.get('archive') and counts['completed']:
+                storage = transfer_storage()
+                archive_path = work_dir / 'batch.zip'
+                _write_batch_archive(storage, parent, archive_path)
+                parent.converted_file.name = f'converted/{task_id}/batch.zip'
+                upload(storage, archive_path, parent.converted_file.name)
+
+            if counts['failed']:
+                parent.error_message = f"{counts['failed']} of {counts['total']} conversions failed"
+            parent.status = 'FAILED' if counts['failed'] == counts['total'] else 'COMPLETED'
+            record_status(parent, progress=counts)
+            return True
+
+        except Exception as e:
+            logger.error(f"Finishing batch {task_id} failed: {str(e)}", exc_info=True)
+            _mark_failed(task_id, e)
+            return False
+
+
+def archive_original(conversion, local_path):
+    """
+    Archive a synchronous conversion's original in the background: stage
+    it in the ingest outbox and queue archive_original_task, leaving the
+    view free to respond. The original is dropped if it can't be queued.
+    Does nothing for conversions whose originals aren't archived.
+    """
+    staged_path = ingest.stage_original(conversion, local_path)
+    if staged_path is None:
+        return
+    try:
+        archive_original_task.delay(conversion.id, staged_path)
+    except Exception as e:
+        logger.error(f"Failed to queue archiving of conversion {conversion.id}: {str(e)}", exc_info=True)
+        ingest.drop_original(conversion, staged_path)
+
+
+@shared_task(bind=True, max_retries=None)
+def archive_original_task(self, conversion_id, staged_path):
+    """
+    Upload an original staged by archive_original to the key reserved in
+    its record. Transient errors are retried up to INGEST_ARCHIVE_ATTEMPTS
+    times; after that, or once the staged copy is gone (swept), the
+    original is dropped from the record.
+    """
+    conversion = FileConversion.objects.filter(pk=conversion_id).first()
+    if conversion is None:
+        # The conversion failed and was deleted after staging
+        ingest.discard_staged(staged_path)
+        return False
+    if ingest.original_status(conversion) != ingest.ARCHIVING:
+        # Settled by an earlier delivery of this task
+        return False
+    try:
+        ingest.store_original(conversion, staged_path)
+        return True
+    except Exception as e:
+        attempt = self.request.retries + 1
+        if isinstance(e, TRANSIENT_ERRORS) and attempt < settings.INGEST_ARCHIVE_ATTEMPTS:
+            logger.warning(f"Retrying archiving of conversion {conversion_id} after attempt {attempt}: {str(e)}")
+            raise self.retry(exc=e, countdown=_retry_delay(attempt))
+        logger.error(f"Failed to archive original of conversion {conversion_id}: {str(e)}", exc_info=True)
+        ingest.drop_original(conversion, staged_path)
+        return False
+
+
+@shared_task
+def requeue_stale_jobs():
+    """
+    Periodic (beat) task restarting PROCESSING jobs without a heartbeat
+    for CONVERSION_STALE_SECONDS, e.g. because their worker was killed and
+    the broker lost the message. They are put back to PENDING and queued
+    again, resuming from their checkpoints. PENDING jobs are left to the
+    broker, however long they wait behind others. Batches whose jobs have
+    all settled get finished again.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.CONVERSION_STALE_SECONDS)
+    # Only queued jobs; the synchronous views' records have no queue
+    stale = FileConversion.objects.filter(
+        Q(status='PROCESSING'), Q(updated_at__lt=cutoff),
+        ~Q(queue='') | Q(metadata__batch=True)
+    )
+    requeued = 0
+    for task in stale:
+        if task.metadata.get('batch'):
+            counts = batch_progress(task)
+            if counts['pending'] or counts['processing']:
+                continue
+            logger.warning(f"Finishing stale batch {task.task_id} (last update {task.updated_at})")
+            _touch(task.task_id)
+            finish_batch_task.si(task.task_id).apply_async()
+            requeued += 1
+            continue
+
+        # Conditional, as a heartbeat may arrive meanwhile
+        if not FileConversion.objects.filter(pk=task.pk, status='PROCESSING', updated_at__lt=cutoff).update(
+            status='PENDING', updated_at=timezone.now()
+        ):
+            continue
+        logger.warning(f"Requeueing stale task {task.task_id} (last update {task.updated_at})")
+        task.refresh_from_db()
+        record_status(task, stage='requeued')
+        job_signature(task).apply_async()
+        requeued += 1
+    return requeued
+
+
+@shared_task
+def sweep_media():
+    """
+    Periodic (beat) task enforcing the TTLs and quotas of the directories
+    in MEDIA_ROOT, which every node shares (see RETENTION_DIRECTORIES).
+    SCRATCH_ROOT is local to each node and swept by its own processes.
+    """
+    return retention.sweep_media()
+
+
+def batch_progress(parent):
+    """Job counts of a batch by status, plus the total"""
+    by_status = dict(
+        parent.children.values_list('status').annotate(count=Count('id')).order_by()
+    )
+    return {
+        'total': sum(by_status.values()),
+        'pending': by_status.get('PENDING', 0),
+        'processing': by_status.get('PROCESSING', 0),
+        'completed': by_status.get('COMPLETED', 0),
+        'failed': by_status.get('FAILED', 0),
+    }
+
+
+def _write_batch_archive(storage, parent, archive_path):
+    """
+    Stream each completed job's output into one zip, in submission order.
+    Paginated HTML jobs contribute a folder with all their files.
+    """
+    children = parent.children.filter(status='COMPLETED').order_by('id')
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for index, child in enumerate(children):
+            stem = os.path.splitext(child.metadata['inputs'][0]['name'])[0]
+            prefix = f'{index + 1:03d}_{stem}'
+            if child.metadata.get('output_mode') == 'paginated':
+                output_dir = os.path.dirname(child.converted_file.name)
+                _, names = storage.listdir(output_dir)
+                entries = [(f'{output_dir}/{name}', f'{prefix}/{name}') for name in sorted(names)]
+            else:
+                ext = os.path.splitext(child.converted_file.name)[1]
+                entries = [(child.converted_file.name, f'{prefix}{ext}')]
+
+            for key, arcname in entries:
+                with storage.open(key, 'rb') as source, zipf.open(arcname, 'w') as target:
+                    shutil.copyfileobj(source, target, settings.STORAGE_TRANSFER_CHUNK_SIZE)
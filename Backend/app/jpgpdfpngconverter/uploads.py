@@ -0,0 +1,114 @@
+# uploads.py
+import math
+import os
+import uuid
+from botocore.exceptions import ClientError
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from .storage import client, signing_client, transfer_storage
+
+# Direct uploads land under uploads/<token>/<file name>
+UPLOAD_PREFIX = 'uploads/'
+
+# S3 allows at most 10,000 parts per upload and at least 5 MB per part
+MAX_PARTS = 10000
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def _storage_client():
+    return client(), transfer_storage().bucket_name
+
+
+def part_size_for(size):
+    """Part size for an upload of ``size`` bytes, within the S3 part limits"""
+    return max(settings.DIRECT_UPLOAD_PART_SIZE, MIN_PART_SIZE, math.ceil(size / MAX_PARTS))
+
+
+def _check_key(key):
+    if not key.startswith(UPLOAD_PREFIX) or '..' in key:
+        raise ValidationError(f'Not a direct upload key: {key}')
+
+
+def start_upload(filename, size, content_type=None):
+    """
+    Start a multipart upload of ``size`` bytes and presign a PUT URL for
+    each of its parts. Returns the upload's key and id with the part size
+    and ``parts``, a list of ``{'part_number', 'url'}``.
+    """
+    if size <= 0:
+        raise ValidationError('size must be a positive number of bytes')
+    if size > settings.DIRECT_UPLOAD_MAX_BYTES:
+        raise ValidationError(
+            f'File exceeds the {settings.DIRECT_UPLOAD_MAX_BYTES // (1024 * 1024)}MB upload limit'
+        )
+
+    name = os.path.basename(filename)
+    if not name:
+        raise ValidationError('filename is required')
+    key = f'{UPLOAD_PREFIX}{uuid.uuid4()}/{name}'
+
+    client, bucket = _storage_client()
+    options = {'ContentType': content_type} if content_type else {}
+    upload_id = client.create_multipart_upload(Bucket=bucket, Key=key, **options)['UploadId']
+
+    part_size = part_size_for(size)
+    signer = signing_client(settings.DIRECT_UPLOAD_ENDPOINT_URL)
+    parts = [
+        {
+            'part_number': number,
+            'url': signer.generate_presigned_url(
+                'upload_part',
+                Params={'Bucket': bucket, 'Key': key, 'UploadId': upload_id, 'PartNumber': number},
+                ExpiresIn=settings.DIRECT_UPLOAD_URL_EXPIRY
+            )
+        }
+        for number in range(1, math.ceil(size / part_size) + 1)
+    ]
+    return {
+        'key': key,
+        'upload_id': upload_id,
+        'part_size': part_size,
+        'expires_in': settings.DIRECT_UPLOAD_URL_EXPIRY,
+        'parts': parts
+    }
+
+
+def complete_upload(key, upload_id, parts):
+    """
+    Assemble an upload from its uploaded ``parts`` (``{'part_number',
+    'etag'}`` as returned by storage for each PUT). Returns the object size.
+    """
+    _check_key(key)
+    try:
+        etags = sorted((int(part['part_number']), part['etag']) for part in parts)
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError('parts must list the part_number and etag of every uploaded part')
+    if not etags:
+        raise ValidationError('parts must list the part_number and etag of every uploaded part')
+
+    client, bucket = _storage_client()
+    try:
+        client.complete_multipart_upload(
+            Bucket=bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': etag} for number, etag in etags]}
+        )
+    except ClientError as e:
+        raise ValidationError(f"Could not complete upload of {key}: {e.response['Error']['Message']}")
+
+    size = client.head_object(Bucket=bucket, Key=key)['ContentLength']
+    if size > settings.DIRECT_UPLOAD_MAX_BYTES:
+        client.delete_object(Bucket=bucket, Key=key)
+        raise ValidationError(
+            f'File exceeds the {settings.DIRECT_UPLOAD_MAX_BYTES // (1024 * 1024)}MB upload limit'
+        )
+    return size
+
+
+def abort_upload(key, upload_id):
+    """Discard an unfinished upload and any parts already stored"""
+    _check_key(key)
+    client, bucket = _storage_client()
+    try:
+        client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+    except ClientError as e:
+        raise ValidationError(f"Could not abort upload of {key}: {e.response['Error']['Message']}")
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import PdfToJpgView, JpgToPdfView, PngToPdfView, PdfToPngView , PdfToWebpView , PdfToWordView , PdfToHtmlView , ConversionStatusView
+from .views import PdfToJpgView, JpgToPdfView, PngToPdfView, PdfToPngView , PdfToWebpView , PdfToWordView , PdfToHtmlView , ConversionStatusView, ConversionEventsView, JobView, BatchJobView, DirectUploadView, DirectUploadCompleteView, AsyncUploadView, ConversionExecutorView, HtmlImageView, HtmlPartView
 
 urlpatterns = [
     path('pdf-to-jpg/', PdfToJpgView.as_view()),
@@ -9,5 +9,23 @@ urlpatterns = [
     path('pdf-to-webp/', PdfToWebpView.as_view()),
     path('pdf-to-word/', PdfToWordView.as_view()),
     path('pdf-to-html/', PdfToHtmlView.as_view()),
-    path('conversion-status/', ConversionStatusView.as_view()),
+    path('conversion-status/<str:task_id>/', ConversionStatusView.as_view()),
+    path('conversion-events/<str:task_id>/', ConversionEventsView.as_view()),
+    path('jobs/', JobView.as_view()),
+    path('jobs/batch/', BatchJobView.as_view()),
+    path('jobs/<str:task_id>/', ConversionStatusView.as_view()),
+    path('uploads/', DirectUploadView.as_view()),
+    path('uploads/complete/', DirectUploadCompleteView.as_view()),
+    path('html-images/<path:name>', HtmlImageView.as_view()),
+    path('html-parts/<str:task_id>/<str:name>', HtmlPartView.as_view()),
+    path('async/pdf-to-jpg/', AsyncUploadView.as_view(sync_view=PdfToJpgView)),
+    path('async/jpg-to-pdf/', AsyncUploadView.as_view(sync_view=JpgToPdfView)),
+    path('async/png-to-pdf/', AsyncUploadView.as_view(sync_view=PngToPdfView)),
+    path('async/pdf-to-png/', AsyncUploadView.as_view(sync_view=PdfToPngView)),
+    path('async/pdf-to-webp/', AsyncUploadView.as_view(sync_view=PdfToWebpView)),
+    path('async/pdf-to-word/', AsyncUploadView.as_view(sync_view=PdfToWordView)),
+    path('async/pdf-to-html/', AsyncUploadView.as_view(sync_view=PdfToHtmlView)),
+    path('async/jobs/', AsyncUploadView.as_view(sync_view=JobView)),
+    path('async/jobs/batch/', AsyncUploadView.as_view(sync_view=BatchJobView)),
+    path('async/executor/', ConversionExecutorView.as_view()),
 ]
\ No newline at end of file
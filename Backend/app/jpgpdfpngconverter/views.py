@@ -6,26 +6,77 @@ from .models import FileConversion
 from .converters import FileConverter
 import os
 from django.conf import settings
-from django.http import FileResponse
+from django.http import HttpResponseRedirect, JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.core.serializers.json import DjangoJSONEncoder
+from asgiref.sync import sync_to_async
+import redis.asyncio as aioredis
+import functools
+import json
+import shutil
+import time
 import zipfile
 import fitz  # PyMuPDF
 from PIL import Image
 import uuid  # For unique IDs
-import tempfile
 import logging
-from .converters import PdfToWordConverter
-from .tasks import convert_pdf_to_html_task
+from . import converters
+from .tasks import archive_original, convert_pdf_to_html_task, enqueue_batch, enqueue_job
+from .routing import choose_queue, count_pages
+from .jobs import build_job, complete_uploads, get_job_spec, validate_upload
+from .storage import ensure_bucket, presign_get, put, transfer_storage
+from .scratch import scratch_dir
+from . import admission, delivery, ingest, offload, progress, status_cache, uploads
 # from django.core.files.storage import default_storage
-from minio.error import S3Error
-from minio import Minio
-from datetime import timedelta
+from botocore.exceptions import BotoCoreError, ClientError
 
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
+def admission_controlled(estimate):
+    """
+    Run a synchronous conversion view only once its estimated memory,
+    ``estimate(request)`` in bytes, is admitted (see admission.py). Answers
+    429 with Retry-After when the budget stays full for
+    ADMISSION_QUEUE_SECONDS. Requests whose input can't be estimated are
+    passed through for the view to reject.
+    """
+    def decorator(post):
+        @functools.wraps(post)
+        def wrapper(self, request, *args, **kwargs):
+            try:
+                nbytes = estimate(request)
+            except Exception:
+                return post(self, request, *args, **kwargs)
+            
+            try:
+                reservation = admission.admit(nbytes, wait=settings.ADMISSION_QUEUE_SECONDS)
+            except admission.AdmissionRejected as e:
+                logger.warning(f"Rejected {request.path}: {str(e)}")
+                return Response(
+                    {'error': 'Server is busy with other conversions, please retry shortly'},
+                    status=status.HTTP_429_TOO_MANY_REQUESTS,
+                    headers={'Retry-After': str(e.retry_after)}
+                )
+            with reservation:
+                return post(self, request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _pdf_upload_estimate(conversion_type):
+    return lambda request: admission.estimate_pdf_upload(request.FILES['file'], conversion_type)
+
+
+def _image_upload_estimate(conversion_type):
+    return lambda request: admission.estimate_image_upload(request.FILES.getlist('files'), conversion_type)
+
+
 class PdfToJpgView(APIView):
+    @admission_controlled(_pdf_upload_estimate('pdf2jpg'))
     def post(self, request):
         if 'file' not in request.FILES:
             return Response(
@@ -35,9 +86,7 @@ class PdfToJpgView(APIView):
 
         file_obj = request.FILES['file']
         conversion = None
-        temp_pdf_path = None
-        temp_output_dir = None
-        zip_path = None
+        scratch = scratch_dir('pdf2jpg')
 
         try:
             # Validate file size (10MB max)
@@ -47,15 +96,11 @@ class PdfToJpgView(APIView):
             converter = FileConverter(file_obj, 'pdf2jpg')
             conversion = converter.create_conversion_record()
             
-            # Create temp directory for PDF
-            temp_pdf_dir = os.path.join(settings.MEDIA_ROOT, 'temp', str(conversion.id))
-            os.makedirs(temp_pdf_dir, exist_ok=True)
-            temp_pdf_path = os.path.join(temp_pdf_dir, file_obj.name)
+            temp_pdf_path = os.path.join(scratch, file_obj.name)
             
             # Save uploaded file
-            with open(temp_pdf_path, 'wb+') as f:
-                for chunk in file_obj.chunks():
-                    f.write(chunk)
+            ingest.write_upload(file_obj, temp_pdf_path)
+            scratch.check()
             
             # Open PDF to check page count
             doc = fitz.open(temp_pdf_path)
@@ -64,8 +109,7 @@ class PdfToJpgView(APIView):
             
             # For single-page PDFs
             if page_count == 1:
-                output_jpg_path = converter.get_output_path('jpg')
-                os.makedirs(os.path.dirname(output_jpg_path), exist_ok=True)
+                output_jpg_path = converter.get_output_path('jpg', scratch)
                 
                 converter.convert_pdf_to_jpg(temp_pdf_path, output_jpg_path)
                 
@@ -73,11 +117,15 @@ class PdfToJpgView(APIView):
                     raise RuntimeError("Conversion failed - no output file created")
                 
                 converter.save_conversion(output_jpg_path, 'jpg')
+                delivery.publish_output(output_jpg_path, conversion.converted_file.name)
+                archive_original(conversion, temp_pdf_path)
                 
                 return Response({
                     'id': conversion.id,
-                    'original_file': conversion.original_file.url,
-                    'converted_file': conversion.converted_file.url,
+                    'original_file': ingest.original_url(conversion),
+                    'original_status': ingest.original_status(conversion),
+                    'converted_file': conversion.converted_file.name,
+                    'converted_file_url': delivery.download_url(conversion.converted_file.name),
                     'page_count': 1,
                     'status': 'success'
                 }, status=status.HTTP_201_CREATED)
@@ -85,8 +133,8 @@ class PdfToJpgView(APIView):
             # For multi-page PDFs
             else:
                 # Create output directory for JPGs
-                temp_output_dir = os.path.join(temp_pdf_dir, 'jpg_output')
-                os.makedirs(temp_output_dir, exist_ok=True)
+                temp_output_dir = os.path.join(scratch, 'jpg_output')
+                os.makedirs(temp_output_dir)
                 
                 # Convert all pages to JPGs
                 doc = fitz.open(temp_pdf_path)
@@ -116,21 +164,27 @@ class PdfToJpgView(APIView):
                 
                 # Create ZIP archive
                 zip_filename = f"{os.path.splitext(file_obj.name)[0]}.zip"
-                zip_path = os.path.join(temp_pdf_dir, zip_filename)
+                zip_path = os.path.join(scratch, zip_filename)
                 
                 with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                     for jpg_file in jpg_files:
                         arcname = os.path.basename(jpg_file)
                         zipf.write(jpg_file, arcname)
                 
-                # Save conversion record with ZIP file
-                conversion.converted_file.name = f'temp/{conversion.id}/{zip_filename}'
+                # Publish the ZIP; the page images aren't needed once it's built
+                shutil.rmtree(temp_output_dir)
+                conversion.converted_file.name = delivery.publish_output(
+                    zip_path, f'converted_files/{conversion.id}_{zip_filename}'
+                )
                 conversion.save()
+                archive_original(conversion, temp_pdf_path)
                 
                 return Response({
                     'id': conversion.id,
-                    'original_file': conversion.original_file.url,
-                    'converted_file': conversion.converted_file.url,
+                    'original_file': ingest.original_url(conversion),
+                    'original_status': ingest.original_status(conversion),
+                    'converted_file': conversion.converted_file.name,
+                    'converted_file_url': delivery.download_url(conversion.converted_file.name),
                     'page_count': page_count,
                     'download_url': f'/api/pdf-to-jpg/{conversion.id}/download/',
                     'status': 'success'
@@ -139,24 +193,18 @@ class PdfToJpgView(APIView):
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            # Cleanup on failure
-            if temp_pdf_path and os.path.exists(temp_pdf_path):
-                os.remove(temp_pdf_path)
-            if temp_output_dir and os.path.exists(temp_output_dir):
-                for f in os.listdir(temp_output_dir):
-                    os.remove(os.path.join(temp_output_dir, f))
-                os.rmdir(temp_output_dir)
-            if zip_path and os.path.exists(zip_path):
-                os.remove(zip_path)
             if conversion:
                 conversion.delete()
             return Response(
                 {'error': f'Conversion failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        finally:
+            # Everything the conversion wrote
+            scratch.close()
 
     def get(self, request, conversion_id):
-        """Download the ZIP file (for multi-page PDFs)"""
+        """Redirect to the ZIP file in storage (for multi-page PDFs)"""
         try:
             conversion = FileConversion.objects.get(id=conversion_id)
             if not conversion.converted_file.name.endswith('.zip'):
@@ -165,12 +213,8 @@ class PdfToJpgView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            zip_path = conversion.converted_file.path
-            
-            response = FileResponse(open(zip_path, 'rb'))
-            response['Content-Disposition'] = f'attachment; filename="{os.path.basename(zip_path)}"'
-            response['Content-Type'] = 'application/zip'
-            return response
+            # Storage serves the download itself, range requests included
+            return HttpResponseRedirect(delivery.download_url(conversion.converted_file.name))
             
         except FileConversion.DoesNotExist:
             return Response(
@@ -184,6 +228,7 @@ class PdfToJpgView(APIView):
             )
 
 class JpgToPdfView(APIView):
+    @admission_controlled(_image_upload_estimate('jpg2pdf'))
     def post(self, request):
         if 'files' not in request.FILES:
             return Response(
@@ -194,7 +239,7 @@ class JpgToPdfView(APIView):
         file_objs = request.FILES.getlist('files')
         conversion = None
         temp_jpg_paths = []
-        output_pdf_path = None
+        scratch = scratch_dir('jpg2pdf')
 
         try:
             # Validate all files first
@@ -208,21 +253,15 @@ class JpgToPdfView(APIView):
             converter = FileConverter(file_objs[0], 'jpg2pdf')
             conversion = converter.create_conversion_record()
             
-            # Create temp directory
-            temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp')
-            os.makedirs(temp_dir, exist_ok=True)
-            
             # Save all files to temp location
             for i, file_obj in enumerate(file_objs):
-                temp_jpg_path = os.path.join(temp_dir, f'temp_{i}_{file_obj.name}')
-                with open(temp_jpg_path, 'wb+') as f:
-                    for chunk in file_obj.chunks():
-                        f.write(chunk)
+                temp_jpg_path = os.path.join(scratch, f'temp_{i}_{file_obj.name}')
+                ingest.write_upload(file_obj, temp_jpg_path)
                 temp_jpg_paths.append(temp_jpg_path)
+            scratch.check()
             
             # Prepare output path
-            output_pdf_path = converter.get_output_path('pdf')
-            os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
+            output_pdf_path = converter.get_output_path('pdf', scratch)
             
             # Convert to PDF (handles both single and multiple files)
             if len(temp_jpg_paths) == 1:
@@ -238,6 +277,8 @@ class JpgToPdfView(APIView):
             
             # Save conversion record
             converter.save_conversion(output_pdf_path, 'pdf')
+            delivery.publish_output(output_pdf_path, conversion.converted_file.name)
+            archive_original(conversion, temp_jpg_paths[0])
             
             # Prepare response
             original_files = [{
@@ -249,7 +290,9 @@ class JpgToPdfView(APIView):
             return Response({
                 'id': conversion.id,
                 'original_files': original_files,
-                'converted_file': conversion.converted_file.url,
+                'original_status': ingest.original_status(conversion),
+                'converted_file': conversion.converted_file.name,
+                'converted_file_url': delivery.download_url(conversion.converted_file.name),
                 'page_count': len(temp_jpg_paths),
                 'status': 'success'
             }, status=status.HTTP_201_CREATED)
@@ -258,18 +301,6 @@ class JpgToPdfView(APIView):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
         except Exception as e:
-            # Clean up temp files
-            for path in temp_jpg_paths:
-                if path and os.path.exists(path):
-                    try:
-                        os.remove(path)
-                    except:
-                        pass
-            if output_pdf_path and os.path.exists(output_pdf_path):
-                try:
-                    os.remove(output_pdf_path)
-                except:
-                    pass
             if conversion:
                 try:
                     conversion.delete()
@@ -280,8 +311,12 @@ class JpgToPdfView(APIView):
                 {'error': f'Conversion failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        finally:
+            # Everything the conversion wrote
+            scratch.close()
 
 class PngToPdfView(APIView):
+    @admission_controlled(_image_upload_estimate('png2pdf'))
     def post(self, request):
         if 'files' not in request.FILES:
             return Response(
@@ -292,7 +327,7 @@ class PngToPdfView(APIView):
         file_objs = request.FILES.getlist('files')
         conversion = None
         temp_files = []
-        output_pdf_path = None
+        scratch = scratch_dir('png2pdf')
 
         try:
             # Create conversion record with the first file (we'll track all files in metadata)
@@ -306,19 +341,14 @@ class PngToPdfView(APIView):
             }
             conversion.save()
             
-            temp_dir = os.path.join(settings.MEDIA_ROOT, 'temp')
-            os.makedirs(temp_dir, exist_ok=True)
-            
             # Save all uploaded files to temp directory
             for i, file_obj in enumerate(file_objs):
-                temp_file_path = os.path.join(temp_dir, f'temp_{i}_{file_obj.name}')
-                with open(temp_file_path, 'wb+') as f:
-                    for chunk in file_obj.chunks():
-                        f.write(chunk)
+                temp_file_path = os.path.join(scratch, f'temp_{i}_{file_obj.name}')
+                ingest.write_upload(file_obj, temp_file_path)
                 temp_files.append(temp_file_path)
+            scratch.check()
             
-            output_pdf_path = converter.get_output_path('pdf')
-            os.makedirs(os.path.dirname(output_pdf_path), exist_ok=True)
+            output_pdf_path = converter.get_output_path('pdf', scratch)
             
             # Convert multiple PNGs to single PDF - no time limit
             converter.convert_png_to_pdf(temp_files, output_pdf_path, is_multiple=True)
@@ -327,11 +357,15 @@ class PngToPdfView(APIView):
                 raise RuntimeError("Conversion failed - no output file created")
             
             converter.save_conversion(output_pdf_path, 'pdf')
+            delivery.publish_output(output_pdf_path, conversion.converted_file.name)
+            archive_original(conversion, temp_files[0])
             
             return Response({
                 'id': conversion.id,
                 'original_files': [file_obj.name for file_obj in file_objs],
-                'converted_file': conversion.converted_file.url,
+                'original_status': ingest.original_status(conversion),
+                'converted_file': conversion.converted_file.name,
+                'converted_file_url': delivery.download_url(conversion.converted_file.name),
                 'status': 'success',
                 'page_count': len(file_objs)
             }, status=status.HTTP_201_CREATED)
@@ -340,12 +374,6 @@ class PngToPdfView(APIView):
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
         except Exception as e:
-            # Clean up temp files
-            for temp_file in temp_files:
-                if temp_file and os.path.exists(temp_file):
-                    os.remove(temp_file)
-            if output_pdf_path and os.path.exists(output_pdf_path):
-                os.remove(output_pdf_path)
             if conversion:
                 conversion.delete()
                 
@@ -353,8 +381,12 @@ class PngToPdfView(APIView):
                 {'error': f'Conversion failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        finally:
+            # Everything the conversion wrote
+            scratch.close()
 
 class PdfToPngView(APIView):
+    @admission_controlled(_pdf_upload_estimate('pdf2png'))
     def post(self, request):
         if 'file' not in request.FILES:
             return Response(
@@ -364,8 +396,7 @@ class PdfToPngView(APIView):
 
         file_obj = request.FILES['file']
         conversion = None
-        temp_pdf_path = None
-        temp_output_dir = None
+        scratch = scratch_dir('pdf2png')
 
         try:
             # Validate file size (20MB max)
@@ -375,19 +406,15 @@ class PdfToPngView(APIView):
             converter = FileConverter(file_obj, 'pdf2png')
             conversion = converter.create_conversion_record()
             
-            # Create temp directory for PDF
-            temp_pdf_dir = os.path.join(settings.MEDIA_ROOT, 'temp', str(conversion.id))
-            os.makedirs(temp_pdf_dir, exist_ok=True)
-            temp_pdf_path = os.path.join(temp_pdf_dir, file_obj.name)
+            temp_pdf_path = os.path.join(scratch, file_obj.name)
             
             # Save uploaded file
-            with open(temp_pdf_path, 'wb+') as f:
-                for chunk in file_obj.chunks():
-                    f.write(chunk)
+            ingest.write_upload(file_obj, temp_pdf_path)
+            scratch.check()
             
             # Create output directory for PNGs
-            temp_output_dir = os.path.join(temp_pdf_dir, 'png_output')
-            os.makedirs(temp_output_dir, exist_ok=True)
+            temp_output_dir = os.path.join(scratch, 'png_output')
+            os.makedirs(temp_output_dir)
             
             # Convert all pages to PNGs - no time limit
             doc = fitz.open(temp_pdf_path)
@@ -417,21 +444,27 @@ class PdfToPngView(APIView):
             
             # Create ZIP archive instead of RAR
             zip_filename = f"{os.path.splitext(file_obj.name)[0]}.zip"
-            zip_path = os.path.join(temp_pdf_dir, zip_filename)
+            zip_path = os.path.join(scratch, zip_filename)
             
             with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                 for png_file in png_files:
                     arcname = os.path.basename(png_file)
                     zipf.write(png_file, arcname)
             
-            # Save conversion record with ZIP file
-            conversion.converted_file.name = f'temp/{conversion.id}/{zip_filename}'
+            # Publish the ZIP; the page images aren't needed once it's built
+            shutil.rmtree(temp_output_dir)
+            conversion.converted_file.name = delivery.publish_output(
+                zip_path, f'converted_files/{conversion.id}_{zip_filename}'
+            )
             conversion.save()
+            archive_original(conversion, temp_pdf_path)
             
             return Response({
                 'id': conversion.id,
-                'original_file': conversion.original_file.url,
-                'converted_file': conversion.converted_file.url,
+                'original_file': ingest.original_url(conversion),
+                'original_status': ingest.original_status(conversion),
+                'converted_file': conversion.converted_file.name,
+                'converted_file_url': delivery.download_url(conversion.converted_file.name),
                 'page_count': len(png_files),
                 'download_url': f'/api/pdf-to-png/{conversion.id}/download/',
                 'status': 'success'
@@ -440,30 +473,22 @@ class PdfToPngView(APIView):
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            # Cleanup on failure
-            if temp_pdf_path and os.path.exists(temp_pdf_path):
-                os.remove(temp_pdf_path)
-            if temp_output_dir and os.path.exists(temp_output_dir):
-                for f in os.listdir(temp_output_dir):
-                    os.remove(os.path.join(temp_output_dir, f))
-                os.rmdir(temp_output_dir)
             if conversion:
                 conversion.delete()
             return Response(
                 {'error': f'Conversion failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        finally:
+            # Everything the conversion wrote
+            scratch.close()
 
     def get(self, request, conversion_id):
-        """Download the ZIP file"""
+        """Redirect to the ZIP file in storage"""
         try:
             conversion = FileConversion.objects.get(id=conversion_id)
-            zip_path = conversion.converted_file.path
-            
-            response = FileResponse(open(zip_path, 'rb'))
-            response['Content-Disposition'] = f'attachment; filename="{os.path.basename(zip_path)}"'
-            response['Content-Type'] = 'application/zip'
-            return response
+            # Storage serves the download itself, range requests included
+            return HttpResponseRedirect(delivery.download_url(conversion.converted_file.name))
             
         except FileConversion.DoesNotExist:
             return Response(
@@ -477,6 +502,7 @@ class PdfToPngView(APIView):
             )
 
 class PdfToWebpView(APIView):
+    @admission_controlled(_pdf_upload_estimate('pdf2webp'))
     def post(self, request):
         if 'file' not in request.FILES:
             return Response(
@@ -486,9 +512,7 @@ class PdfToWebpView(APIView):
 
         file_obj = request.FILES['file']
         conversion = None
-        temp_pdf_path = None
-        temp_output_dir = None
-        zip_path = None
+        scratch = scratch_dir('pdf2webp')
 
         try:
             # Validate file size (20MB max)
@@ -498,15 +522,11 @@ class PdfToWebpView(APIView):
             converter = FileConverter(file_obj, 'pdf2webp')
             conversion = converter.create_conversion_record()
             
-            # Create temp directory for PDF
-            temp_pdf_dir = os.path.join(settings.MEDIA_ROOT, 'temp', str(conversion.id))
-            os.makedirs(temp_pdf_dir, exist_ok=True)
-            temp_pdf_path = os.path.join(temp_pdf_dir, file_obj.name)
+            temp_pdf_path = os.path.join(scratch, file_obj.name)
             
             # Save uploaded file
-            with open(temp_pdf_path, 'wb+') as f:
-                for chunk in file_obj.chunks():
-                    f.write(chunk)
+            ingest.write_upload(file_obj, temp_pdf_path)
+            scratch.check()
             
             # Open PDF to check page count
             doc = fitz.open(temp_pdf_path)
@@ -515,8 +535,7 @@ class PdfToWebpView(APIView):
             
             # For single-page PDFs
             if page_count == 1:
-                output_webp_path = converter.get_output_path('webp')
-                os.makedirs(os.path.dirname(output_webp_path), exist_ok=True)
+                output_webp_path = converter.get_output_path('webp', scratch)
                 
                 converter.convert_pdf_to_webp(temp_pdf_path, output_webp_path)
                 
@@ -524,11 +543,15 @@ class PdfToWebpView(APIView):
                     raise RuntimeError("Conversion failed - no output file created")
                 
                 converter.save_conversion(output_webp_path, 'webp')
+                delivery.publish_output(output_webp_path, conversion.converted_file.name)
+                archive_original(conversion, temp_pdf_path)
                 
                 return Response({
                     'id': conversion.id,
-                    'original_file': conversion.original_file.url,
-                    'converted_file': conversion.converted_file.url,
+                    'original_file': ingest.original_url(conversion),
+                    'original_status': ingest.original_status(conversion),
+                    'converted_file': conversion.converted_file.name,
+                    'converted_file_url': delivery.download_url(conversion.converted_file.name),
                     'page_count': 1,
                     'status': 'success'
                 }, status=status.HTTP_201_CREATED)
@@ -536,8 +559,8 @@ class PdfToWebpView(APIView):
             # For multi-page PDFs
             else:
                 # Create output directory for WebPs
-                temp_output_dir = os.path.join(temp_pdf_dir, 'webp_output')
-                os.makedirs(temp_output_dir, exist_ok=True)
+                temp_output_dir = os.path.join(scratch, 'webp_output')
+                os.makedirs(temp_output_dir)
                 
                 # Convert all pages to WebPs
                 doc = fitz.open(temp_pdf_path)
@@ -567,21 +590,27 @@ class PdfToWebpView(APIView):
                 
                 # Create ZIP archive
                 zip_filename = f"{os.path.splitext(file_obj.name)[0]}.zip"
-                zip_path = os.path.join(temp_pdf_dir, zip_filename)
+                zip_path = os.path.join(scratch, zip_filename)
                 
                 with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
                     for webp_file in webp_files:
                         arcname = os.path.basename(webp_file)
                         zipf.write(webp_file, arcname)
                 
-                # Save conversion record with ZIP file
-                conversion.converted_file.name = f'temp/{conversion.id}/{zip_filename}'
+                # Publish the ZIP; the page images aren't needed once it's built
+                shutil.rmtree(temp_output_dir)
+                conversion.converted_file.name = delivery.publish_output(
+                    zip_path, f'converted_files/{conversion.id}_{zip_filename}'
+                )
                 conversion.save()
+                archive_original(conversion, temp_pdf_path)
                 
                 return Response({
                     'id': conversion.id,
-                    'original_file': conversion.original_file.url,
-                    'converted_file': conversion.converted_file.url,
+                    'original_file': ingest.original_url(conversion),
+                    'original_status': ingest.original_status(conversion),
+                    'converted_file': conversion.converted_file.name,
+                    'converted_file_url': delivery.download_url(conversion.converted_file.name),
                     'page_count': page_count,
                     'download_url': f'/api/pdf-to-webp/{conversion.id}/download/',
                     'status': 'success'
@@ -590,24 +619,18 @@ class PdfToWebpView(APIView):
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            # Cleanup on failure
-            if temp_pdf_path and os.path.exists(temp_pdf_path):
-                os.remove(temp_pdf_path)
-            if temp_output_dir and os.path.exists(temp_output_dir):
-                for f in os.listdir(temp_output_dir):
-                    os.remove(os.path.join(temp_output_dir, f))
-                os.rmdir(temp_output_dir)
-            if zip_path and os.path.exists(zip_path):
-                os.remove(zip_path)
             if conversion:
                 conversion.delete()
             return Response(
                 {'error': f'Conversion failed: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+        finally:
+            # Everything the conversion wrote
+            scratch.close()
 
     def get(self, request, conversion_id):
-        """Download the ZIP file (for multi-page PDFs)"""
+        """Redirect to the ZIP file in storage (for multi-page PDFs)"""
         try:
             conversion = FileConversion.objects.get(id=conversion_id)
             if not conversion.converted_file.name.endswith('.zip'):
@@ -616,12 +639,8 @@ class PdfToWebpView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            zip_path = conversion.converted_file.path
-            
-            response = FileResponse(open(zip_path, 'rb'))
-            response['Content-Disposition'] = f'attachment; filename="{os.path.basename(zip_path)}"'
-            response['Content-Type'] = 'application/zip'
-            return response
+            # Storage serves the download itself, range requests included
+            return HttpResponseRedirect(delivery.download_url(conversion.converted_file.name))
             
         except FileConversion.DoesNotExist:
             return Response(
@@ -637,14 +656,22 @@ class PdfToWebpView(APIView):
 class PdfToWordView(APIView):
     """Production-ready PDF to Word API endpoint"""
     
-    converter = PdfToWordConverter()
+    _converter = None
+    
+    @property
+    def converter(self):
+        # Shared by all requests, and only loaded once a conversion is asked for
+        if PdfToWordView._converter is None:
+            PdfToWordView._converter = converters.PdfToWordConverter()
+        return PdfToWordView._converter
     
+    @admission_controlled(_pdf_upload_estimate('pdf2word'))
     def post(self, request):
         if 'file' not in request.FILES:
             return Response({'error': 'No file uploaded'}, status=400)
         
         file_obj = request.FILES['file']
-        temp_files = []
+        scratch = scratch_dir('pdf2word')
         
         try:
             # Validate input
@@ -658,16 +685,11 @@ class PdfToWordView(APIView):
                     status=400
                 )
             
-            # Create temp files
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_pdf:
-                for chunk in file_obj.chunks():
-                    tmp_pdf.write(chunk)
-                pdf_path = tmp_pdf.name
-                temp_files.append(pdf_path)
+            pdf_path = ingest.write_upload(file_obj, os.path.join(scratch, 'input.pdf'))
+            scratch.check()
             
             output_filename = f"{uuid.uuid4()}.docx"
-            output_path = os.path.join(settings.MEDIA_ROOT, 'converted', output_filename)
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            output_path = os.path.join(scratch, output_filename)
             
             # Get conversion mode (default: preserve layout)
             preserve_graphics = request.POST.get('preserve_graphics', 'true').lower() == 'true'
@@ -679,8 +701,11 @@ class PdfToWordView(APIView):
                 preserve_graphics=preserve_graphics
             )
             
+            output_key = delivery.publish_output(output_path, f'converted/{output_filename}')
+            
             return Response({
-                'converted_file': f'/media/converted/{output_filename}',
+                'converted_file': output_key,
+                'converted_file_url': delivery.download_url(output_key),
                 'status': 'success',
                 'metadata': metadata
             })
@@ -693,28 +718,12 @@ class PdfToWordView(APIView):
             )
             
         finally:
-            # Clean up temp files
-            for file_path in temp_files:
-                try:
-                    if os.path.exists(file_path):
-                        os.unlink(file_path)
-                except Exception as e:
-                    logger.error(f"Error deleting temp file {file_path}: {str(e)}")
+            scratch.close()
 
 class PdfToHtmlView(APIView):
     """
     Asynchronous PDF to HTML conversion API with MinIO storage
     """
-    
-    def __init__(self):
-        # Initialize MinIO client
-        self.minio_client = Minio(
-            os.getenv('MINIO_ENDPOINT', 'minio:9000'),
-            access_key=os.getenv('MINIO_ACCESS_KEY', 'minioadmin'),
-            secret_key=os.getenv('MINIO_SECRET_KEY', 'minioadmin'),
-            secure=False  # Set to True if using HTTPS
-        )
-        self.bucket_name = os.getenv('MINIO_BUCKET_NAME', 'uploads')
 
     def post(self, request):
         if 'file' not in request.FILES:
@@ -730,6 +739,13 @@ class PdfToHtmlView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        output_mode = request.data.get('output_mode', 'single')
+        if output_mode not in ['single', 'paginated']:
+            return Response(
+                {'error': 'Invalid output mode'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         file_obj = request.FILES['file']
         
         try:
@@ -737,51 +753,70 @@ class PdfToHtmlView(APIView):
             if file_obj.size > 20 * 1024 * 1024:
                 raise ValidationError('File size exceeds 20MB limit')
             
+            metadata = {'output_mode': output_mode}
+            if output_mode == 'paginated':
+                try:
+                    pages_per_part = int(request.data.get(
+                        'pages_per_part', settings.PDF_TO_HTML_PAGES_PER_PART
+                    ))
+                except (TypeError, ValueError):
+                    raise ValidationError('pages_per_part must be an integer')
+                if not 1 <= pages_per_part <= 500:
+                    raise ValidationError('pages_per_part must be between 1 and 500')
+                metadata['pages_per_part'] = pages_per_part
+            
+            # Route by cost so long documents don't hold up short ones
+            try:
+                page_count = count_pages(file_obj)
+            except Exception:
+                raise ValidationError('Invalid PDF file')
+            queue = choose_queue(file_obj.size, page_count, conversion_type)
+            metadata['page_count'] = page_count
+            # Held against the admission budgets by the worker converting it
+            metadata['memory_estimate'] = admission.estimate_pdf_upload(file_obj, conversion_type)
+            
             # Generate paths
             task_id = str(uuid.uuid4())
             object_name = f"pdf-to-html/{task_id}/{file_obj.name}"
             
-            # Ensure bucket exists
-            if not self.minio_client.bucket_exists(self.bucket_name):
-                self.minio_client.make_bucket(self.bucket_name)
-            
             # Upload file to MinIO
-            self.minio_client.put_object(
-                self.bucket_name,
-                object_name,
-                file_obj,
-                length=file_obj.size,
-                content_type=file_obj.content_type
-            )
+            ensure_bucket()
+            put(transfer_storage(), file_obj, object_name)
             
             # Create task record
             task = FileConversion.objects.create(
                 task_id=task_id,
                 original_file=object_name,  # Store full MinIO path
                 conversion_type=conversion_type,
-                status='PENDING'
+                status='PENDING',
+                metadata=metadata,
+                queue=queue
             )
+            status_cache.write_status(task)
             
             # Start async conversion
             try:
-                convert_pdf_to_html_task.delay(task_id)
+                convert_pdf_to_html_task.apply_async((task_id,), queue=queue)
             except Exception as e:
                 logger.error(f"Failed to submit Celery task: {str(e)}")
                 task.status = 'FAILED'
                 task.error_message = 'Failed to queue conversion task'
                 task.save()
+                status_cache.write_status(task)
                 raise
             
             return Response({
                 'task_id': task_id,
                 'status': 'PENDING',
                 'conversion_type': conversion_type,
+                'output_mode': output_mode,
+                'queue': queue,
                 'status_url': f'/api/conversion-status/{task_id}/'
             }, status=status.HTTP_202_ACCEPTED)
             
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-        except S3Error as e:
+        except (BotoCoreError, ClientError) as e:
             logger.error(f"MinIO Error: {str(e)}")
             return Response(
                 {'error': 'Failed to upload file to storage'},
@@ -796,48 +831,85 @@ class PdfToHtmlView(APIView):
         
 class ConversionStatusView(APIView):
     """
-    API to check conversion status and get download URL from MinIO
+    API to check conversion status and get download URL from MinIO.
+    
+    Served from the Redis status cache that workers write through on each
+    status change; the database is only read when a job is not cached.
+    A batch's progress is counted from the cached statuses of its jobs.
     """
     
-    def __init__(self):
-        # Initialize MinIO client
-        self.minio_client = Minio(
-            os.getenv('MINIO_ENDPOINT', 'minio:9000'),
-            access_key=os.getenv('MINIO_ACCESS_KEY', 'minioadmin'),
-            secret_key=os.getenv('MINIO_SECRET_KEY', 'minioadmin'),
-            secure=False  # Set to True if using HTTPS
-        )
-        self.bucket_name = os.getenv('MINIO_BUCKET_NAME', 'uploads')
+    def download_url(self, object_name):
+        """Presigned URL for an object, reused while it stays valid"""
+        return status_cache.presigned_url(object_name, presign_get)
+    
+    def status_data(self, task_id):
+        """
+        Status of a job, with presigned URLs for its output once completed.
+        
+        Raises:
+            FileConversion.DoesNotExist: If there is no such job
+        """
+        snapshot = status_cache.read_status(task_id)
+        task = None
+        if snapshot is None:
+            task = FileConversion.objects.get(task_id=task_id)
+            snapshot = status_cache.fill_status(task)
+        metadata = json.loads(snapshot['metadata'])
+        converted_file = snapshot['converted_file']
+        
+        response_data = {
+            'task_id': task_id,
+            'status': snapshot['status'],
+            'conversion_type': snapshot['conversion_type'],
+            'created_at': snapshot['created_at'],
+            'updated_at': snapshot['updated_at']
+        }
+        if 'job_type' in metadata:
+            response_data['job_type'] = metadata['job_type']
+        if metadata.get('batch'):
+            job_ids = metadata.get('jobs')
+            statuses = status_cache.read_batch(task_id)
+            if job_ids is None or statuses is None or len(statuses) < len(job_ids):
+                # Not (fully) cached: read the jobs once and cache their statuses
+                task = task or FileConversion.objects.get(task_id=task_id)
+                children = task.children.order_by('id').values_list('task_id', 'status')
+                job_ids = [child_id for child_id, _ in children]
+                statuses = dict(children)
+                status_cache.seed_batch(task_id, statuses)
+            response_data['progress'] = status_cache.count_statuses(statuses)
+            response_data['jobs'] = [
+                {'task_id': child_id, 'status': statuses[child_id]} for child_id in job_ids
+            ]
+        
+        if snapshot['status'] == 'COMPLETED' and converted_file:
+            # Generate presigned URL for download
+            try:
+                download_url = self.download_url(converted_file)
+                response_data['download_url'] = download_url
+                if 'result' in metadata:
+                    response_data['result'] = metadata['result']
+                
+                if metadata.get('output_mode') == 'paginated':
+                    # converted_file is the manifest; parts sit beside it
+                    output_dir = os.path.dirname(converted_file)
+                    response_data['manifest_url'] = download_url
+                    response_data['index_url'] = self.download_url(f'{output_dir}/index.html')
+                    response_data['part_urls'] = [
+                        self.download_url(f'{output_dir}/{delivery.part_filename(index)}')
+                        for index in range(metadata.get('part_count', 0))
+                    ]
+            except (BotoCoreError, ClientError) as e:
+                logger.error(f"Failed to generate MinIO download URL: {str(e)}")
+                response_data['error'] = 'Failed to generate download URL'
+        
+        elif snapshot['status'] == 'FAILED':
+            response_data['error'] = snapshot['error_message']
+        
+        return response_data
     
     def get(self, request, task_id):
         try:
-            task = FileConversion.objects.get(task_id=task_id)
-            
-            response_data = {
-                'task_id': task_id,
-                'status': task.status,
-                'conversion_type': task.conversion_type,
-                'created_at': task.created_at,
-                'updated_at': task.updated_at
-            }
-            
-            if task.status == 'COMPLETED':
-                # Generate presigned URL for download
-                try:
-                    download_url = self.minio_client.presigned_get_object(
-                        self.bucket_name,
-                        task.converted_file.name,  # This should be the object path in MinIO
-                        expires=timedelta(hours=1)  # URL expires in 1 hour
-                    )
-                    response_data['download_url'] = download_url
-                except S3Error as e:
-                    logger.error(f"Failed to generate MinIO download URL: {str(e)}")
-                    response_data['error'] = 'Failed to generate download URL'
-            
-            elif task.status == 'FAILED':
-                response_data['error'] = task.error_message
-            
-            return Response(response_data)
+            return Response(self.status_data(task_id))
         
         except FileConversion.DoesNotExist:
             return Response(
@@ -849,4 +921,416 @@ class ConversionStatusView(APIView):
             return Response(
                 {'error': 'Failed to check conversion status'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+class ConversionEventsView(View):
+    """
+    Server-Sent Events stream of a job's progress.
+    
+    Relays the events workers publish to Redis (stage, page n of N) and
+    ends with the same payload as ConversionStatusView once the job
+    completes or fails. Clients reconnect automatically (EventSource) if
+    the stream is closed after PROGRESS_SSE_MAX_SECONDS.
+    """
+    
+    async def get(self, request, task_id):
+        if not await FileConversion.objects.filter(task_id=task_id).aexists():
+            return JsonResponse({'error': 'Task not found'}, status=404)
+        
+        response = StreamingHttpResponse(
+            self.stream(task_id), content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    async def stream(self, task_id):
+        client = aioredis.from_url(settings.PROGRESS_REDIS_URL)
+        pubsub = client.pubsub()
+        try:
+            # Subscribe before reading the current state so no event is missed
+            await pubsub.subscribe(progress.channel(task_id))
+            
+            task = await FileConversion.objects.aget(task_id=task_id)
+            if task.status in progress.TERMINAL_STATUSES:
+                yield await self.final_event(task_id)
+                return
+            
+            last_event = await client.get(progress.last_event_key(task_id))
+            if last_event:
+                yield self.event(last_event.decode())
+            
+            deadline = time.monotonic() + settings.PROGRESS_SSE_MAX_SECONDS
+            while time.monotonic() < deadline:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=settings.PROGRESS_SSE_HEARTBEAT
+                )
+                if message is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                
+                data = message['data'].decode()
+                if json.loads(data).get('status') in progress.TERMINAL_STATUSES:
+                    yield await self.final_event(task_id)
+                    return
+                yield self.event(data)
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+    
+    async def final_event(self, task_id):
+        """Full status payload, with download URLs, closing the stream"""
+        data = await sync_to_async(ConversionStatusView().status_data)(task_id)
+        return self.event(json.dumps(data, cls=DjangoJSONEncoder))
+    
+    def event(self, data):
+        return f'data: {data}\n\n'
+
+class HtmlImageView(View):
+    """
+    Stable address of an image extracted into HTML output (see
+    PDF_TO_HTML_IMAGE_BASE_URL): redirects to a presigned URL, so
+    documents keep showing their images after any one signature expires.
+    """
+    
+    def get(self, request, name):
+        if not delivery.HTML_IMAGE_NAME.fullmatch(name):
+            return JsonResponse({'error': 'Image not found'}, status=404)
+        return HttpResponseRedirect(delivery.html_image_url(name))
+
+class HtmlPartView(View):
+    """
+    Address of a part of paginated HTML output, framed by its index (see
+    PDF_TO_HTML_PART_BASE_URL): redirects to a presigned URL, as the
+    bucket serves nothing unsigned.
+    """
+    
+    def get(self, request, task_id, name):
+        if not delivery.HTML_PART_NAME.fullmatch(name):
+            return JsonResponse({'error': 'Part not found'}, status=404)
+        return HttpResponseRedirect(delivery.html_part_url(task_id, name))
+
+class AsyncUploadView(View):
+    """
+    Async front of a synchronous upload view, ``sync_view``, for ASGI.
+    
+    The ASGI server receives the request body before the view runs, without
+    holding a thread, so a slow upload only costs a connection. Once it has
+    arrived the wrapped view parses it, converts and builds its response in
+    a worker process of the conversion executor (see offload.py), which
+    bounds how many run at once. Answers 429 with Retry-After when the
+    executor's queue is full.
+    """
+    
+    sync_view = None
+    
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # CSRF is left to the wrapped DRF view, as for its synchronous route
+        return csrf_exempt(super().as_view(**initkwargs))
+    
+    async def post(self, request, *args, **kwargs):
+        try:
+            return await offload.run_view(self.sync_view, request, *args, **kwargs)
+        except offload.OffloadRejected as e:
+            logger.warning(f"Rejected {request.path}: {str(e)}")
+            return JsonResponse(
+                {'error': 'Server is busy with other conversions, please retry shortly'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(e.retry_after)}
+            )
+
+class ConversionExecutorView(View):
+    """Queue depth of this process's conversion executor (see offload.py)"""
+    
+    async def get(self, request):
+        return JsonResponse(offload.executor.stats())
+
+def submit_job(task):
+    """Save and enqueue a job built by jobs.build_job; 202 with where to follow it"""
+    task.save()
+    status_cache.write_status(task)
+    try:
+        enqueue_job(task)
+    except Exception as e:
+        logger.error(f"Failed to submit Celery task: {str(e)}")
+        task.status = 'FAILED'
+        task.error_message = 'Failed to queue conversion task'
+        task.save()
+        status_cache.write_status(task)
+        raise
+    
+    return Response({
+        'task_id': task.task_id,
+        'status': 'PENDING',
+        'job_type': task.metadata['job_type'],
+        'conversion_type': task.conversion_type,
+        'queue': task.queue,
+        'status_url': f'/api/jobs/{task.task_id}/'
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+def upload_entries(data):
+    """
+    The ``uploads`` of a request: a list in JSON bodies, or a JSON string
+    alongside files in multipart forms.
+    """
+    entries = data.get('uploads') or []
+    if isinstance(entries, str):
+        try:
+            entries = json.loads(entries)
+        except ValueError:
+            raise ValidationError('uploads must be a JSON list')
+    if not isinstance(entries, list):
+        raise ValidationError('uploads must be a JSON list')
+    return entries
+
+
+class JobView(APIView):
+    """
+    Submit any conversion as an asynchronous job.
+    
+    POST multipart data with ``conversion_type`` (a key of jobs.JOB_TYPES),
+    the input in ``file`` (or several in ``files`` for image to PDF types)
+    and any type-specific parameters. Returns a task id whose progress and
+    result are read from the shared status endpoint.
+    """
+    
+    def post(self, request):
+        file_objs = request.FILES.getlist('files') or request.FILES.getlist('file')
+        if not file_objs:
+            return Response(
+                {'error': 'No file uploaded'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            job_type = request.data.get('conversion_type')
+            spec = get_job_spec(job_type)
+            
+            if len(file_objs) > 1 and not spec.multiple:
+                raise ValidationError(f'{job_type} accepts a single file')
+            for file_obj in file_objs:
+                validate_upload(spec, file_obj)
+            
+            params = spec.parse_params(request.data)
+            
+            if '.pdf' in spec.extensions:
+                try:
+                    page_count = count_pages(file_objs[0])
+                except Exception:
+                    raise ValidationError('Invalid PDF file')
+            else:
+                page_count = len(file_objs)
+            
+            task_id = str(uuid.uuid4())
+            storage = transfer_storage()
+            inputs = [
+                {
+                    'key': put(storage, file_obj, f'jobs/{task_id}/{index:03d}_{file_obj.name}'),
+                    'name': file_obj.name
+                }
+                for index, file_obj in enumerate(file_objs)
+            ]
+            
+            task = build_job(
+                task_id, spec, params, inputs, sum(f.size for f in file_objs), page_count
+            )
+            return submit_job(task)
+            
+        except ValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Job submission failed: {str(e)}", exc_info=True)
+            return Response(
+                {'error': 'Failed to submit conversion job'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class BatchJobView(APIView):
+    """
+    Submit many conversions of one type in a single request.
+    
+    Inputs come from uploaded ``files`` and/or direct ``uploads`` (as for
+    DirectUploadCompleteView, a JSON string in multipart forms); each
+    becomes a child job of one parent job. ``archive=true`` zips all
+    outputs once the batch finishes. Progress is reported on the parent's
+    status endpoint.
+    """
+    
+    def post(self, request):
+        file_objs = request.FILES.getlist('files')
+        
+        try:
+            entries = upload_entries(request.data)
+            if not file_objs and not entries:
+                raise ValidationError('No files or uploads given')
+            if len(file_objs) + len(entries) > settings.BATCH_MAX_FILES:
+                raise ValidationError(f'A batch may contain at most {settings.BATCH_MAX_FILES} files')
+            
+            job_type = request.data.get('conversion_type')
+            spec = get_job_spec(job_type)
+            params = spec.parse_params(request.data)
+            archive = str(request.data.get('archive', 'false')).lower() == 'true'
+            
+            storage = transfer_storage()
+            parent_id = str(uuid.uuid4())
+            
+            # Validate every uploaded file before storing any input
+            page_counts = []
+            for file_obj in file_objs:
+                validate_upload(spec, file_obj)
+                if '.pdf' in spec.extensions:
+                    try:
+                        page_counts.append(count_pages(file_obj))
+                    except Exception:
+                        raise ValidationError(f'Invalid PDF file: {file_obj.name}')
+                else:
+                    page_counts.append(1)
+            
+            children = []
+            for upload_input, size in complete_uploads(spec, entries):
+                # PDF pages are counted by the worker (see tasks._settle_page_count)
+                page_count = 0 if '.pdf' in spec.extensions else 1
+                children.append(build_job(
+                    str(uuid.uuid4()), spec, params, [upload_input], size, page_count
+                ))
+            for index, (file_obj, page_count) in enumerate(zip(file_objs, page_counts)):
+                inputs = [{
+                    'key': put(storage, file_obj, f'jobs/{parent_id}/{index:03d}_{file_obj.name}'),
+                    'name': file_obj.name
+                }]
+                children.append(build_job(
+                    str(uuid.uuid4()), spec, params, inputs, file_obj.size, page_count
+                ))
+            
+            parent = FileConversion.objects.create(
+                task_id=parent_id,
+                original_file='',
+                conversion_type=job_type,
+                status='PROCESSING',
+                metadata={
+                    'job_type': job_type,
+                    'batch': True,
+                    'archive': archive,
+                    'total': len(children),
+                    'jobs': [child.task_id for child in children]
+                }
+            )
+            for child in children:
+                child.parent = parent
+                child.metadata['batch_id'] = parent_id
+            children = FileConversion.objects.bulk_create(children)
+            status_cache.write_status(parent)
+            status_cache.seed_batch(parent_id, {child.task_id: child.status for child in children})
+            
+            try:
+                enqueue_batch(parent, children)
+            except Exception as e:
+                logger.error(f"Failed to submit Celery batch: {str(e)}")
+                parent.children.update(status='FAILED', error_message='Failed to queue conversion task')
+                parent.status = 'FAILED'
+                parent.error_message = 'Failed to queue conversion tasks'
+                parent.save()
+                status_cache.invalidate_status(parent_id)
+                raise
+            
+            return Response({
+                'task_id': parent_id,
+                'status': 'PROCESSING',
+                'job_type': job_type,
+                'total': len(children),
+                'jobs': [child.task_id for child in children],
+                'status_url': f'/api/jobs/{parent_id}/'
+            }, status=status.HTTP_202_ACCEPTED)
+            
+        except ValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Batch submission failed: {str(e)}", exc_info=True)
+            return Response(
+                {'error': 'Failed to submit batch'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+
+class DirectUploadView(APIView):
+    """
+    Upload inputs straight to object storage instead of through Django.
+    
+    POST ``filename`` and ``size`` (and optionally ``content_type``) to
+    start a multipart upload. The response lists a presigned URL per part;
+    the client PUTs each ``part_size`` slice of the file to its URL and
+    keeps the ETag header of each response for DirectUploadCompleteView.
+    DELETE with ``key`` and ``upload_id`` abandons an upload.
+    """
+    
+    def post(self, request):
+        try:
+            try:
+                size = int(request.data.get('size'))
+            except (TypeError, ValueError):
+                raise ValidationError('size must be a positive number of bytes')
+            upload = uploads.start_upload(
+                request.data.get('filename', ''), size, request.data.get('content_type')
+            )
+            return Response(upload, status=status.HTTP_201_CREATED)
+        
+        except ValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Starting direct upload failed: {str(e)}", exc_info=True)
+            return Response(
+                {'error': 'Failed to start upload'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    
+    def delete(self, request):
+        try:
+            uploads.abort_upload(request.data.get('key', ''), request.data.get('upload_id', ''))
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except ValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class DirectUploadCompleteView(APIView):
+    """
+    Finish direct uploads and submit them as one job.
+    
+    POST JSON with ``conversion_type``, any type-specific parameters and
+    ``uploads``: for each input file, its ``key``, ``upload_id`` and the
+    ``parts`` (``part_number`` and ``etag``) it was sent as. Answers like
+    JobView once the uploads are assembled in storage.
+    """
+    
+    def post(self, request):
+        try:
+            job_type = request.data.get('conversion_type')
+            spec = get_job_spec(job_type)
+            params = spec.parse_params(request.data)
+            
+            entries = upload_entries(request.data)
+            if not entries:
+                raise ValidationError('No uploads given')
+            if len(entries) > 1 and not spec.multiple:
+                raise ValidationError(f'{job_type} accepts a single file')
+            
+            completed = complete_uploads(spec, entries)
+            inputs = [upload_input for upload_input, _ in completed]
+            size = sum(upload_size for _, upload_size in completed)
+            
+            # PDF pages are counted by the worker once it has the input,
+            # which re-routes the job if it needs to (see tasks._settle_page_count)
+            page_count = 0 if '.pdf' in spec.extensions else len(inputs)
+            task = build_job(str(uuid.uuid4()), spec, params, inputs, size, page_count)
+            return submit_job(task)
+            
+        except ValidationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.error(f"Completing direct upload failed: {str(e)}", exc_info=True)
+            return Response(
+                {'error': 'Failed to submit conversion job'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
@@ -0,0 +1,94 @@
+# warmup.py
+import logging
+import time
+import fitz  # PyMuPDF
+from PIL import Image
+from django.conf import settings
+from . import converters
+from .jobs import JOB_HANDLERS, JOB_TYPES, PDF_TO_HTML
+from .scratch import scratch_dir
+
+logger = logging.getLogger(__name__)
+
+
+def _write_sample_pdf(path):
+    """One page with a heading, body text in two fonts and a small image"""
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=200)
+    page.insert_text((20, 30), "Warm-up sample", fontsize=16, fontname="hebo")
+    page.insert_text((20, 55), "Body text for the conversion engines.", fontsize=10, fontname="helv")
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), False)
+    pix.set_rect(pix.irect, (40, 120, 200))
+    page.insert_image(fitz.Rect(20, 70, 60, 110), pixmap=pix)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _write_sample_image(path, image_format):
+    Image.new('RGB', (16, 16), (40, 120, 200)).save(path, format=image_format)
+    return path
+
+
+def warm_up(work_dir):
+    """
+    Load every conversion engine and run each conversion type once on a
+    tiny generated document inside ``work_dir``. Returns the seconds each
+    conversion type took, keyed by job type (PDF to HTML by HTML mode).
+    """
+    samples = {
+        '.pdf': _write_sample_pdf(work_dir / 'sample.pdf'),
+        '.jpg': _write_sample_image(work_dir / 'sample.jpg', 'JPEG'),
+        '.png': _write_sample_image(work_dir / 'sample.png', 'PNG'),
+    }
+    timings = {}
+
+    for name, run in JOB_HANDLERS.items():
+        spec = JOB_TYPES[name]
+        output_dir = work_dir / name
+        output_dir.mkdir()
+        started = time.perf_counter()
+        run([str(samples[spec.extensions[0]])], str(output_dir), 'sample', spec.parse_params({}))
+        timings[name] = time.perf_counter() - started
+
+    # python-docx text extraction, the other PDF to Word path
+    started = time.perf_counter()
+    converters.PdfToWordConverter().convert_pdf_to_word(
+        str(samples['.pdf']), str(work_dir / 'sample-text.docx'), preserve_graphics=False
+    )
+    timings['pdf2word'] += time.perf_counter() - started
+
+    for mode in ('formatted', 'clean'):
+        started = time.perf_counter()
+        converter = converters.PdfToHtmlConverter(None, pdf_path=str(samples['.pdf']), work_dir=work_dir)
+        if mode == 'formatted':
+            converter.convert_to_formatted_html()
+        else:
+            converter.convert_to_clean_text()
+        timings[f'{PDF_TO_HTML}:{mode}'] = time.perf_counter() - started
+
+    return timings
+
+
+def warm_up_worker_process(**kwargs):
+    """
+    Warm each new worker child before it takes its first task, so jobs
+    after a scale-up or child recycle don't pay for loading the engines.
+    A failed warm-up is logged and the child starts cold. Connected to
+    worker_process_init in tasks.py.
+    """
+    if not settings.CONVERSION_WORKER_WARMUP:
+        return
+
+    started = time.perf_counter()
+    try:
+        with scratch_dir('warmup') as work_dir:
+            timings = warm_up(work_dir)
+    except Exception as e:
+        logger.error(f"Worker warm-up failed: {str(e)}", exc_info=True)
+        return
+
+    # One parseable metric line per child: total seconds, then each conversion type
+    total = time.perf_counter() - started
+    details = ' '.join(f'{name}={seconds:.3f}' for name, seconds in timings.items())
+    logger.info(f"Worker warm-up done: worker_warmup_seconds={total:.3f} {details}")
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -162,9 +163,23 @@ CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+# Conversions are routed to 'small', 'large' or 'heavy' by estimated cost
+# (see app/jpgpdfpngconverter/routing.py); anything unrouted runs as small
+CELERY_TASK_DEFAULT_QUEUE = 'small'
+# Acknowledge tasks only once they finish, so a task whose worker is killed
+# (OOM, deploy) is redelivered instead of lost; the visibility timeout is how
+# long Redis waits for an unacknowledged task before redelivering it
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'visibility_timeout': int(os.environ.get('CELERY_VISIBILITY_TIMEOUT', 3600))
+}
 
 # File Storage Configuration
-DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
+STORAGES = {
+    'default': {'BACKEND': 'storages.backends.s3boto3.S3Boto3Storage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
 
 if USE_PROD_SERVICES:
     # Production S3 configuration
@@ -191,3 +206,202 @@ else:
     # The endpoint URL for your local MinIO container
     AWS_S3_ENDPOINT_URL = 'http://minio:9000'  # internal Docker network
     AWS_S3_USE_SSL = False
+
+# PDF to HTML conversion
+# Word extraction engine for clean-text HTML: 'pdfplumber' or 'pymupdf'
+PDF_TO_HTML_CLEAN_ENGINE = os.environ.get('PDF_TO_HTML_CLEAN_ENGINE', 'pdfplumber')
+# Documents with more pages than this are converted as page shards fanned
+# out across Celery workers and stitched back together
+PDF_TO_HTML_SHARD_PAGES = int(os.environ.get('PDF_TO_HTML_SHARD_PAGES', 100))
+# Default page count per file for paginated ('output_mode=paginated') output
+PDF_TO_HTML_PAGES_PER_PART = int(os.environ.get('PDF_TO_HTML_PAGES_PER_PART', 25))
+# Store images found in formatted output once each, keyed by content hash
+PDF_TO_HTML_EXTRACT_IMAGES = os.environ.get('PDF_TO_HTML_EXTRACT_IMAGES', 'true').lower() == 'true'
+# Threads re-encoding and uploading extracted images per conversion
+PDF_TO_HTML_IMAGE_WORKERS = int(os.environ.get('PDF_TO_HTML_IMAGE_WORKERS', 4))
+# Prefix of the image URLs written into HTML output, followed by each image's
+# path under html-images/. The default is the app's image endpoint, which
+# redirects to a freshly presigned URL on every load; a public or CDN URL
+# serving the html-images/ prefix of the bucket works as well
+PDF_TO_HTML_IMAGE_BASE_URL = os.environ.get(
+    'PDF_TO_HTML_IMAGE_BASE_URL', 'http://localhost:8000/api/html-images/'
+)
+# Prefix of the part URLs in the index of paginated output, followed by
+# <task_id>/<part file>. The default is the app's part endpoint, which
+# redirects to a presigned URL, as the bucket serves nothing unsigned
+PDF_TO_HTML_PART_BASE_URL = os.environ.get(
+    'PDF_TO_HTML_PART_BASE_URL', 'http://localhost:8000/api/html-parts/'
+)
+
+# Object storage
+# Read/write size for streaming objects to and from local scratch files
+STORAGE_TRANSFER_CHUNK_SIZE = int(os.environ.get('STORAGE_TRANSFER_CHUNK_SIZE', 1024 * 1024))
+# Files larger than this are uploaded/downloaded as concurrent multipart parts
+STORAGE_MULTIPART_THRESHOLD = int(os.environ.get('STORAGE_MULTIPART_THRESHOLD', 16 * 1024 * 1024))
+STORAGE_MULTIPART_CHUNK_SIZE = int(os.environ.get('STORAGE_MULTIPART_CHUNK_SIZE', 16 * 1024 * 1024))
+STORAGE_TRANSFER_CONCURRENCY = int(os.environ.get('STORAGE_TRANSFER_CONCURRENCY', 4))
+# One storage client per process: its connection pool, timeouts and attempts
+# per request (retried with exponential backoff on throttling and network errors)
+STORAGE_MAX_POOL_CONNECTIONS = int(os.environ.get('STORAGE_MAX_POOL_CONNECTIONS', 32))
+STORAGE_CONNECT_TIMEOUT = int(os.environ.get('STORAGE_CONNECT_TIMEOUT', 5))
+STORAGE_READ_TIMEOUT = int(os.environ.get('STORAGE_READ_TIMEOUT', 60))
+STORAGE_MAX_ATTEMPTS = int(os.environ.get('STORAGE_MAX_ATTEMPTS', 5))
+
+# Conversion queue routing
+# Page count weight per conversion type when estimating a job's cost
+CONVERSION_PAGE_WEIGHTS = {'formatted': 2, 'clean': 1, 'pdf2word': 4}
+# Jobs above either weighted-page or byte threshold go to the 'large' queue...
+CONVERSION_LARGE_PAGES = int(os.environ.get('CONVERSION_LARGE_PAGES', 20))
+CONVERSION_LARGE_BYTES = int(os.environ.get('CONVERSION_LARGE_BYTES', 2 * 1024 * 1024))
+# ...and above these to the 'heavy' queue
+CONVERSION_HEAVY_PAGES = int(os.environ.get('CONVERSION_HEAVY_PAGES', 200))
+CONVERSION_HEAVY_BYTES = int(os.environ.get('CONVERSION_HEAVY_BYTES', 10 * 1024 * 1024))
+
+# Batch jobs
+# Most files accepted by one batch request
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 500))
+# Seconds between checks for batch jobs still running when the group returns
+BATCH_POLL_SECONDS = int(os.environ.get('BATCH_POLL_SECONDS', 10))
+
+# Conversion progress events
+# Redis used for progress pub/sub (the Celery broker by default)
+PROGRESS_REDIS_URL = os.environ.get('PROGRESS_REDIS_URL', CELERY_BROKER_URL)
+# Seconds the latest event of a job is kept for late subscribers
+PROGRESS_EVENT_TTL = int(os.environ.get('PROGRESS_EVENT_TTL', 3600))
+# Seconds between keep-alive comments on idle event streams, and the
+# longest a single stream stays open before the client reconnects
+PROGRESS_SSE_HEARTBEAT = int(os.environ.get('PROGRESS_SSE_HEARTBEAT', 15))
+PROGRESS_SSE_MAX_SECONDS = int(os.environ.get('PROGRESS_SSE_MAX_SECONDS', 600))
+
+# Job status cache
+# Seconds a job's status snapshot stays cached in Redis after its last change
+STATUS_CACHE_TTL = int(os.environ.get('STATUS_CACHE_TTL', 86400))
+# Lifetime of presigned download URLs, reused until the refresh margin before expiry
+PRESIGNED_URL_EXPIRY = int(os.environ.get('PRESIGNED_URL_EXPIRY', 3600))
+PRESIGNED_URL_REFRESH_MARGIN = int(os.environ.get('PRESIGNED_URL_REFRESH_MARGIN', 300))
+
+# Conversion retries and recovery
+# Attempts per job across retries, redeliveries and requeues; transient
+# errors are retried after CONVERSION_RETRY_BACKOFF seconds, doubling each time
+CONVERSION_MAX_ATTEMPTS = int(os.environ.get('CONVERSION_MAX_ATTEMPTS', 3))
+CONVERSION_RETRY_BACKOFF = int(os.environ.get('CONVERSION_RETRY_BACKOFF', 30))
+# PROCESSING jobs without a heartbeat (recorded progress) for this long are
+# put back in the queue by the reaper, which celery beat runs every
+# CONVERSION_REAPER_INTERVAL seconds
+CONVERSION_STALE_SECONDS = int(os.environ.get('CONVERSION_STALE_SECONDS', 1800))
+CONVERSION_REAPER_INTERVAL = int(os.environ.get('CONVERSION_REAPER_INTERVAL', 300))
+# Hard limit on one task's run, after which its worker child is killed. It is
+# below CONVERSION_STALE_SECONDS so the reaper never requeues a job still
+# running, and with ADMISSION_WORKER_WAIT_SECONDS it must stay below the
+# visibility timeout, or a task still running is delivered to a second worker
+CONVERSION_TIME_LIMIT = int(os.environ.get('CONVERSION_TIME_LIMIT', 1500))
+CELERY_TASK_TIME_LIMIT = CONVERSION_TIME_LIMIT
+CELERY_BEAT_SCHEDULE = {
+    'requeue-stale-jobs': {
+        'task': 'app.jpgpdfpngconverter.tasks.requeue_stale_jobs',
+        'schedule': CONVERSION_REAPER_INTERVAL,
+    },
+}
+
+# Worker warm-up
+# Each new worker child loads the conversion engines and converts a tiny
+# sample of every type before its first task; the child only reports ready
+# once that is done, hence the longer startup timeout
+CONVERSION_WORKER_WARMUP = os.environ.get('CONVERSION_WORKER_WARMUP', 'true').lower() == 'true'
+CELERY_WORKER_PROC_ALIVE_TIMEOUT = int(os.environ.get('CELERY_WORKER_PROC_ALIVE_TIMEOUT', 60))
+
+# Memory admission control
+# Conversions are admitted while their estimated peak memory fits both the
+# budget of their process and the budget shared by all processes through
+# Redis (0 disables the shared budget)
+ADMISSION_PROCESS_BUDGET = int(os.environ.get('ADMISSION_PROCESS_BUDGET', 2 * 1024 * 1024 * 1024))
+ADMISSION_CLUSTER_BUDGET = int(os.environ.get('ADMISSION_CLUSTER_BUDGET', 8 * 1024 * 1024 * 1024))
+# Estimate inputs: a fixed base per conversion plus a cost per page by conversion type
+ADMISSION_BASE_BYTES = int(os.environ.get('ADMISSION_BASE_BYTES', 32 * 1024 * 1024))
+ADMISSION_DEFAULT_PAGE_BYTES = int(os.environ.get('ADMISSION_DEFAULT_PAGE_BYTES', 256 * 1024))
+ADMISSION_PAGE_BYTES = {
+    'pdf2word': 8 * 1024 * 1024,
+    'formatted': 2 * 1024 * 1024,
+    'clean': 512 * 1024,
+}
+# Synchronous views wait this long for memory before answering 429 with
+# Retry-After; workers wait ADMISSION_WORKER_WAIT_SECONDS before retrying
+# the task ADMISSION_RETRY_AFTER seconds later
+ADMISSION_QUEUE_SECONDS = int(os.environ.get('ADMISSION_QUEUE_SECONDS', 10))
+ADMISSION_WORKER_WAIT_SECONDS = int(os.environ.get('ADMISSION_WORKER_WAIT_SECONDS', 300))
+ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 5))
+# Shared reservations lapse after this long unless renewed by their process,
+# in case it died
+ADMISSION_LEASE_SECONDS = int(os.environ.get('ADMISSION_LEASE_SECONDS', 1800))
+
+# Direct uploads
+# Clients upload large inputs straight to storage through presigned multipart
+# URLs, signed for the storage endpoint they can reach
+DIRECT_UPLOAD_ENDPOINT_URL = os.environ.get('DIRECT_UPLOAD_ENDPOINT_URL', AWS_S3_ENDPOINT_URL)
+DIRECT_UPLOAD_MAX_BYTES = int(os.environ.get('DIRECT_UPLOAD_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+DIRECT_UPLOAD_PART_SIZE = int(os.environ.get('DIRECT_UPLOAD_PART_SIZE', 16 * 1024 * 1024))
+DIRECT_UPLOAD_URL_EXPIRY = int(os.environ.get('DIRECT_UPLOAD_URL_EXPIRY', 3600))
+
+# Upload ingestion
+# The synchronous views write each upload once, to local scratch. For the
+# conversion types listed, the original then moves to INGEST_OUTBOX_DIR under
+# MEDIA_ROOT (shared with the workers) and a worker archives it to the key
+# reserved in the record, trying up to INGEST_ARCHIVE_ATTEMPTS times; the
+# response reports it as archiving meanwhile. False stores originals through
+# the model as before
+INGEST_SINGLE_WRITE = os.environ.get('INGEST_SINGLE_WRITE', 'true').lower() == 'true'
+INGEST_ARCHIVE_TYPES = set(filter(None, os.environ.get(
+    'INGEST_ARCHIVE_TYPES', 'pdf2jpg,jpg2pdf,png2pdf,pdf2png,pdf2webp'
+).split(',')))
+INGEST_OUTBOX_DIR = 'ingest'
+INGEST_ARCHIVE_ATTEMPTS = int(os.environ.get('INGEST_ARCHIVE_ATTEMPTS', 5))
+
+# Output delivery
+# Conversion outputs are uploaded to object storage and downloaded straight
+# from it through presigned URLs (which serve range requests), signed for the
+# storage endpoint clients can reach
+DELIVERY_ENDPOINT_URL = os.environ.get('DELIVERY_ENDPOINT_URL', DIRECT_UPLOAD_ENDPOINT_URL)
+
+# Retention
+# Celery beat sweeps these directories under MEDIA_ROOT (shared by the web and
+# worker containers) every RETENTION_SWEEP_INTERVAL seconds. Each maps to
+# (TTL seconds, quota bytes): entries unused for the TTL are removed, then the
+# least recently used until the directory fits its quota. Entries changed in
+# the last RETENTION_MIN_AGE seconds are never removed, as requests may hold them
+INGEST_OUTBOX_TTL = int(os.environ.get('INGEST_OUTBOX_TTL', 86400))
+INGEST_OUTBOX_QUOTA_BYTES = int(os.environ.get('INGEST_OUTBOX_QUOTA_BYTES', 10 * 1024 * 1024 * 1024))
+RETENTION_DIRECTORIES = {
+    # Originals left behind by archive tasks that never ran
+    INGEST_OUTBOX_DIR: (INGEST_OUTBOX_TTL, INGEST_OUTBOX_QUOTA_BYTES),
+}
+RETENTION_MIN_AGE = int(os.environ.get('RETENTION_MIN_AGE', 900))
+RETENTION_SWEEP_INTERVAL = int(os.environ.get('RETENTION_SWEEP_INTERVAL', 600))
+CELERY_BEAT_SCHEDULE['sweep-media'] = {
+    'task': 'app.jpgpdfpngconverter.tasks.sweep_media',
+    'schedule': RETENTION_SWEEP_INTERVAL,
+}
+
+# Scratch space
+# Root of every job's intermediate files; point it at fast local storage (a
+# tmpfs or NVMe mount) to keep scratch I/O off the shared media volume. Each
+# job gets its own directory there, failing once it holds more than the quota.
+# SCRATCH_ROOT is local to each node, so rather than beat, every process using
+# it sweeps it: at startup, directories left by exited processes are removed;
+# then every SCRATCH_SWEEP_INTERVAL seconds, anything no running job holds is
+# removed once unused for SCRATCH_TTL, or least recently used first while the
+# root holds more than SCRATCH_QUOTA_BYTES
+SCRATCH_ROOT = os.environ.get('SCRATCH_ROOT', os.path.join(tempfile.gettempdir(), 'conversion-scratch'))
+SCRATCH_JOB_QUOTA_BYTES = int(os.environ.get('SCRATCH_JOB_QUOTA_BYTES', 2 * 1024 * 1024 * 1024))
+SCRATCH_TTL = int(os.environ.get('SCRATCH_TTL', 3600))
+SCRATCH_QUOTA_BYTES = int(os.environ.get('SCRATCH_QUOTA_BYTES', 10 * 1024 * 1024 * 1024))
+SCRATCH_SWEEP_INTERVAL = int(os.environ.get('SCRATCH_SWEEP_INTERVAL', RETENTION_SWEEP_INTERVAL))
+
+# Async upload views
+# The /api/async/ endpoints take uploads on the event loop (the ASGI server
+# receives the body before the view runs) and run conversions on a pool of
+# ASYNC_CONVERSION_WORKERS worker processes per web process. Up to
+# ASYNC_CONVERSION_QUEUE more wait for a worker; beyond that requests get 429
+# with Retry-After
+ASYNC_CONVERSION_WORKERS = int(os.environ.get('ASYNC_CONVERSION_WORKERS', 4))
+ASYNC_CONVERSION_QUEUE = int(os.environ.get('ASYNC_CONVERSION_QUEUE', 16))
+ASYNC_CONVERSION_RETRY_AFTER = int(os.environ.get('ASYNC_CONVERSION_RETRY_AFTER', 5))
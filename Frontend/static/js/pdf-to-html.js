@@ -3,6 +3,7 @@ document.addEventListener('DOMContentLoaded', function() {
     const BACKEND_URL = 'http://127.0.0.1:8000'; // Match your Django server
     const API_ENDPOINT = `${BACKEND_URL}/api/pdf-to-html/`;
     const STATUS_ENDPOINT = `${BACKEND_URL}/api/conversion-status/`;
+    const EVENTS_ENDPOINT = `${BACKEND_URL}/api/conversion-events/`;
 
     // DOM Elements
     const fileInput = document.getElementById('pdf-file');
@@ -15,6 +16,7 @@ document.addEventListener('DOMContentLoaded', function() {
     // State
     let currentTaskId = null;
     let pollInterval = null;
+    let eventSource = null;
 
     // Utility Functions
     const getCookie = (name) => {
@@ -81,6 +83,43 @@ document.addEventListener('DOMContentLoaded', function() {
         return true;
     };
 
+    const stopWatching = () => {
+        if (pollInterval) {
+            clearInterval(pollInterval);
+            pollInterval = null;
+        }
+        if (eventSource) {
+            eventSource.close();
+            eventSource = null;
+        }
+    };
+
+    // Returns true once the conversion has finished either way
+    const handleConversionStatus = (data) => {
+        if (data.status === 'COMPLETED') {
+            stopWatching();
+            showStatus('success', 'Conversion completed!');
+            showDownloadButton(data);
+            return true;
+        }
+        if (data.status === 'FAILED') {
+            stopWatching();
+            showStatus('error', `Conversion failed: ${data.error || 'Unknown error'}`);
+            resetConvertButton();
+            return true;
+        }
+        return false;
+    };
+
+    const showProgress = (event) => {
+        if (event.stage === 'converting' && event.pages) {
+            showStatus('loading', `Converting page ${event.page} of ${event.pages}...`);
+        } else if (event.stage) {
+            const stage = event.stage.charAt(0).toUpperCase() + event.stage.slice(1);
+            showStatus('loading', `${stage}...`);
+        }
+    };
+
     const pollConversionStatus = async (taskId) => {
         try {
             const response = await fetch(`${STATUS_ENDPOINT}${taskId}/`);
@@ -90,19 +129,11 @@ document.addEventListener('DOMContentLoaded', function() {
             
             const data = await response.json();
             
-            if (data.status === 'COMPLETED') {
-                clearInterval(pollInterval);
-                showStatus('success', 'Conversion completed!');
-                showDownloadButton(data);
-            } else if (data.status === 'FAILED') {
-                clearInterval(pollInterval);
-                showStatus('error', `Conversion failed: ${data.error || 'Unknown error'}`);
-                resetConvertButton();
-            }
             // If still processing, do nothing - we'll check again
+            handleConversionStatus(data);
         } catch (error) {
             console.error('Error polling status:', error);
-            clearInterval(pollInterval);
+            stopWatching();
             showStatus('error', 'Failed to check conversion status');
             resetConvertButton();
         }
@@ -167,14 +198,36 @@ document.addEventListener('DOMContentLoaded', function() {
 
     const startConversionPolling = (taskId) => {
         // Clear any existing polling
-        if (pollInterval) {
-            clearInterval(pollInterval);
-        }
+        stopWatching();
         
         // Start new polling every 2 seconds
         pollInterval = setInterval(() => pollConversionStatus(taskId), 2000);
     };
 
+    const watchConversion = (taskId) => {
+        stopWatching();
+        
+        if (!window.EventSource) {
+            startConversionPolling(taskId);
+            return;
+        }
+        
+        // Progress is pushed by the server; the browser reconnects on its own
+        // if the stream drops, so only fall back to polling if it can't open
+        eventSource = new EventSource(`${EVENTS_ENDPOINT}${taskId}/`);
+        eventSource.onmessage = (message) => {
+            const data = JSON.parse(message.data);
+            if (!handleConversionStatus(data)) {
+                showProgress(data);
+            }
+        };
+        eventSource.onerror = () => {
+            if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+                startConversionPolling(taskId);
+            }
+        };
+    };
+
     // Event Listeners
     fileInput.addEventListener('change', (e) => {
         if (e.target.files.length > 0) {
@@ -226,7 +279,7 @@ document.addEventListener('DOMContentLoaded', function() {
             currentTaskId = data.task_id;
             
             showStatus('loading', 'Conversion in progress...');
-            startConversionPolling(currentTaskId);
+            watchConversion(currentTaskId);
 
         } catch (error) {
             console.error('Conversion error:', error);
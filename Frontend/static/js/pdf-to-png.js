@@ -94,6 +94,8 @@ document.addEventListener('DOMContentLoaded', function() {
     };
 
     const constructDownloadUrl = (filePath) => {
+        // Presigned storage URLs are used as they are
+        if (/^https?:\/\//.test(filePath)) return filePath;
         // Remove any existing domain or double slashes
         const cleanPath = filePath.replace(/^(https?:\/\/[^/]+)?\/?/, '');
         return `${BACKEND_URL}/${cleanPath}`;
@@ -119,7 +121,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
             // Extract filename from path (format: "converted_files/{id}_{original_name}.png")
             let fileName = 'converted.png';
-            const pathParts = filePath.split('/');
+            const pathParts = decodeURIComponent(filePath.split('?')[0]).split('/');
             if (pathParts.length > 0) {
                 const lastPart = pathParts[pathParts.length - 1];
                 // Remove the ID prefix (format: "123_filename.png")
@@ -79,6 +79,8 @@ document.addEventListener('DOMContentLoaded', function() {
     };
 
     const constructDownloadUrl = (filePath) => {
+        // Presigned storage URLs are used as they are
+        if (/^https?:\/\//.test(filePath)) return filePath;
         const cleanPath = filePath.replace(/^(https?:\/\/[^/]+)?\/?/, '');
         return `${BACKEND_URL}/${cleanPath}`;
     };
@@ -100,7 +102,7 @@ document.addEventListener('DOMContentLoaded', function() {
             console.log('Download URL:', downloadUrl);
 
             let fileName = 'converted.webp';
-            const pathParts = filePath.split('/');
+            const pathParts = decodeURIComponent(filePath.split('?')[0]).split('/');
             if (pathParts.length > 0) {
                 const lastPart = pathParts[pathParts.length - 1];
                 const idSeparatorIndex = lastPart.indexOf('_');
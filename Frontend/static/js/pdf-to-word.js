@@ -98,6 +98,8 @@ document.addEventListener('DOMContentLoaded', function() {
     };
 
     const constructDownloadUrl = (filePath) => {
+        // Presigned storage URLs are used as they are
+        if (/^https?:\/\//.test(filePath)) return filePath;
         const cleanPath = filePath.replace(/^(https?:\/\/[^/]+)?\/?/, '');
         return `${BACKEND_URL}/${cleanPath}`;
     };
@@ -118,7 +120,7 @@ document.addEventListener('DOMContentLoaded', function() {
             const downloadUrl = constructDownloadUrl(filePath);
             
             let fileName = 'converted.docx';
-            const pathParts = filePath.split('/');
+            const pathParts = decodeURIComponent(filePath.split('?')[0]).split('/');
             if (pathParts.length > 0) {
                 const lastPart = pathParts[pathParts.length - 1];
                 const idSeparatorIndex = lastPart.indexOf('_');